@@ -0,0 +1,42 @@
+import argparse
+import sys
+
+from benchmarks.bench import uruchom, zapisz_wyniki, tabela, przekroczone_budzety
+
+
+def main():
+    """
+    Uruchamia benchmarki pakietu na syntetycznych danych i zapisuje wyniki do pliku JSON
+    (python -m benchmarks --output wyniki.json)
+    """
+    parser = argparse.ArgumentParser(description="Benchmarki pakietu data_analyzer na syntetycznych danych z kodami TERYT.")
+    parser.add_argument('--skale', type=int, nargs='+', default=[2477],
+                        help="Liczby gmin w generowanych zbiorach (najwyżej ok. 95 tys., tyle mieszczą kody TERYT).")
+    parser.add_argument('--koncesje', type=int, default=416, help="Liczba wierszy rejestru koncesji.")
+    parser.add_argument('--wiersze', type=int, default=0,
+                        help="Powiela zbiory w benchmarkach preprocessora do tej liczby wierszy (jak panel wielu lat).")
+    parser.add_argument('--powtorzenia', type=int, default=3, help="Liczba powtórzeń każdego pomiaru.")
+    parser.add_argument('--seed', type=int, default=0, help="Ziarno generatora danych.")
+    parser.add_argument('--csv', action='store_true', help="Zapisuje wszystkie zbiory jako CSV zamiast Excela.")
+    parser.add_argument('--bez-pipeline', action='store_true', help="Pomija pomiar całego skryptu analiza_do_pliku.py.")
+    parser.add_argument('--arrow', action='store_true',
+                        help="Mierzy dodatkowo wczytywanie, preprocessing i cały skrypt na typach pyarrow (wymaga pyarrow).")
+    parser.add_argument('--bez-startu', action='store_true',
+                        help="Pomija pomiar czasu startu (importu pakietu i --help skryptu) względem budżetu.")
+    parser.add_argument('--output', default="wyniki_benchmarkow.json", help="Plik JSON z wynikami.")
+    args = parser.parse_args()
+
+    wyniki = uruchom(args.skale, args.koncesje, args.wiersze, args.powtorzenia, excel=not args.csv,
+                     seed=args.seed, pipeline=not args.bez_pipeline, arrow=args.arrow, start=not args.bez_startu)
+    zapisz_wyniki(wyniki, args.output)
+    print(tabela(wyniki))
+    przekroczone = przekroczone_budzety(wyniki)
+    for rekord in przekroczone:
+        print(f"Przekroczony budżet startu: {rekord['funkcja']} ({rekord['zbior']}) "
+              f"{rekord['czas_min']:.3f} s, budżet {rekord.get('budzet', '-')} s")
+    if przekroczone:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
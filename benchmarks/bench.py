@@ -0,0 +1,342 @@
+import contextlib
+import functools
+import io
+import json
+import logging
+import os
+import platform
+import runpy
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from data_analyzer import analysis as anal
+from data_analyzer import data_loader as dl
+from data_analyzer import preprocessor as ppr
+from data_analyzer import reporter as rep
+from benchmarks.generator import generuj_dane, zapisz_dane
+
+# Dopisek w nazwie zbioru dla pomiarów na ramkach z typami pyarrow
+ARROW = "[arrow]"
+KATALOG_PAKIETU = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SKRYPT = os.path.join(KATALOG_PAKIETU, "scripts", "analiza_do_pliku.py")
+# Budżety czasu startu w sekundach (czas całego procesu, razem z uruchomieniem interpretera), mierzone w nowych procesach
+BUDZET_STARTU = {
+    "import data_analyzer": 0.1,
+    "import data_analyzer.analysis": 1.0,
+    "analiza_do_pliku.py --help": 1.0,
+}
+# Pakiety, które nie mogą być wczytywane przy imporcie modułów data_analyzer (tylko przy pierwszym użyciu)
+LENIWE_ZALEZNOSCI = ["scipy", "openpyxl", "xlrd"]
+
+
+def zmierz(funkcja, *args, powtorzenia: int = 3, **kwargs):
+    """
+    Wywołuje funkcję kilka razy i zwraca (wynik ostatniego wywołania, lista czasów w sekundach).
+    """
+    czasy = []
+    wynik = None
+    for _ in range(powtorzenia):
+        start = time.perf_counter()
+        wynik = funkcja(*args, **kwargs)
+        czasy.append(time.perf_counter() - start)
+    return wynik, czasy
+
+
+def _rekord(grupa: str, funkcja: str, zbior: str, wiersze: int, czasy: list[float]) -> dict:
+    return {
+        "grupa": grupa,
+        "funkcja": funkcja,
+        "zbior": zbior,
+        "wiersze_we": int(wiersze),
+        "czas_min": min(czasy),
+        "czas_mediana": float(np.median(czasy)),
+    }
+
+
+def powiel(df: pd.DataFrame, liczba_wierszy: int) -> pd.DataFrame:
+    """
+    Powiela wiersze ramki (jak panel wielu lat tych samych gmin) do co najmniej podanej liczby wierszy.
+    """
+    if liczba_wierszy <= len(df):
+        return df
+    razy = -(-liczba_wierszy // len(df))
+    return pd.concat([df] * razy, ignore_index=True)
+
+
+# Kroki na kolumnie TERYT z analiza_do_pliku.py, które PlanKrokow wykonuje w jednym przejściu
+KROKI_TERYT_POPULACJA = [
+    ("usun_puste_wiersze", ppr.usun_puste_wiersze, {}),
+    ("usun_rozdzielone_gminy_mw", ppr.usun_rozdzielone_gminy_mw, {}),
+    ("usun_ostatnia_cyfre", ppr.usun_ostatnia_cyfre, {"column": "TERYT"}),
+    ("str_to_int", ppr.str_to_int, {"column": "TERYT"}),
+]
+KROKI_TERYT_POWIERZCHNIE = [
+    ("usun_puste_wiersze", ppr.usun_puste_wiersze, {}),
+    ("usun_odstepy", ppr.usun_odstepy, {}),
+    ("usun_krotkie", ppr.usun_krotkie, {}),
+    ("usun_rozdzielone_gminy_mw", ppr.usun_rozdzielone_gminy_mw, {}),
+    ("usun_dzielnice_miast", ppr.usun_dzielnice_miast, {}),
+    ("usun_ostatnia_cyfre", ppr.usun_ostatnia_cyfre, {"column": "TERYT"}),
+    ("str_to_int", ppr.str_to_int, {"column": "TERYT"}),
+]
+
+
+def _lancuch(grupa_wynikow: list, zbior: str, df: pd.DataFrame, kroki: list, powtorzenia: int) -> pd.DataFrame:
+    """
+    Mierzy kolejne kroki preprocessingu, podając każdemu wynik poprzedniego (tak jak w analiza_do_pliku.py).
+    """
+    for nazwa, funkcja, kwargs in kroki:
+        wejscie = len(df)
+        df, czasy = zmierz(funkcja, df, powtorzenia=powtorzenia, **kwargs)
+        grupa_wynikow.append(_rekord("preprocessor", nazwa, zbior, wejscie, czasy))
+    return df
+
+
+def benchmark_preprocessor(dane: dict[str, pd.DataFrame], powtorzenia: int = 3, liczba_wierszy: int = 0) -> tuple[list, dict]:
+    """
+    Mierzy funkcje preprocessora na łańcuchach z analiza_do_pliku.py. Zwraca wyniki i przetworzone zbiory.
+    """
+    wyniki = []
+    populacja_wejscie = dane["populacja"].iloc[8:, :3]
+    populacja_wejscie.columns = ["Gmina", "TERYT", "Ludność"]
+    populacja = _lancuch(wyniki, "populacja", powiel(populacja_wejscie, liczba_wierszy), KROKI_TERYT_POPULACJA, powtorzenia)
+    populacja["Ludność"] = populacja["Ludność"].astype(int)
+
+    powierzchnie = _lancuch(wyniki, "powierzchnie", powiel(dane["powierzchnie"].iloc[:, :3], liczba_wierszy),
+                            KROKI_TERYT_POWIERZCHNIE + [
+        ("zlacz_gminy", ppr.zlacz_gminy, {"gmina_docelowa": "Kamienica", "gmina_do_wlaczenia": "Szczawa",
+                                          "kolumna_wartosci": "Powierzchnia [ha]", "kolumna_nazw": "Nazwa jednostki"}),
+    ], powtorzenia)
+
+    pozary = _lancuch(wyniki, "pozary", powiel(dane["pozary"].iloc[:, :5], liczba_wierszy), [
+        ("zmien_nazwe", ppr.zmien_nazwe, {"old_name": "RAZEM Pożar (P)", "new_name": "Liczba Pożarów"}),
+        ("usun_puste_wiersze", ppr.usun_puste_wiersze, {}),
+        ("zlacz_dzielnice", ppr.zlacz_dzielnice, {"sum_col": "Liczba Pożarów"}),
+        ("zlacz_gminy", ppr.zlacz_gminy, {"gmina_docelowa": 200209, "gmina_do_wlaczenia": 200216,
+                                          "kolumna_wartosci": "Liczba Pożarów", "kolumna_nazw": "TERYT"}),
+        ("zlacz_gminy_wiele", ppr.zlacz_gminy_wiele, {"mapowanie": {120713: 120705, 200216: 200209},
+                                                      "kolumny_wartosci": "Liczba Pożarów", "kolumna_nazw": "TERYT"}),
+    ], powtorzenia)
+
+    # te same kroki na kolumnie TERYT wykonane razem przez PlanKrokow, do porównania z sumą kroków powyżej
+    for zbior, df, kroki in [
+        ("populacja", powiel(populacja_wejscie, liczba_wierszy), KROKI_TERYT_POPULACJA),
+        ("powierzchnie", powiel(dane["powierzchnie"].iloc[:, :3], liczba_wierszy), KROKI_TERYT_POWIERZCHNIE),
+    ]:
+        plan = ppr.PlanKrokow([(funkcja, kwargs) for _, funkcja, kwargs in kroki])
+        _, czasy = zmierz(plan.wykonaj, df, powtorzenia=powtorzenia)
+        wyniki.append(_rekord("preprocessor", "PlanKrokow", zbior, len(df), czasy))
+
+    wojewodztwa = pd.DataFrame({"Województwo": "WOJ. " + dane["koncesje"]["Województwo"].str[5:]})
+    _lancuch(wyniki, "koncesje", powiel(wojewodztwa, liczba_wierszy), [
+        ("usun_woj", ppr.usun_woj, {}),
+        ("litery_na_male", ppr.litery_na_male, {}),
+    ], powtorzenia)
+
+    for nazwa, funkcja, args in [
+        ("sprawdz_zgodnosc", ppr.sprawdz_zgodnosc, (pozary, populacja, "TERYT", 0)),
+        ("uzgodnij_klucze", ppr.uzgodnij_klucze, ([pozary, populacja, powierzchnie], "TERYT")),
+        ("znajdz_duplikaty", ppr.znajdz_duplikaty, (pozary, "TERYT")),
+        ("znajdz_duplikaty [Gmina+Powiat]", ppr.znajdz_duplikaty, (pozary, ["Gmina", "Powiat"])),
+    ]:
+        _, czasy = zmierz(funkcja, *args, powtorzenia=powtorzenia)
+        wyniki.append(_rekord("preprocessor", nazwa, "pozary", len(pozary), czasy))
+    return wyniki, {"pozary": pozary, "populacja": populacja, "powierzchnie": powierzchnie}
+
+
+def benchmark_analysis(wszystkie_dane: pd.DataFrame, powtorzenia: int = 3) -> list:
+    """
+    Mierzy funkcje modułu analysis na połączonym zbiorze gmin.
+    """
+    kolumny = ["Liczba Pożarów", "Powierzchnia [ha]", "Ludność"]
+    pary = [("Ludność", "Liczba Pożarów"), ("Powierzchnia [ha]", "Liczba Pożarów"), ("Ludność", "Powierzchnia [ha]")]
+    pomiary = [
+        ("oblicz_statystyki", lambda: anal.oblicz_statystyki(wszystkie_dane, kolumny)),
+        ("StatystykiPrzyrostowe", lambda: anal.StatystykiPrzyrostowe(kolumny).dodaj(wszystkie_dane).wynik()),
+        ("testuj_korelacje", lambda: [anal.testuj_korelacje(wszystkie_dane, *para) for para in pary]),
+        ("testuj_korelacje_wiele", lambda: anal.testuj_korelacje_wiele(wszystkie_dane, pary)),
+    ]
+    wyniki = []
+    for nazwa, funkcja in pomiary:
+        _, czasy = zmierz(funkcja, powtorzenia=powtorzenia)
+        wyniki.append(_rekord("analysis", nazwa, "wszystkie_dane", len(wszystkie_dane), czasy))
+    return wyniki
+
+
+def benchmark_reporter(wszystkie_dane: pd.DataFrame, katalog: str, powtorzenia: int = 3) -> list:
+    """
+    Mierzy zapis raportu z wynikami analizy.
+    """
+    kolumny = ["Liczba Pożarów", "Powierzchnia [ha]", "Ludność"]
+    raport = {"statystyki": anal.oblicz_statystyki(wszystkie_dane, kolumny),
+              "testy": anal.testuj_korelacje_wiele(wszystkie_dane)}
+    _, czasy = zmierz(rep.generuj_raport, raport, os.path.join(katalog, "raport.json"), powtorzenia=powtorzenia)
+    return [_rekord("reporter", "generuj_raport", "wyniki_analizy", len(wszystkie_dane), czasy)]
+
+
+def benchmark_data_loader(sciezki: dict[str, str], powtorzenia: int = 3, arrow: bool = False) -> list:
+    """
+    Mierzy wczytywanie plików (z pominięciem cache, żeby mierzyć parsowanie).
+    """
+    wyniki = []
+    for nazwa in ("pozary", "populacja", "powierzchnie"):
+        df, czasy = zmierz(dl.load_data, sciezki[nazwa], cache=False, powtorzenia=powtorzenia)
+        wyniki.append(_rekord("data_loader", "load_data", nazwa, len(df), czasy))
+        if arrow:
+            df, czasy = zmierz(dl.load_data, sciezki[nazwa], cache=False, dtype_backend="pyarrow", powtorzenia=powtorzenia)
+            wyniki.append(_rekord("data_loader", "load_data", f"{nazwa} {ARROW}", len(df), czasy))
+    # wybór kolumn i wierszy przekazywany do parsera, tak jak w analiza_do_pliku.py
+    df, czasy = zmierz(dl.load_data, sciezki["populacja"], cache=False, kolumny=[0, 1, 2], pomin_wiersze=8, dtype=object,
+                       powtorzenia=powtorzenia)
+    wyniki.append(_rekord("data_loader", "load_data", "populacja [wybór kolumn]", len(df), czasy))
+    pliki = [sciezki[nazwa] for nazwa in ("pozary", "populacja", "powierzchnie")]
+    _, czasy = zmierz(dl.load_many, pliki, cache=False, powtorzenia=powtorzenia)
+    wyniki.append(_rekord("data_loader", "load_many", "pozary+populacja+powierzchnie", 0, czasy))
+    _, czasy = zmierz(dl.zlicz_wartosci, sciezki["koncesje"], ["Miejscowość", "Województwo"], powtorzenia=powtorzenia)
+    wyniki.append(_rekord("data_loader", "zlicz_wartosci", "koncesje", 0, czasy))
+    return wyniki
+
+
+def benchmark_pipeline(sciezki: dict[str, str], katalog: str, powtorzenia: int = 1, argumenty: list[str] | None = None) -> list:
+    """
+    Mierzy cały skrypt analiza_do_pliku.py uruchomiony w tym procesie na wygenerowanych plikach.
+    """
+    argv = [SKRYPT, "--pozary", sciezki["pozary"], "--populacje", sciezki["populacja"],
+            "--powierzchnie", sciezki["powierzchnie"], "--koncesje", sciezki["koncesje"],
+            "--output", os.path.join(katalog, "raport_pipeline.json"), "--bez-cache"] + (argumenty or [])
+    stary_argv = sys.argv
+    try:
+        sys.argv = argv
+        _, czasy = zmierz(runpy.run_path, SKRYPT, run_name="__main__", powtorzenia=powtorzenia)
+    finally:
+        sys.argv = stary_argv
+    return [_rekord("pipeline", "analiza_do_pliku", " ".join(argumenty or []) or "domyślnie", 0, czasy)]
+
+
+def benchmark_startu(powtorzenia: int = 3) -> list:
+    """
+    Mierzy czas startu nowego procesu: import pakietu, import modułu analysis i pomoc skryptu (--help),
+    porównując go z BUDZET_STARTU. Sprawdza też, czy import wszystkich modułów nie wczytuje LENIWE_ZALEZNOSCI.
+    """
+    moduly = [plik[:-3] for plik in sorted(os.listdir(os.path.join(KATALOG_PAKIETU, "data_analyzer")))
+              if plik.endswith(".py") and plik != "__init__.py"]
+    sprawdzenie = (f"import sys; import {', '.join('data_analyzer.' + modul for modul in moduly)}; "
+                   f"print(','.join(m for m in {LENIWE_ZALEZNOSCI!r} if m in sys.modules))")
+    polecenia = {
+        "import data_analyzer": [sys.executable, "-c", "import data_analyzer"],
+        "import data_analyzer.analysis": [sys.executable, "-c", "import data_analyzer.analysis"],
+        "analiza_do_pliku.py --help": [sys.executable, SKRYPT, "--help"],
+    }
+    srodowisko = {**os.environ, "PYTHONPATH": os.pathsep.join(filter(None, [KATALOG_PAKIETU, os.environ.get("PYTHONPATH")]))}
+    uruchom_proces = functools.partial(subprocess.run, check=True, capture_output=True, env=srodowisko)
+
+    wyniki = []
+    for nazwa, polecenie in polecenia.items():
+        _, czasy = zmierz(uruchom_proces, polecenie, powtorzenia=powtorzenia)
+        rekord = _rekord("start", nazwa, "-", 0, czasy)
+        rekord["budzet"] = BUDZET_STARTU[nazwa]
+        rekord["w_budzecie"] = rekord["czas_min"] <= BUDZET_STARTU[nazwa]
+        wyniki.append(rekord)
+    wczytane = uruchom_proces([sys.executable, "-c", sprawdzenie], text=True).stdout.strip()
+    wyniki.append({**_rekord("start", "leniwe zależności", wczytane or "-", 0, [0.0]), "w_budzecie": not wczytane})
+    return wyniki
+
+
+def _polacz_zbiory(przetworzone: dict[str, pd.DataFrame]) -> pd.DataFrame:
+    # przy powielonych zbiorach klucze się powtarzają, więc dołączamy po jednym wierszu na kod (bez iloczynu kartezjańskiego)
+    powierzchnie = przetworzone["powierzchnie"][["TERYT", "Powierzchnia [ha]"]].drop_duplicates("TERYT")
+    populacja = przetworzone["populacja"][["TERYT", "Ludność"]].drop_duplicates("TERYT")
+    wszystkie_dane = pd.merge(przetworzone["pozary"], powierzchnie, on="TERYT", how="left")
+    return pd.merge(wszystkie_dane, populacja, on="TERYT", how="left")
+
+
+def na_arrow(dane: dict[str, pd.DataFrame]) -> dict[str, pd.DataFrame]:
+    """
+    Zamienia typy kolumn zbiorów na typy pyarrow (tak jak load_data z dtype_backend="pyarrow").
+    """
+    return {nazwa: df.convert_dtypes(dtype_backend="pyarrow") for nazwa, df in dane.items()}
+
+
+def uruchom(skale: list[int], liczba_koncesji: int = 416, liczba_wierszy: int = 0, powtorzenia: int = 3,
+            excel: bool = True, seed: int = 0, pipeline: bool = True, arrow: bool = False, start: bool = True) -> dict:
+    """
+    Uruchamia wszystkie benchmarki dla każdej skali (liczby gmin) i zwraca wyniki gotowe do zapisu w JSON.
+    Z arrow=True wczytywanie, preprocessing i cały skrypt są mierzone dodatkowo na typach pyarrow
+    (zbiory z dopiskiem ARROW), żeby można je było porównać z domyślnymi typami numpy.
+    Czas startu (benchmark_startu) nie zależy od skali, więc jest mierzony raz, z liczbą gmin 0.
+    """
+    wyniki = []
+    if start:
+        wyniki += [{**rekord, "liczba_gmin": 0} for rekord in benchmark_startu(powtorzenia)]
+    poziom_logowania = logging.root.manager.disable
+    logging.disable(logging.WARNING)  # komunikaty i wydruki funkcji zaburzałyby pomiary
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            for liczba_gmin in skale:
+                dane = generuj_dane(liczba_gmin, liczba_koncesji, seed)
+                with tempfile.TemporaryDirectory() as katalog:
+                    sciezki = zapisz_dane(dane, katalog, excel=excel)
+                    wyniki_skali = benchmark_data_loader(sciezki, powtorzenia, arrow)
+                    wyniki_preprocessora, przetworzone = benchmark_preprocessor(dane, powtorzenia, liczba_wierszy)
+                    wyniki_skali += wyniki_preprocessora
+                    if arrow:
+                        wyniki_arrow, _ = benchmark_preprocessor(na_arrow(dane), powtorzenia, liczba_wierszy)
+                        for rekord in wyniki_arrow:
+                            rekord["zbior"] += f" {ARROW}"
+                        wyniki_skali += wyniki_arrow
+                    wszystkie_dane = _polacz_zbiory(przetworzone)
+                    wyniki_skali += benchmark_analysis(wszystkie_dane, powtorzenia)
+                    wyniki_skali += benchmark_reporter(wszystkie_dane, katalog, powtorzenia)
+                    if pipeline:
+                        wyniki_skali += benchmark_pipeline(sciezki, katalog)
+                        if arrow:
+                            wyniki_skali += benchmark_pipeline(sciezki, katalog, argumenty=["--arrow"])
+                for rekord in wyniki_skali:
+                    rekord["liczba_gmin"] = liczba_gmin
+                wyniki += wyniki_skali
+    finally:
+        logging.disable(poziom_logowania)
+
+    return {
+        "meta": {
+            "data": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "pandas": pd.__version__,
+            "numpy": np.__version__,
+            "platforma": platform.platform(),
+            "skale": skale,
+            "liczba_koncesji": liczba_koncesji,
+            "liczba_wierszy": liczba_wierszy,
+            "powtorzenia": powtorzenia,
+            "seed": seed,
+            "arrow": arrow,
+        },
+        "wyniki": wyniki,
+    }
+
+
+def zapisz_wyniki(wyniki: dict, sciezka: str):
+    with open(sciezka, "w", encoding="utf-8") as f:
+        json.dump(wyniki, f, ensure_ascii=False, indent=2)
+
+
+def przekroczone_budzety(wyniki: dict) -> list[dict]:
+    """
+    Zwraca pomiary startu przekraczające budżet (lub z leniwymi zależnościami wczytanymi przy imporcie).
+    """
+    return [rekord for rekord in wyniki["wyniki"] if rekord.get("w_budzecie") is False]
+
+
+def tabela(wyniki: dict) -> str:
+    """
+    Zwraca wyniki jako tabelę tekstową (czasy w milisekundach).
+    """
+    df = pd.DataFrame(wyniki["wyniki"])
+    df["czas_min [ms]"] = (df["czas_min"] * 1000).round(2)
+    return df[["liczba_gmin", "grupa", "funkcja", "zbior", "wiersze_we", "czas_min [ms]"]].to_string(index=False)
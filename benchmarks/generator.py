@@ -0,0 +1,254 @@
+import os
+import numpy as np
+import pandas as pd
+
+# Nazwy województw w kolejności kodów TERYT (02, 04, ..., 32)
+WOJEWODZTWA = [
+    "dolnośląskie", "kujawsko-pomorskie", "lubelskie", "lubuskie", "łódzkie", "małopolskie", "mazowieckie", "opolskie",
+    "podkarpackie", "podlaskie", "pomorskie", "śląskie", "świętokrzyskie", "warmińsko-mazurskie", "wielkopolskie",
+    "zachodniopomorskie",
+]
+
+# Gminy, które odłączyły się w 2025 roku (kod gminy nowej -> kod gminy macierzystej); zbiory danych z różnych lat
+# różnią się tym podziałem, tak jak prawdziwe dane, więc skrypt musi je połączyć
+NOWE_GMINY = {
+    120713: (120705, "Szczawa", "Kamienica"),
+    200216: (200209, "Grabówka", "Supraśl"),
+}
+
+_SYLABY = ["bo", "le", "sła", "wiec", "gro", "mad", "ka", "no", "wo", "dziec", "łę", "ko", "brze", "ście", "żór",
+           "ska", "gó", "ra", "cho", "jna", "sie", "dlce", "ząb", "ki", "pu", "szcz", "ówek", "lin", "ćmie", "rów"]
+
+# Maksymalna liczba gmin, jaką da się zapisać w kodach TERYT (16 województw, 60 powiatów ziemskich, 99 gmin)
+MAKS_LICZBA_GMIN = 16 * 60 * 99
+
+
+def _nazwa(rng: np.random.Generator, liczba_sylab: int) -> str:
+    sylaby = rng.choice(_SYLABY, size=liczba_sylab)
+    return "".join(sylaby).capitalize()
+
+
+def _hierarchia(liczba_gmin: int, rng: np.random.Generator) -> pd.DataFrame:
+    """
+    Losuje podział administracyjny: jeden wiersz na gminę z kodem województwa, powiatu i gminy,
+    rodzajem gminy (1 - miejska, 2 - wiejska, 3 - miejsko-wiejska) i liczbą dzielnic (tylko miasta na prawach powiatu)
+    """
+    liczba_gmin = min(max(liczba_gmin, 2 * 16 * 4), MAKS_LICZBA_GMIN)
+    gmin_na_woj = np.full(16, liczba_gmin // 16)
+    gmin_na_woj[: liczba_gmin % 16] += 1
+
+    wiersze = []
+    for w, liczba in enumerate(gmin_na_woj):
+        woj = 2 * (w + 1)
+        # kilka miast na prawach powiatu (kody powiatów od 61), pierwsze z nich jest podzielone na dzielnice
+        liczba_miast = int(min(4, max(1, liczba // 150)))
+        for m in range(liczba_miast):
+            wiersze.append((woj, 61 + m, 1, 1, rng.integers(3, 7) if m == 0 else 0))
+        pozostalo = liczba - liczba_miast
+        liczba_powiatow = int(min(60, max(1, round(pozostalo / 7))))
+        gmin_na_powiat = np.full(liczba_powiatow, pozostalo // liczba_powiatow)
+        gmin_na_powiat[: pozostalo % liczba_powiatow] += 1
+        for p, liczba_w_powiecie in enumerate(gmin_na_powiat):
+            powiat = p + 1
+            # miejsca gmin, które odłączyły się w 2025 roku, muszą istnieć niezależnie od skali
+            minimum = max([kod % 100 for kod in NOWE_GMINY if kod // 10000 == woj and kod // 100 % 100 == powiat], default=0)
+            for g in range(max(int(liczba_w_powiecie), minimum)):
+                rodzaj = rng.choice([1, 2, 3], p=[0.12, 0.6, 0.28])
+                wiersze.append((woj, powiat, g + 1, rodzaj, 0))
+
+    hierarchia = pd.DataFrame(wiersze, columns=["woj", "powiat", "gmina", "rodzaj", "dzielnice"])
+    hierarchia["kod"] = hierarchia["woj"] * 10000 + hierarchia["powiat"] * 100 + hierarchia["gmina"]
+    hierarchia = hierarchia.sort_values("kod", ignore_index=True)
+    hierarchia.loc[hierarchia["kod"].isin(list(NOWE_GMINY) + [v[0] for v in NOWE_GMINY.values()]), "rodzaj"] = 2
+
+    nazwy_powiatow = {}
+    for woj, powiat in hierarchia[["woj", "powiat"]].drop_duplicates().itertuples(index=False):
+        nazwy_powiatow[(woj, powiat)] = _nazwa(rng, 2) + "ski" if powiat < 61 else None
+    nazwy = []
+    for wiersz in hierarchia.itertuples(index=False):
+        nazwa = _nazwa(rng, int(rng.integers(2, 4)))
+        if wiersz.powiat >= 61:
+            nazwy_powiatow[(wiersz.woj, wiersz.powiat)] = nazwa
+        nazwy.append(nazwa)
+    hierarchia["nazwa"] = nazwy
+    for kod, (kod_macierzystej, nazwa, nazwa_macierzystej) in NOWE_GMINY.items():
+        hierarchia.loc[hierarchia["kod"] == kod, "nazwa"] = nazwa
+        hierarchia.loc[hierarchia["kod"] == kod_macierzystej, "nazwa"] = nazwa_macierzystej
+    # gmina miejska i wiejska o tej samej nazwie (np. Bełchatów) to w prawdziwych danych częsty przypadek
+    wiejskie = hierarchia.index[(hierarchia["rodzaj"] == 2) & (hierarchia["gmina"] > 1)]
+    poprzednie = wiejskie - 1
+    miejskie_przed = hierarchia.loc[poprzednie, "rodzaj"].to_numpy() == 1
+    hierarchia.loc[wiejskie[miejskie_przed], "nazwa"] = hierarchia.loc[poprzednie[miejskie_przed], "nazwa"].to_numpy()
+    hierarchia["nazwa_powiatu"] = [nazwy_powiatow[(w, p)] for w, p in zip(hierarchia["woj"], hierarchia["powiat"])]
+    hierarchia["wojewodztwo"] = [WOJEWODZTWA[w // 2 - 1] for w in hierarchia["woj"]]
+
+    hierarchia["ludnosc"] = np.round(rng.lognormal(8.8, 0.7, len(hierarchia)) * np.where(hierarchia["powiat"] >= 61, 20, 1)).astype(np.int64)
+    hierarchia["powierzchnia"] = np.round(rng.lognormal(9.3, 0.6, len(hierarchia))).astype(np.int64)
+    hierarchia["pozary"] = rng.poisson(hierarchia["ludnosc"] * 0.002 + hierarchia["powierzchnia"] * 0.001)
+    return hierarchia
+
+
+def _teryt7(kod: np.ndarray, rodzaj: np.ndarray) -> list[str]:
+    return [f"{k:06d}{r}" for k, r in zip(kod, rodzaj)]
+
+
+def _pozary(h: pd.DataFrame, rng: np.random.Generator) -> pd.DataFrame:
+    """
+    Pożary: kod bez cyfry rodzaju jako liczba całkowita, duże miasta rozbite na dzielnice,
+    gminy z 2025 roku wpisane pod starą nazwą
+    """
+    wiersze = h.loc[h.index.repeat(np.maximum(h["dzielnice"], 1))].copy()
+    numer_dzielnicy = wiersze.groupby(level=0).cumcount()
+    wiersze["kod"] = wiersze["kod"] + numer_dzielnicy.to_numpy()
+    wiersze["pozary"] = np.where(wiersze["dzielnice"] > 0, rng.poisson(wiersze["pozary"] / np.maximum(wiersze["dzielnice"], 1)), wiersze["pozary"])
+    for kod, (kod_macierzystej, _, nazwa_macierzystej) in NOWE_GMINY.items():
+        wiersze.loc[wiersze["kod"] == kod, "nazwa"] = nazwa_macierzystej
+    male = rng.binomial(wiersze["pozary"], 0.95)
+    srednie = rng.binomial(wiersze["pozary"] - male, 0.8)
+    return pd.DataFrame({
+        "TERYT": wiersze["kod"].to_numpy(),
+        "Województwo": wiersze["wojewodztwo"].to_numpy(),
+        "Powiat": wiersze["nazwa_powiatu"].to_numpy(),
+        "Gmina": wiersze["nazwa"].to_numpy(),
+        "RAZEM Pożar (P)": wiersze["pozary"].to_numpy(),
+        "Mały (P/M)": male,
+        "Średni (P/Ś)": srednie,
+        "Duży (P/D)": wiersze["pozary"].to_numpy() - male - srednie,
+    })
+
+
+def _rozbij_mw(h: pd.DataFrame, kolumna: str, rng: np.random.Generator) -> pd.DataFrame:
+    """
+    Dokleja do gmin miejsko-wiejskich (rodzaj 3) wiersze miasta (4) i obszaru wiejskiego (5), sumujące się do gminy
+    """
+    mw = h[h["rodzaj"] == 3]
+    udzial = rng.uniform(0.2, 0.7, len(mw))
+    miasto = mw.assign(rodzaj=4, **{kolumna: np.round(mw[kolumna] * udzial).astype(np.int64)})
+    wies = mw.assign(rodzaj=5, **{kolumna: mw[kolumna].to_numpy() - miasto[kolumna].to_numpy()})
+    return pd.concat([h, miasto, wies]).sort_values(["kod", "rodzaj"], kind="stable")
+
+
+def _populacja(h: pd.DataFrame, rng: np.random.Generator) -> pd.DataFrame:
+    """
+    Populacja: arkusz GUS z 8 wierszami nagłówka, kody 7-cyfrowe jako napisy, puste wiersze między województwami
+    """
+    h = h[~h["kod"].isin(list(NOWE_GMINY))]
+    wiersze = _rozbij_mw(h, "ludnosc", rng)
+    prefiks = wiersze["rodzaj"].map({1: "M.", 2: "G.", 3: "M-W.", 4: "M.", 5: "G."})
+    dane = pd.DataFrame({
+        "TABL. IV. LUDNOŚĆ WEDŁUG GMIN": (prefiks + wiersze["nazwa"]).to_numpy(),
+        "Unnamed: 1": _teryt7(wiersze["kod"].to_numpy(), wiersze["rodzaj"].to_numpy()),
+        "Unnamed: 2": wiersze["ludnosc"].to_numpy(),
+        "Unnamed: 3": np.round(wiersze["ludnosc"].to_numpy() * 0.52).astype(np.int64),
+    })
+    naglowek = pd.DataFrame({col: [None] * 8 for col in dane.columns})
+    naglowek.iloc[0, 0] = "POPULATION BY GMINAS"
+    naglowek.iloc[2, 0] = "Województwa\nVoivodships\nGminy\nGminas"
+    naglowek.iloc[2, 1] = "Identyfikator terytorialny"
+    naglowek.iloc[2, 2] = "Ogółem"
+    puste = pd.DataFrame({col: [None] for col in dane.columns})
+    czesci = [naglowek]
+    for _, grupa in dane.groupby(dane["Unnamed: 1"].str[:2], sort=True):
+        czesci += [grupa, puste]
+    return pd.concat(czesci, ignore_index=True)
+
+
+def _powierzchnie(h: pd.DataFrame, rng: np.random.Generator) -> pd.DataFrame:
+    """
+    Powierzchnie: kody ze spacjami, wiersze zbiorcze dla kraju, województw i powiatów, dzielnice z cyfrą 8/9
+    """
+    gminy = _rozbij_mw(h, "powierzchnia", rng)
+    dzielnice = h[h["dzielnice"] > 0]
+    dzielnice = dzielnice.loc[dzielnice.index.repeat(dzielnice["dzielnice"])].copy()
+    dzielnice["kod"] = dzielnice["kod"] + 1 + dzielnice.groupby(level=0).cumcount().to_numpy()
+    dzielnice["rodzaj"] = 9
+    dzielnice["powierzchnia"] = dzielnice["powierzchnia"] // dzielnice["dzielnice"]
+    gminy = pd.concat([gminy, dzielnice]).sort_values(["kod", "rodzaj"], kind="stable")
+    kody = [f"{k // 10000:02d} {k // 100 % 100:02d} {k % 100:02d} {r}" for k, r in zip(gminy["kod"], gminy["rodzaj"])]
+    nazwy = np.where(gminy["rodzaj"] == 1, "M. " + gminy["nazwa"], gminy["nazwa"])
+    czesc_gmin = pd.DataFrame({"TERYT": kody, "Nazwa jednostki": nazwy, "Powierzchnia [ha]": gminy["powierzchnia"].to_numpy(),
+                               "woj": gminy["woj"].to_numpy(), "powiat": gminy["powiat"].to_numpy(), "poziom": 3})
+
+    bez_podzialu = h.groupby(["woj", "powiat"], as_index=False).agg(powierzchnia=("powierzchnia", "sum"),
+                                                                    nazwa=("nazwa_powiatu", "first"))
+    powiaty = pd.DataFrame({
+        "TERYT": [f"{w:02d} {p:02d}" for w, p in zip(bez_podzialu["woj"], bez_podzialu["powiat"])],
+        "Nazwa jednostki": np.where(bez_podzialu["powiat"] >= 61, "Powiat m. " + bez_podzialu["nazwa"], "Powiat " + bez_podzialu["nazwa"]),
+        "Powierzchnia [ha]": bez_podzialu["powierzchnia"].to_numpy(), "woj": bez_podzialu["woj"].to_numpy(),
+        "powiat": bez_podzialu["powiat"].to_numpy(), "poziom": 2})
+    woj = h.groupby("woj", as_index=False).agg(powierzchnia=("powierzchnia", "sum"))
+    wojewodztwa = pd.DataFrame({
+        "TERYT": [f"{w:02d}" for w in woj["woj"]],
+        "Nazwa jednostki": ["WOJ. " + WOJEWODZTWA[w // 2 - 1].upper() for w in woj["woj"]],
+        "Powierzchnia [ha]": woj["powierzchnia"].to_numpy(), "woj": woj["woj"].to_numpy(), "powiat": 0, "poziom": 1})
+    polska = pd.DataFrame({"TERYT": ["00"], "Nazwa jednostki": ["POLSKA"], "Powierzchnia [ha]": [h["powierzchnia"].sum()],
+                           "woj": [0], "powiat": [0], "poziom": [0]})
+    wynik = pd.concat([polska, wojewodztwa, powiaty, czesc_gmin]).sort_values(["woj", "powiat", "poziom"], kind="stable")
+    wynik["Powierzchnia [km2]"] = (wynik["Powierzchnia [ha]"] // 100).astype(np.int64)
+    return wynik.drop(columns=["woj", "powiat", "poziom"]).reset_index(drop=True)
+
+
+def _koncesje(h: pd.DataFrame, liczba_koncesji: int, rng: np.random.Generator) -> pd.DataFrame:
+    """
+    Rejestr koncesji: firmy losowane proporcjonalnie do ludności, część w miejscowościach, które nie są gminami
+    """
+    wagi = h["ludnosc"].to_numpy() ** 1.3
+    wybrane = rng.choice(len(h), size=liczba_koncesji, p=wagi / wagi.sum())
+    miejscowosci = h["nazwa"].to_numpy()[wybrane].astype(object)
+    wies = rng.random(liczba_koncesji) < 0.15
+    wsie = np.array([_nazwa(rng, 3) for _ in range(50)], dtype=object)
+    miejscowosci[wies] = wsie[rng.integers(0, len(wsie), wies.sum())]
+    numery = np.arange(liczba_koncesji)
+    return pd.DataFrame({
+        "Numer zezwolenia": [f"{n % 997}/{23 + n % 3}" for n in numery],
+        "Nazwa firmy": [f"FIRMA {n} Spółka z ograniczoną odpowiedzialnością" for n in numery],
+        "Kod pocztowy": [f"{k:02d}-{n % 1000:03d}" for k, n in zip(rng.integers(0, 100, liczba_koncesji), numery)],
+        "Miejscowość": miejscowosci,
+        "Adres": [f"ul. Polna {n % 200 + 1}" for n in numery],
+        "Województwo": ("WOJ. " + h["wojewodztwo"].str.upper()).to_numpy()[wybrane],
+    })
+
+
+def generuj_dane(liczba_gmin: int = 2477, liczba_koncesji: int = 416, seed: int = 0) -> dict[str, pd.DataFrame]:
+    """
+    Generuje deterministyczny (dla danego seed) zestaw czterech zbiorów w formacie plików źródłowych:
+    pożary, populacja, powierzchnie i koncesje, z poprawnymi kodami TERYT, dzielnicami miast
+    i gminami miejsko-wiejskimi rozbitymi na miasto i obszar wiejski.
+
+    Args:
+        liczba_gmin (int): Przybliżona liczba gmin (ograniczona pojemnością kodów TERYT)
+        liczba_koncesji (int): Liczba wierszy rejestru koncesji (może sięgać dziesiątek milionów)
+        seed (int): Ziarno generatora liczb losowych
+
+    Returns:
+        Słownik {nazwa zbioru: DataFrame}
+    """
+    rng = np.random.default_rng(seed)
+    h = _hierarchia(liczba_gmin, rng)
+    return {
+        "pozary": _pozary(h, rng),
+        "populacja": _populacja(h, rng),
+        "powierzchnie": _powierzchnie(h, rng),
+        "koncesje": _koncesje(h, liczba_koncesji, rng),
+    }
+
+
+def zapisz_dane(dane: dict[str, pd.DataFrame], katalog: str, excel: bool = True) -> dict[str, str]:
+    """
+    Zapisuje wygenerowane zbiory do plików w takim formacie, w jakim przyjmuje je skrypt analiza_do_pliku.py
+    (populacja i powierzchnie jako xlsx, pozostałe jako csv; excel=False zapisuje wszystko jako csv)
+
+    Returns:
+        Słownik {nazwa zbioru: ścieżka do pliku}
+    """
+    os.makedirs(katalog, exist_ok=True)
+    sciezki = {}
+    for nazwa, df in dane.items():
+        if excel and nazwa in ("populacja", "powierzchnie"):
+            sciezka = os.path.join(katalog, f"{nazwa}.xlsx")
+            df.to_excel(sciezka, index=False)
+        else:
+            sciezka = os.path.join(katalog, f"{nazwa}.csv")
+            df.to_csv(sciezka, index=False)
+        sciezki[nazwa] = sciezka
+    return sciezki
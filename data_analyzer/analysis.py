@@ -1,14 +1,30 @@
+import numpy as np
 import pandas as pd
 import logging
-from typing import Dict, Any, List
-from scipy.stats import pearsonr
+import os
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+from itertools import combinations
+from typing import Dict, Any, List, Tuple
+from data_analyzer.profilowanie import mierz
 
-logging.basicConfig(level=logging.INFO, format='%(levelname)s: %(message)s', encoding='utf-8')
+# scipy.stats jest importowany w funkcjach, które go używają - sam import trwa dłużej niż import pandas,
+# a wiele zadań korzystających z pakietu nie liczy żadnego testu
 
+# Losowania testów permutacyjnych i bootstrapu są liczone blokami o tej liczbie prób; każdy blok ma własne ziarno,
+# więc wyniki zależą tylko od seed, a nie od liczby procesów
+ROZMIAR_BLOKU_PROB = 1000
+# Poniżej tej liczby elementów (liczba prób x liczba wierszy, sumarycznie dla wszystkich par) liczymy bez puli procesów
+MIN_ELEMENTOW_DLA_PULI = 20_000_000
+METODY_KORELACJI = ("pearson", "spearman", "kendall")
+
+
+@mierz
 def oblicz_statystyki(df: pd.DataFrame, columns: List[str]) -> Dict[str, Dict[str, Any]]:
     """
     Oblicza i zwraca podstawowe statystyki (min, max, średnia, mediana)
     dla wskazanych kolumn w DataFrame.
+    Statystyki liczone są dla wszystkich kolumn naraz, na jednym dwuwymiarowym bloku NumPy.
 
     Args:
         df (pd.DataFrame): DataFrame do analizy.
@@ -18,36 +34,164 @@ def oblicz_statystyki(df: pd.DataFrame, columns: List[str]) -> Dict[str, Dict[st
         Dict[str, Dict[str, Any]]: Słownik, gdzie kluczem jest nazwa kolumny,
                                    a wartością słownik ze statystykami.
     """
-    stats = {}
     logging.info("Rozpoczynam obliczanie podstawowych statystyk.")
+    kolumny = _kolumny_numeryczne(df, columns)
+    if not kolumny:
+        return {}
+
+    blok = df[kolumny].to_numpy(dtype=float, na_value=np.nan)
+    n, srednia, m2, minimum, maksimum = _momenty(blok)
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", category=RuntimeWarning)  # kolumny bez danych dają NaN, tak jak w pandas
+        mediana = np.nanmedian(blok, axis=0)
+
+    stats = {}
+    for i, col in enumerate(kolumny):
+        stats[col] = _slownik_statystyk(df[col].dtype, n[i], srednia[i], m2[i], minimum[i], maksimum[i], mediana[i])
+        logging.info(f"Obliczono statystyki dla kolumny: '{col}'.")
+    return stats
+
+
+class StatystykiPrzyrostowe:
+    """
+    Akumulator statystyk liczonych przyrostowo (metodą Welforda), bez przechowywania wierszy.
+    Dane można dodawać porcjami (np. kolejne kawałki pliku), a akumulatory policzone na różnych
+    częściach danych łączyć ze sobą. Wynik ma ten sam format co oblicz_statystyki, z tą różnicą,
+    że mediany nie da się policzyć bez przechowywania wszystkich wartości, więc jest równa None.
+    """
+
+    def __init__(self, columns: List[str]):
+        self.columns = list(columns)
+        k = len(self.columns)
+        self.n = np.zeros(k)
+        self.srednia = np.zeros(k)
+        self.m2 = np.zeros(k)
+        self.minimum = np.full(k, np.nan)
+        self.maksimum = np.full(k, np.nan)
+        self.typy = {}
+
+    def dodaj(self, df: pd.DataFrame) -> "StatystykiPrzyrostowe":
+        """
+        Dodaje do akumulatora kolejną porcję danych.
+        """
+        kolumny = _kolumny_numeryczne(df, self.columns)
+        if not kolumny:
+            return self
+        indeksy = [self.columns.index(col) for col in kolumny]
+        for col in kolumny:
+            self.typy.setdefault(col, df[col].dtype)
+
+        momenty = _momenty(df[kolumny].to_numpy(dtype=float, na_value=np.nan))
+        self._scal(indeksy, *momenty)
+        return self
+
+    def polacz(self, inne: "StatystykiPrzyrostowe") -> "StatystykiPrzyrostowe":
+        """
+        Dołącza statystyki z innego akumulatora (np. policzonego dla innej partycji danych).
+        """
+        wspolne = [col for col in inne.columns if col in self.columns]
+        indeksy = [self.columns.index(col) for col in wspolne]
+        indeksy_innego = [inne.columns.index(col) for col in wspolne]
+        for col in wspolne:
+            if col in inne.typy:
+                self.typy.setdefault(col, inne.typy[col])
+        self._scal(indeksy, inne.n[indeksy_innego], inne.srednia[indeksy_innego], inne.m2[indeksy_innego],
+                   inne.minimum[indeksy_innego], inne.maksimum[indeksy_innego])
+        return self
+
+    def wynik(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Zwraca statystyki w formacie oblicz_statystyki dla kolumn, które pojawiły się w danych.
+        """
+        stats = {}
+        for i, col in enumerate(self.columns):
+            if col in self.typy:
+                stats[col] = _slownik_statystyk(self.typy[col], self.n[i], self.srednia[i], self.m2[i],
+                                                self.minimum[i], self.maksimum[i], None)
+        return stats
+
+    def _scal(self, indeksy, n, srednia, m2, minimum, maksimum):
+        # wzór Chana na łączenie średnich i sum kwadratów odchyleń z dwóch zbiorów
+        n_a, srednia_a, m2_a = self.n[indeksy], self.srednia[indeksy], self.m2[indeksy]
+        n_razem = n_a + n
+        with np.errstate(divide="ignore", invalid="ignore"):
+            udzial = np.where(n_razem > 0, n / n_razem, 0.0)
+        delta = np.where(n > 0, srednia - srednia_a, 0.0)
+        self.srednia[indeksy] = srednia_a + delta * udzial
+        self.m2[indeksy] = m2_a + np.where(n > 0, m2, 0.0) + delta * delta * n_a * udzial
+        self.n[indeksy] = n_razem
+        self.minimum[indeksy] = np.fmin(self.minimum[indeksy], minimum)
+        self.maksimum[indeksy] = np.fmax(self.maksimum[indeksy], maksimum)
+
+
+def _kolumny_numeryczne(df: pd.DataFrame, columns: List[str]) -> List[str]:
+    """
+    Zwraca kolumny z listy, które istnieją w DataFrame i są numeryczne, ostrzegając o pozostałych.
+    """
+    kolumny = []
     for col in columns:
         if col in df.columns:
             # Upewniamy się, że kolumna jest numeryczna przed obliczeniami
             if pd.api.types.is_numeric_dtype(df[col]):
-                stats[col] = {
-                    'min': df[col].min(),
-                    'max': df[col].max(),
-                    'średnia': df[col].mean(),
-                    'mediana': df[col].median(),
-                    'odchylenie_standardowe': df[col].std()
-                }
-                logging.info(f"Obliczono statystyki dla kolumny: '{col}'.")
+                kolumny.append(col)
             else:
                 logging.warning(f"Kolumna '{col}' nie jest typu numerycznego i zostanie pominięta w statystykach.")
         else:
             logging.warning(f"Kolumna '{col}' nie została znaleziona w DataFrame i zostanie pominięta.")
-    return stats
+    return kolumny
 
 
-def testuj_korelacje(df: pd.DataFrame, col1: str, col2: str, poziom_istotnosci: float = 0.05) -> Dict[str, Any]:
+def _momenty(blok: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Liczy dla każdej kolumny bloku liczbę wartości, średnią, sumę kwadratów odchyleń od średniej, minimum i maksimum,
+    pomijając NaN.
+    """
+    maska = ~np.isnan(blok)
+    n = maska.sum(axis=0).astype(float)
+    zera = np.where(maska, blok, 0.0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        srednia = zera.sum(axis=0) / n
+    odchylenia = np.where(maska, blok - srednia, 0.0)
+    m2 = (odchylenia * odchylenia).sum(axis=0)
+    minimum = np.where(n > 0, np.where(maska, blok, np.inf).min(axis=0, initial=np.inf), np.nan)
+    maksimum = np.where(n > 0, np.where(maska, blok, -np.inf).max(axis=0, initial=-np.inf), np.nan)
+    return n, srednia, m2, minimum, maksimum
+
+
+def _slownik_statystyk(typ, n, srednia, m2, minimum, maksimum, mediana) -> Dict[str, Any]:
+    """
+    Składa słownik statystyk jednej kolumny; min i max mają typ kolumny (jak w pandas), pozostałe są liczbami
+    zmiennoprzecinkowymi.
+    """
+    if pd.api.types.is_integer_dtype(typ) and n > 0:
+        minimum, maksimum = np.int64(minimum), np.int64(maksimum)
+    else:
+        minimum, maksimum = np.float64(minimum), np.float64(maksimum)
+    return {
+        'min': minimum,
+        'max': maksimum,
+        'średnia': np.float64(srednia) if n > 0 else np.float64(np.nan),
+        'mediana': np.float64(mediana) if mediana is not None else None,
+        'odchylenie_standardowe': np.float64(np.sqrt(m2 / (n - 1))) if n > 1 else np.float64(np.nan)
+    }
+
+
+@mierz
+def testuj_korelacje(df: pd.DataFrame, col1: str, col2: str, poziom_istotnosci: float = 0.05,
+                     liczba_prob: int = 0, seed: int | None = None, max_workers: int | None = None) -> Dict[str, Any]:
     """
     Przeprowadza test hipotezy o korelacji Pearsona między dwiema kolumnami.
+    Gdy liczba_prob > 0, wynik zawiera dodatkowo p-value testu permutacyjnego i bootstrapowy przedział ufności
+    współczynnika korelacji (na poziomie 1 - poziom_istotnosci), które nie zakładają normalności rozkładów.
 
     Args:
         df (pd.DataFrame): DataFrame zawierający dane.
         col1 (str): Nazwa pierwszej kolumny.
         col2 (str): Nazwa drugiej kolumny.
         poziom_istotnosci (float): Poziom istotnosci (liczba z przedziału (0,1).
+        liczba_prob (int): Liczba permutacji i prób bootstrapowych (0 - tylko test parametryczny).
+        seed (int | None): Ziarno generatora losowego (dla powtarzalności wyników).
+        max_workers (int | None): Maksymalna liczba procesów liczących próby.
 
     Returns:
         Dict[str, Any]: Słownik zawierający wyniki testu hipotezy (nazwy kolumn, współczynnik korelacji, p-value oraz indykator czy p-value mniejsze od 5%).
@@ -70,19 +214,24 @@ def testuj_korelacje(df: pd.DataFrame, col1: str, col2: str, poziom_istotnosci:
         }
 
     try:
+        from scipy.stats import pearsonr
         correlation, p_value = pearsonr(clean_df[col1], clean_df[col2])
         if p_value < poziom_istotnosci:
             logging.info(f"Wykryto istotną statystycznie korelację między '{col1}', a '{col2}'. Odrzucamy hipotezę zerową, na rzecz hipotezy alternatywnej.")
         else:
             logging.info(f"Nie ma podstaw do odrzucenia hipotezy zerowej. Brak istotnej statystycznie korelacji między  '{col1}', a '{col2}'.")
 
-        return {
+        wynik = {
             'kolumna_1': col1,
             'kolumna_2': col2,
             'wspolczynnik_korelacji': correlation,
             'p_value': p_value,
             'istotnosc_statystyczna': p_value < poziom_istotnosci
         }
+        if liczba_prob > 0:
+            dane = (clean_df[col1].to_numpy(dtype=float), clean_df[col2].to_numpy(dtype=float))
+            wynik.update(_testy_losowe([dane], liczba_prob, poziom_istotnosci, seed, max_workers)[0])
+        return wynik
     except Exception as e:
         logging.error(f"Wystąpił błąd podczas testu korelacji między '{col1}' i '{col2}': {e}")
         return {
@@ -93,3 +242,328 @@ def testuj_korelacje(df: pd.DataFrame, col1: str, col2: str, poziom_istotnosci:
             'uwagi': f'Błąd podczas obliczeń: {e}'
         }
 
+
+@mierz
+def testuj_korelacje_wiele(df: pd.DataFrame, pary: List[Tuple[str, str]] | None = None,
+                           poziom_istotnosci: float = 0.05, liczba_prob: int = 0, seed: int | None = None,
+                           max_workers: int | None = None, metoda: str = "pearson",
+                           kontrolowane: List[str] | None = None) -> List[Dict[str, Any]]:
+    """
+    Przeprowadza testy hipotez o korelacji Pearsona, Spearmana lub Kendalla (tau-b) dla wielu par kolumn naraz,
+    opcjonalnie jako korelację cząstkową, kontrolując wpływ kolumn z listy kontrolowane.
+    Wszystkie współczynniki liczone są z jednego iloczynu macierzowego scentrowanych danych (lub rang), a braki danych
+    obsługiwane są parami (dla każdej pary brane są wiersze, w których obie wartości są niepuste), czyli tak jak
+    w testuj_korelacje. Próby permutacyjne i bootstrapowe wszystkich par są liczone we wspólnej puli procesów.
+
+    Dla metod rangowych i korelacji cząstkowej pary są grupowane według zbioru kompletnych wierszy, a w każdej grupie
+    każda kolumna jest rangowana (lub rzutowana na kolumny kontrolowane) tylko raz. Korelacja cząstkowa to korelacja
+    reszt z regresji obu kolumn na kolumnach kontrolowanych (dla metody spearman - na rangach), p-value Kendalla
+    liczone jest z przybliżenia normalnego z poprawką na remisy (jak kendalltau z method="asymptotic").
+
+    Args:
+        df (pd.DataFrame): DataFrame zawierający dane.
+        pary (List[Tuple[str, str]] | None): Lista par nazw kolumn; None oznacza wszystkie pary kolumn numerycznych.
+        poziom_istotnosci (float): Poziom istotnosci (liczba z przedziału (0,1).
+        liczba_prob (int): Liczba permutacji i prób bootstrapowych dla każdej pary (0 - tylko test parametryczny).
+        seed (int | None): Ziarno generatora losowego (dla powtarzalności wyników).
+        max_workers (int | None): Maksymalna liczba procesów liczących próby.
+        metoda (str): "pearson", "spearman" lub "kendall".
+        kontrolowane (List[str] | None): Kolumny, których wpływ jest usuwany (korelacja cząstkowa, bez kendall).
+
+    Returns:
+        List[Dict[str, Any]]: Lista słowników w kolejności par, każdy w formacie zwracanym przez testuj_korelacje
+        (dla metod innych niż Pearson i korelacji cząstkowej z dodatkowymi kluczami 'metoda' i 'kontrolowane').
+    """
+    if pary is None:
+        pary = list(combinations(df.select_dtypes(include="number").columns, 2))
+    kontrolowane = list(kontrolowane or [])
+
+    kolumny = list(dict.fromkeys([col for para in pary for col in para] + kontrolowane))
+    brakujace = [col for col in kolumny if col not in df.columns]
+    blad = None
+    if brakujace:
+        blad = f"brak kolumn {brakujace}"
+    elif metoda not in METODY_KORELACJI:
+        blad = f"nieznana metoda '{metoda}', dostępne metody to {list(METODY_KORELACJI)}"
+    elif metoda == "kendall" and kontrolowane:
+        blad = "korelacja cząstkowa nie jest dostępna dla metody kendall"
+    elif any(col in kontrolowane for para in pary for col in para):
+        blad = "kolumny kontrolowane nie mogą należeć do testowanych par"
+    if blad is not None:
+        logging.error(f"Nie można przeprowadzić testów korelacji: {blad}.")
+        return [{'kolumna_1': col1, 'kolumna_2': col2, 'wspolczynnik_korelacji': None, 'p_value': None,
+                 'uwagi': f'Błąd podczas obliczeń: {blad}'} for col1, col2 in pary]
+
+    dane = df[kolumny].to_numpy(dtype=float)
+    pozycja = {col: i for i, col in enumerate(kolumny)}
+    if metoda == "pearson" and not kontrolowane:
+        r, p, n = _macierz_korelacji_pearsona(dane)
+        r_par, p_par, n_par = (np.array([macierz[pozycja[col1], pozycja[col2]] for col1, col2 in pary]) for macierz in (r, p, n))
+    else:
+        r_par, p_par, n_par = _korelacje_w_grupach(dane, [(pozycja[col1], pozycja[col2]) for col1, col2 in pary],
+                                                   [pozycja[col] for col in kontrolowane], metoda)
+        if liczba_prob > 0:
+            logging.warning("Testy permutacyjne i bootstrap są dostępne tylko dla korelacji Pearsona, pomijam je.")
+            liczba_prob = 0
+
+    wyniki = []
+    for (col1, col2), r_pary, p_pary, n_pary in zip(pary, r_par, p_par, n_par):
+        if n_pary < 3 + len(kontrolowane):  # Test korelacji wymaga co najmniej 3 par danych (i po jednej na każdą kontrolowaną kolumnę)
+            logging.warning(
+                f"Niewystarczająca liczba danych ({int(n_pary)}) do testu korelacji między '{col1}' i '{col2}'.")
+            wyniki.append({
+                'kolumna_1': col1,
+                'kolumna_2': col2,
+                'wspolczynnik_korelacji': None,
+                'p_value': None,
+                'uwagi': 'Niewystarczająca liczba danych do przeprowadzenia testu.'
+            })
+            continue
+        wyniki.append({
+            'kolumna_1': col1,
+            'kolumna_2': col2,
+            'wspolczynnik_korelacji': r_pary,
+            'p_value': p_pary,
+            'istotnosc_statystyczna': p_pary < poziom_istotnosci
+        })
+    if metoda != "pearson" or kontrolowane:
+        for wynik in wyniki:
+            wynik.update({'metoda': metoda, 'kontrolowane': kontrolowane})
+
+    if liczba_prob > 0:
+        testowane = [k for k, wynik in enumerate(wyniki) if wynik['wspolczynnik_korelacji'] is not None]
+        dane_par = []
+        for k in testowane:
+            x, y = dane[:, pozycja[pary[k][0]]], dane[:, pozycja[pary[k][1]]]
+            niepuste = ~np.isnan(x) & ~np.isnan(y)
+            dane_par.append((x[niepuste], y[niepuste]))
+        for k, wynik_losowy in zip(testowane, _testy_losowe(dane_par, liczba_prob, poziom_istotnosci, seed, max_workers)):
+            wyniki[k].update(wynik_losowy)
+
+    liczba_istotnych = sum(bool(wynik.get('istotnosc_statystyczna', False)) for wynik in wyniki)
+    logging.info(f"Przetestowano korelację dla {len(pary)} par kolumn, istotnych statystycznie: {liczba_istotnych}.")
+    return wyniki
+
+
+def _macierz_korelacji_pearsona(dane: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Liczy macierze współczynników korelacji Pearsona, p-value i liczności par dla wszystkich par kolumn,
+    pomijając parami wiersze z NaN.
+    """
+    maska = ~np.isnan(dane)
+    # centrowanie średnią kolumny poprawia dokładność (przesunięcie nie zmienia korelacji w żadnym podzbiorze wierszy)
+    srednie = np.where(maska, dane, 0.0).sum(axis=0) / np.maximum(maska.sum(axis=0), 1)
+    x = np.where(maska, dane - srednie, 0.0)
+    m = maska.astype(float)
+
+    n = m.T @ m                  # liczba wierszy, w których obie kolumny są niepuste
+    suma = x.T @ m               # suma[i, j] - suma kolumny i po wierszach niepustych w obu kolumnach
+    suma_kwadratow = (x * x).T @ m
+    iloczyn = x.T @ x
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        kowariancja = iloczyn - suma * suma.T / n
+        wariancja_1 = suma_kwadratow - suma * suma / n
+        wariancja_2 = wariancja_1.T
+        r = np.clip(kowariancja / np.sqrt(wariancja_1 * wariancja_2), -1.0, 1.0)
+        stopnie_swobody = n - 2
+        statystyka = r * np.sqrt(stopnie_swobody / (1.0 - r * r))
+        from scipy.stats import t as rozklad_t
+        p = 2 * rozklad_t.sf(np.abs(statystyka), stopnie_swobody)
+    return r, p, n
+
+
+def _korelacje_w_grupach(dane: np.ndarray, pary: List[Tuple[int, int]], kontrolowane: List[int],
+                         metoda: str) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Liczy współczynniki, p-value i liczności dla par kolumn (indeksów w dane) metodą rangową lub jako korelację
+    cząstkową. Pary o tym samym zbiorze kompletnych wierszy liczone są razem, na jednym bloku danych bez braków.
+    """
+    r_par, p_par = np.full(len(pary), np.nan), np.full(len(pary), np.nan)
+    n_par = np.zeros(len(pary))
+    niepuste = ~np.isnan(dane)
+    wspolne = niepuste[:, kontrolowane].all(axis=1)
+
+    grupy: Dict[bytes, List[int]] = {}
+    maski = []
+    for k, (i, j) in enumerate(pary):
+        maska = niepuste[:, i] & niepuste[:, j] & wspolne
+        maski.append(maska)
+        grupy.setdefault(np.packbits(maska).tobytes(), []).append(k)
+
+    for numery_par in grupy.values():
+        maska = maski[numery_par[0]]
+        n = int(maska.sum())
+        n_par[numery_par] = n
+        if n < 3 + len(kontrolowane):
+            continue
+        kolumny = list(dict.fromkeys(c for k in numery_par for c in pary[k]))
+        blok = dane[maska][:, kolumny]
+        pozycja = {c: i for i, c in enumerate(kolumny)}
+        if metoda == "kendall":
+            r_par[numery_par], p_par[numery_par] = _kendall_pary(
+                blok, [(pozycja[pary[k][0]], pozycja[pary[k][1]]) for k in numery_par])
+            continue
+
+        z = dane[maska][:, kontrolowane]
+        if metoda == "spearman":
+            from scipy.stats import rankdata
+            blok, z = rankdata(blok, axis=0), rankdata(z, axis=0)
+        r, p = _macierz_korelacji_czastkowej(blok, z)
+        for k in numery_par:
+            r_par[k] = r[pozycja[pary[k][0]], pozycja[pary[k][1]]]
+            p_par[k] = p[pozycja[pary[k][0]], pozycja[pary[k][1]]]
+    return r_par, p_par, n_par
+
+
+def _macierz_korelacji_czastkowej(blok: np.ndarray, z: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Liczy macierze korelacji i p-value kolumn bloku (bez braków danych) po usunięciu liniowego wpływu kolumn z
+    (jedna regresja dla wszystkich kolumn naraz); bez kolumn z to zwykła korelacja Pearsona.
+    """
+    n, liczba_kontrolowanych = z.shape
+    regresory = np.column_stack([np.ones(n), z])
+    wspolczynniki, *_ = np.linalg.lstsq(regresory, blok, rcond=None)
+    reszty = blok - regresory @ wspolczynniki
+    with np.errstate(divide="ignore", invalid="ignore"):
+        norma = np.sqrt((reszty * reszty).sum(axis=0))
+        r = np.clip((reszty.T @ reszty) / np.outer(norma, norma), -1.0, 1.0)
+        stopnie_swobody = n - 2 - liczba_kontrolowanych
+        statystyka = r * np.sqrt(stopnie_swobody / (1.0 - r * r))
+        from scipy.stats import t as rozklad_t
+        p = 2 * rozklad_t.sf(np.abs(statystyka), stopnie_swobody)
+    return r, p
+
+
+def _kendall_pary(blok: np.ndarray, pary: List[Tuple[int, int]]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Liczy współczynniki tau-b Kendalla i p-value dla par kolumn bloku (bez braków danych) algorytmem Knighta:
+    po posortowaniu wierszy według pierwszej kolumny liczba par niezgodnych to liczba inwersji w drugiej kolumnie.
+    Każda kolumna jest rangowana (wraz z policzeniem remisów) tylko raz, a inwersje wszystkich par liczone są razem.
+    """
+    n, k = blok.shape
+    rangi = np.empty((n, k), dtype=np.int64)
+    remisy, remisy_0, remisy_1 = np.zeros(k), np.zeros(k), np.zeros(k)
+    for c in range(k):
+        _, rangi[:, c], licznosci = np.unique(blok[:, c], return_inverse=True, return_counts=True)
+        licznosci = licznosci[licznosci > 1].astype(float)
+        remisy[c] = (licznosci * (licznosci - 1) / 2).sum()
+        remisy_0[c] = (licznosci * (licznosci - 1) * (licznosci - 2)).sum()
+        remisy_1[c] = (licznosci * (licznosci - 1) * (2 * licznosci + 5)).sum()
+
+    pierwsze, drugie = [i for i, _ in pary], [j for _, j in pary]
+    klucze = rangi[:, pierwsze].T * n + rangi[:, drugie].T  # sortowanie po pierwszej kolumnie, remisy po drugiej
+    klucze.sort(axis=1)
+    niezgodne = _liczba_inwersji(klucze % n)
+    # pary wierszy z remisem w obu kolumnach to serie równych kluczy
+    serie = np.unique((np.arange(len(pary))[:, None] * n * n + klucze).ravel(), return_counts=True)
+    licznosci = serie[1].astype(float)
+    remisy_wspolne = np.bincount(serie[0] // (n * n), weights=licznosci * (licznosci - 1) / 2, minlength=len(pary))
+
+    wszystkie = n * (n - 1) / 2
+    remisy_x, remisy_y = remisy[pierwsze], remisy[drugie]
+    zgodne_minus_niezgodne = wszystkie - remisy_x - remisy_y + remisy_wspolne - 2 * niezgodne
+    # wariancja z poprawką na remisy jak w scipy.stats.kendalltau(method="asymptotic")
+    m = n * (n - 1.0)
+    wariancja = ((m * (2 * n + 5) - remisy_1[pierwsze] - remisy_1[drugie]) / 18
+                 + 2 * remisy_x * remisy_y / m + remisy_0[pierwsze] * remisy_0[drugie] / (9 * m * (n - 2)))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        tau = np.clip(zgodne_minus_niezgodne / np.sqrt((wszystkie - remisy_x) * (wszystkie - remisy_y)), -1.0, 1.0)
+        from scipy.stats import norm as rozklad_normalny
+        p = 2 * rozklad_normalny.sf(np.abs(zgodne_minus_niezgodne) / np.sqrt(wariancja))
+    return tau, p
+
+
+def _liczba_inwersji(wartosci: np.ndarray) -> np.ndarray:
+    """
+    Liczy w każdym wierszu macierzy liczb całkowitych z przedziału [0, liczba kolumn) pary pozycji i < j
+    z wartosci[i] > wartosci[j], sortowaniem przez scalanie wykonywanym dla wszystkich bloków i wierszy naraz.
+    Przy scalaniu posortowanych połów bloku (sortowanie stabilne scala serie w czasie liniowym) element prawej połowy
+    przeskakuje tyle elementów lewej połowy, o ile przesunął się w lewo - to jest liczba większych od niego elementów.
+    """
+    liczba_wierszy, n = wartosci.shape
+    pozycje = np.arange(n)
+    wynik = np.zeros(liczba_wierszy)
+    posortowane = wartosci
+    szerokosc = 1
+    while szerokosc < n:
+        blok = pozycje // (2 * szerokosc)
+        prawa = (pozycje // szerokosc) % 2 == 1
+        przesuniecie = (np.arange(liczba_wierszy)[:, None] * (blok[-1] + 1) + blok[None, :]) * n
+        klucze = przesuniecie + posortowane
+        kolejnosc = np.argsort(klucze, axis=1, kind="stable")
+        pozycja_po_scaleniu = np.empty_like(kolejnosc)
+        np.put_along_axis(pozycja_po_scaleniu, kolejnosc, pozycje[None, :], axis=1)
+        wynik += (pozycje[prawa] - pozycja_po_scaleniu[:, prawa]).sum(axis=1)
+        posortowane = np.take_along_axis(posortowane, kolejnosc, axis=1)
+        szerokosc *= 2
+    return wynik
+
+
+def _testy_losowe(dane_par: List[Tuple[np.ndarray, np.ndarray]], liczba_prob: int, poziom_istotnosci: float,
+                  seed: int | None, max_workers: int | None) -> List[Dict[str, Any]]:
+    """
+    Liczy dla każdej pary (x, y) p-value testu permutacyjnego (dwustronnego) i percentylowy bootstrapowy przedział
+    ufności współczynnika korelacji. Próby dzielone są na bloki po ROZMIAR_BLOKU_PROB, a bloki wszystkich par
+    liczone są w puli procesów (dla małych danych - w bieżącym procesie).
+    """
+    liczba_blokow = -(-liczba_prob // ROZMIAR_BLOKU_PROB)
+    nasiona = np.random.SeedSequence(seed).spawn(len(dane_par) * liczba_blokow)
+    zadania = []
+    for k, (x, y) in enumerate(dane_par):
+        for b in range(liczba_blokow):
+            rozmiar = min(ROZMIAR_BLOKU_PROB, liczba_prob - b * ROZMIAR_BLOKU_PROB)
+            zadania.append((x, y, rozmiar, nasiona[k * liczba_blokow + b]))
+
+    elementy = sum(len(x) for x, _ in dane_par) * liczba_prob
+    if max_workers == 1 or elementy < MIN_ELEMENTOW_DLA_PULI or (os.cpu_count() or 1) == 1:
+        wyniki_blokow = [_blok_prob(*zadanie) for zadanie in zadania]
+    else:
+        try:
+            with ProcessPoolExecutor(max_workers=max_workers) as executor:
+                wyniki_blokow = list(executor.map(_blok_prob, *zip(*zadania)))
+        except OSError as e:
+            logging.warning(f"Nie udało się uruchomić puli procesów ({e}). Liczę próby w bieżącym procesie.")
+            wyniki_blokow = [_blok_prob(*zadanie) for zadanie in zadania]
+
+    wyniki = []
+    for k, (x, y) in enumerate(dane_par):
+        bloki = wyniki_blokow[k * liczba_blokow:(k + 1) * liczba_blokow]
+        liczba_ekstremalnych = sum(ekstremalne for ekstremalne, _ in bloki)
+        r_bootstrap = np.concatenate([r for _, r in bloki])
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", category=RuntimeWarning)  # wszystkie próby bez wariancji dają NaN
+            dolna, gorna = np.nanpercentile(r_bootstrap, [50 * poziom_istotnosci, 100 - 50 * poziom_istotnosci])
+        wyniki.append({
+            'p_value_permutacyjne': float((liczba_ekstremalnych + 1) / (liczba_prob + 1)),
+            'przedzial_ufnosci': [float(dolna), float(gorna)],
+            'liczba_prob': liczba_prob,
+        })
+    return wyniki
+
+
+def _blok_prob(x: np.ndarray, y: np.ndarray, liczba_prob: int, nasiono: np.random.SeedSequence) -> Tuple[int, np.ndarray]:
+    """
+    Liczy jeden blok prób: liczbę permutacji, dla których |r| jest co najmniej takie jak w danych,
+    oraz współczynniki korelacji prób bootstrapowych. Wszystkie próby bloku liczone są naraz na macierzach
+    indeksów (liczba_prob x liczba wierszy).
+    """
+    rng = np.random.default_rng(nasiono)
+    n = len(x)
+    # po standaryzacji współczynnik korelacji z permutacją y to iloczyn skalarny x i permutowanego y
+    xs = (x - x.mean()) / np.sqrt(((x - x.mean()) ** 2).sum())
+    ys = (y - y.mean()) / np.sqrt(((y - y.mean()) ** 2).sum())
+    r = xs @ ys
+
+    permutacje = rng.permuted(np.broadcast_to(np.arange(n), (liczba_prob, n)), axis=1)
+    r_permutacji = ys[permutacje] @ xs
+    ekstremalne = int(np.count_nonzero(np.abs(r_permutacji) >= np.abs(r) - 1e-12))
+
+    # próbę bootstrapową opisujemy liczbą wylosowań każdego wiersza, wtedy sumy potrzebne do r są iloczynem macierzy
+    indeksy = rng.integers(0, n, size=(liczba_prob, n))
+    indeksy += np.arange(liczba_prob)[:, None] * n
+    krotnosci = np.bincount(indeksy.ravel(), minlength=liczba_prob * n).reshape(liczba_prob, n).astype(float)
+    sx, sy, sxx, syy, sxy = (krotnosci @ np.column_stack([xs, ys, xs * xs, ys * ys, xs * ys])).T
+    with np.errstate(divide="ignore", invalid="ignore"):
+        r_bootstrap = (n * sxy - sx * sy) / np.sqrt((n * sxx - sx * sx) * (n * syy - sy * sy))
+    return ekstremalne, np.clip(r_bootstrap, -1.0, 1.0)
@@ -1,36 +1,268 @@
+import numpy as np
 import pandas as pd
+import hashlib
 import logging
+import os
+import pickle
+from concurrent.futures import ProcessPoolExecutor
+from data_analyzer.preprocessor import DetektorDuplikatow
+from data_analyzer.profilowanie import mierz
 
-logging.basicConfig(level=logging.INFO, format='%(levelname)s: %(message)s', encoding='utf-8')
+# Katalog, w którym przechowujemy już sparsowane ramki danych (można go zmienić zmienną środowiskową)
+KATALOG_CACHE = os.environ.get("DATA_ANALYZER_CACHE", os.path.join(os.path.expanduser("~"), ".cache", "data_analyzer"))
+# Po przekroczeniu tego rozmiaru (w bajtach) usuwamy najdawniej używane wpisy
+MAKS_ROZMIAR_CACHE = 1024 ** 3
+ROZSZERZENIA_CACHE = (".parquet", ".pkl")
+# Kolumny tekstowe, w których unikalne wartości stanowią co najwyżej taki ułamek wierszy, zamieniamy na kategorie
+MAKS_UDZIAL_UNIKALNYCH = 0.5
 
 
-def load_data(file_path: str, **kwargs) -> pd.DataFrame | None:
+@mierz
+def load_data(file_path: str, cache: bool = True, optymalizuj: bool = False, kolumny: list[int | str] | None = None,
+              wiersz_naglowka: int = 0, pomin_wiersze: int = 0, liczba_wierszy: int | None = None, **kwargs) -> pd.DataFrame | None:
     """
     Wczytuje dane z pliku CSV, XLS lub XLSX
     Funkcja wymaga Pythona w wersji 3.10 lub nowszej, ze względu na formułę ***|None
 
+    Sparsowane ramki są zapisywane w cache na dysku (Parquet), kluczem jest ścieżka, rozmiar
+    i czas modyfikacji pliku oraz przekazane argumenty, więc kolejne wczytanie niezmienionego pliku
+    nie uruchamia ponownie parsera Excela.
+
     Args:
         file_path (str): Ścieżka do pliku
-        **kwargs: Dodatkowe argumenty dla funkcji wczytujących z pandas
+        cache (bool): Czy korzystać z cache na dysku (False wymusza ponowne parsowanie pliku)
+        optymalizuj (bool): Czy zmniejszyć zużycie pamięci ramki funkcją optymalizuj_typy
+        kolumny (list[int | str] | None): Kolumny do wczytania, pozycje (od 0) albo nazwy; kolejność jak w pliku.
+                                          Pozostałe kolumny są pomijane już przez parser (usecols)
+        wiersz_naglowka (int): Numer wiersza pliku (od 0) z nazwami kolumn; wcześniejsze wiersze są pomijane
+        pomin_wiersze (int): Liczba wierszy danych pomijanych zaraz po nagłówku (np. opisy tabeli w arkuszach GUS)
+        liczba_wierszy (int | None): Najwięcej tylu wierszy danych zostanie wczytanych (domyślnie wszystkie)
+        **kwargs: Dodatkowe argumenty dla funkcji wczytujących z pandas, np. dtype_backend="pyarrow" daje kolumny
+                  z typami Arrow, na których operacje .str w preprocessorze są wykonywane przez pyarrow
 
     Returns:
         DataFrame z danymi lub None, jeśli wystąpił błąd
     """
 
     try:
-        if file_path.endswith(".csv"):
-            df = pd.read_csv(file_path, **kwargs)
-            logging.info("Wczytanie pliku CSV zakończone pomyślnie.")
+        kwargs.update(_argumenty_wyboru(kolumny, wiersz_naglowka, pomin_wiersze, liczba_wierszy))
+        df = _wczytaj_plik(file_path, cache, **kwargs)
+        return optymalizuj_typy(df) if optymalizuj else df
+
+    except FileNotFoundError:
+        logging.error(f"Plik nie został znaleziony pod ścieżką: {file_path}")
+        return None
+
+    except Exception as e:
+        logging.error(f"Wystąpił błąd podczas przetwarzania pliku {file_path}: {e}")
+        return None
+
+
+def _argumenty_wyboru(kolumny: list[int | str] | None, wiersz_naglowka: int, pomin_wiersze: int,
+                      liczba_wierszy: int | None) -> dict:
+    """
+    Zamienia wybór kolumn i wierszy na argumenty read_csv i read_excel (te same dla obu funkcji);
+    domyślny wybór nie dodaje żadnych argumentów, więc nie zmienia też klucza cache
+    """
+    argumenty = {}
+    if kolumny is not None:
+        argumenty["usecols"] = list(kolumny)
+    if wiersz_naglowka:
+        argumenty["header"] = wiersz_naglowka
+    if pomin_wiersze:
+        # numery wierszy pliku, więc liczone od wiersza nagłówka
+        argumenty["skiprows"] = list(range(wiersz_naglowka + 1, wiersz_naglowka + 1 + pomin_wiersze))
+    if liczba_wierszy is not None:
+        argumenty["nrows"] = liczba_wierszy
+    return argumenty
+
+
+def _wczytaj_plik(file_path: str, cache: bool, **kwargs) -> pd.DataFrame:
+    """
+    Parsuje plik (albo odczytuje go z cache); w cache zapisujemy ramkę w oryginalnych typach
+    """
+    if not file_path.endswith((".csv", ".xls", ".xlsx")):
+        raise ValueError(f"Nieobsługiwany format pliku, dostępne formaty to CSV, XLS, oraz XLSX")
+
+    if cache:
+        klucz = _klucz_cache(file_path, kwargs)
+        df = _wczytaj_z_cache(klucz)
+        if df is not None:
+            logging.info(f"Cache: trafienie dla pliku {file_path}.")
             return df
+        logging.info(f"Cache: brak wpisu dla pliku {file_path}, parsuję plik.")
+
+    if file_path.endswith(".csv"):
+        df = pd.read_csv(file_path, **kwargs)
+        logging.info("Wczytanie pliku CSV zakończone pomyślnie.")
+    else:
+        df = pd.read_excel(file_path, **kwargs)
+        logging.info("Wczytanie pliku Excel zakończone pomyślnie.")
+
+    if cache:
+        _zapisz_do_cache(klucz, df)
+    return df
+
+
+@mierz
+def optymalizuj_typy(df: pd.DataFrame, maks_udzial_unikalnych: float | None = None) -> pd.DataFrame:
+    """
+    Zmniejsza zużycie pamięci ramki: kolumny tekstowe o małej liczbie różnych wartości (np. nazwy województw,
+    powiatów i gmin) zamienia na kategorie, a kolumny liczbowe na najmniejszy bezpieczny typ.
+    Liczby całkowite dostają typ, w którym mieści się suma wartości bezwzględnych całej kolumny, więc sumowanie
+    wierszy (np. w zlacz_gminy czy przy grupowaniu) nie może przepełnić typu. Liczby zmiennoprzecinkowe zamieniamy
+    na float32 tylko wtedy, gdy nie zmienia to żadnej wartości. Zużycie pamięci przed i po zmianie trafia do logów.
+
+    Args:
+        df (pd.DataFrame): Ramka do optymalizacji (nie jest modyfikowana)
+        maks_udzial_unikalnych (float | None): Największy udział unikalnych wartości w kolumnie zamienianej
+            na kategorie (domyślnie MAKS_UDZIAL_UNIKALNYCH)
+
+    Returns:
+        Nowy DataFrame z tymi samymi wartościami w mniejszych typach
+    """
+    if maks_udzial_unikalnych is None:
+        maks_udzial_unikalnych = MAKS_UDZIAL_UNIKALNYCH
+
+    wynik = df.copy(deep=False)
+    for col in df.columns:
+        kolumna = df[col]
+        if pd.api.types.is_bool_dtype(kolumna.dtype) or not isinstance(kolumna.dtype, np.dtype):
+            continue  # wartości logiczne oraz typy rozszerzone (kategorie, Int64, napisy Arrow) zostawiamy
+        if kolumna.dtype.kind == "O":
+            niepuste = kolumna.dropna()
+            # tylko kolumny z samymi napisami - arkusze GUS mają kolumny z napisami pomieszanymi z liczbami
+            if len(niepuste) and niepuste.map(type).eq(str).all() \
+                    and niepuste.nunique() <= maks_udzial_unikalnych * len(kolumna):
+                kategorie = kolumna.astype("category")
+                if kategorie.memory_usage(deep=True) < kolumna.memory_usage(deep=True):
+                    wynik[col] = kategorie
+        elif kolumna.dtype.kind in "iu":
+            typ = _najmniejszy_typ_calkowity(kolumna)
+            if typ is not None:
+                wynik[col] = kolumna.astype(typ)
+        elif kolumna.dtype.kind == "f" and kolumna.dtype.itemsize > 4:
+            wartosci = kolumna.to_numpy()
+            mniejsze = wartosci.astype(np.float32)
+            if np.array_equal(mniejsze.astype(wartosci.dtype), wartosci, equal_nan=True):
+                wynik[col] = pd.Series(mniejsze, index=kolumna.index)
+
+    # pamięć przed zmianą liczymy dopiero teraz: haszowanie napisów (nunique) powiększa obiekty str o bufor UTF-8
+    pamiec_przed = df.memory_usage(deep=True).sum()
+    pamiec_po = wynik.memory_usage(deep=True).sum()
+    logging.info(f"Optymalizacja typów: zużycie pamięci zmieniło się z {pamiec_przed / 2 ** 20:.2f} MB "
+                 f"na {pamiec_po / 2 ** 20:.2f} MB.")
+    return wynik
+
+
+def _najmniejszy_typ_calkowity(kolumna: pd.Series):
+    """
+    Zwraca najmniejszy typ całkowity ze znakiem, w którym mieści się suma wartości bezwzględnych kolumny,
+    albo None, gdy kolumna ma już najmniejszy taki typ
+    """
+    suma = float(np.abs(kolumna.to_numpy(dtype=float)).sum())
+    for typ in (np.int8, np.int16, np.int32):
+        if suma <= np.iinfo(typ).max:
+            return typ if np.dtype(typ).itemsize < kolumna.dtype.itemsize else None
+    return None
+
+
+def _zlicz(df: pd.DataFrame, col: str | tuple) -> pd.Series:
+    if isinstance(col, tuple):
+        return df[list(col)].value_counts(sort=False)
+    return df[col].value_counts()
+
+
+@mierz
+def zlicz_wartosci(file_path: str, columns: list[str | tuple], chunksize: int = 100_000, **kwargs) -> dict[str | tuple, pd.Series] | None:
+    """
+    Zlicza wystąpienia wartości we wskazanych kolumnach pliku (jak value_counts), nie wczytując całej tabeli.
+    Plik CSV jest czytany strumieniowo, po chunksize wierszy i tylko z potrzebnymi kolumnami,
+    a liczności są sumowane przyrostowo. Pliki Excel nie wspierają czytania w kawałkach,
+    więc wczytujemy z nich tylko wskazane kolumny.
+
+    Args:
+        file_path (str): Ścieżka do pliku
+        columns (list[str | tuple]): Nazwy kolumn, w których zliczamy wartości; krotka nazw oznacza zliczanie
+                                     kombinacji wartości tych kolumn (Series z indeksem wielopoziomowym)
+        chunksize (int): Liczba wierszy czytanych naraz z pliku CSV
+        **kwargs: Dodatkowe argumenty dla funkcji wczytujących z pandas
+
+    Returns:
+        Słownik {nazwa kolumny: Series z licznościami posortowanymi malejąco} lub None, jeśli wystąpił błąd
+    """
+    try:
+        potrzebne = list(dict.fromkeys(nazwa for col in columns for nazwa in (col if isinstance(col, tuple) else [col])))
+        if file_path.endswith(".csv"):
+            liczniki = {col: None for col in columns}
+            liczba_wierszy = 0
+            for kawalek in pd.read_csv(file_path, usecols=potrzebne, chunksize=chunksize, **kwargs):
+                liczba_wierszy += len(kawalek)
+                for col in columns:
+                    licznik = _zlicz(kawalek, col)
+                    liczniki[col] = licznik if liczniki[col] is None else liczniki[col].add(licznik, fill_value=0)
+            logging.info(f"Zliczono wartości w {liczba_wierszy} wierszach pliku CSV.")
 
         elif file_path.endswith((".xls", ".xlsx")):
-            df = pd.read_excel(file_path, **kwargs)
-            logging.info("Wczytanie pliku Excel zakończone pomyślnie.")
-            return df
+            df = pd.read_excel(file_path, usecols=potrzebne, **kwargs)
+            liczniki = {col: _zlicz(df, col) for col in columns}
+            logging.info("Zliczono wartości w pliku Excel.")
+
+        else:
+            raise ValueError(f"Nieobsługiwany format pliku, dostępne formaty to CSV, XLS, oraz XLSX")
+
+        wyniki = {}
+        for col, licznik in liczniki.items():
+            if licznik is None:
+                licznik = _zlicz(pd.DataFrame(columns=potrzebne), col)
+            licznik = licznik.astype("int64").sort_values(ascending=False, kind="stable")
+            if isinstance(col, tuple):
+                licznik.index.names = list(col)
+            else:
+                licznik.index.name = col
+            wyniki[col] = licznik.rename("count")
+        return wyniki
+
+    except FileNotFoundError:
+        logging.error(f"Plik nie został znaleziony pod ścieżką: {file_path}")
+        return None
+
+    except Exception as e:
+        logging.error(f"Wystąpił błąd podczas przetwarzania pliku {file_path}: {e}")
+        return None
 
+
+@mierz
+def znajdz_duplikaty_w_pliku(file_path: str, columns: str | list[str], chunksize: int = 100_000, **kwargs) -> pd.DataFrame | None:
+    """
+    Wyszukuje wiersze pliku z powtórzonym kluczem (kolumną lub kombinacją kolumn), nie wczytując całej tabeli.
+    Plik CSV jest czytany strumieniowo, po chunksize wierszy i tylko z kolumnami klucza, a kolejne kawałki trafiają
+    do preprocessor.DetektorDuplikatow. Z plików Excel wczytujemy tylko kolumny klucza.
+
+    Args:
+        file_path (str): Ścieżka do pliku
+        columns (str | list[str]): Kolumna lub kolumny tworzące klucz
+        chunksize (int): Liczba wierszy czytanych naraz z pliku CSV
+        **kwargs: Dodatkowe argumenty dla funkcji wczytujących z pandas (np. dtype, żeby typy kolumn nie zależały od kawałka)
+
+    Returns:
+        pd.DataFrame | None: Wynik DetektorDuplikatow.wynik (indeks to numer wiersza danych w pliku) lub None, jeśli wystąpił błąd
+    """
+    kolumny = [columns] if isinstance(columns, str) else list(columns)
+    try:
+        detektor = DetektorDuplikatow(kolumny)
+        if file_path.endswith(".csv"):
+            for kawalek in pd.read_csv(file_path, usecols=kolumny, chunksize=chunksize, **kwargs):
+                detektor.dodaj(kawalek)
+        elif file_path.endswith((".xls", ".xlsx")):
+            detektor.dodaj(pd.read_excel(file_path, usecols=kolumny, **kwargs))
         else:
             raise ValueError(f"Nieobsługiwany format pliku, dostępne formaty to CSV, XLS, oraz XLSX")
 
+        wynik = detektor.wynik()
+        logging.info(f"Sprawdzono {detektor.liczba_wierszy} wierszy pliku, {len(wynik)} wierszy ma powtórzony klucz {kolumny}.")
+        return wynik
+
     except FileNotFoundError:
         logging.error(f"Plik nie został znaleziony pod ścieżką: {file_path}")
         return None
@@ -40,6 +272,133 @@ def load_data(file_path: str, **kwargs) -> pd.DataFrame | None:
         return None
 
 
+@mierz
+def wyczysc_cache() -> int:
+    """
+    Usuwa wszystkie wpisy z cache sparsowanych plików
+
+    Returns:
+        Liczba usuniętych wpisów
+    """
+    if not os.path.isdir(KATALOG_CACHE):
+        return 0
+
+    usuniete = 0
+    for nazwa in os.listdir(KATALOG_CACHE):
+        if nazwa.endswith(ROZSZERZENIA_CACHE):
+            os.remove(os.path.join(KATALOG_CACHE, nazwa))
+            usuniete += 1
+    logging.info(f"Usunięto {usuniete} wpisów z cache w katalogu {KATALOG_CACHE}.")
+    return usuniete
+
+
+def _klucz_cache(file_path: str, kwargs: dict) -> str:
+    """
+    Tworzy klucz wpisu w cache; zmiana pliku (rozmiaru lub czasu modyfikacji) albo argumentów daje nowy klucz
+    """
+    stat = os.stat(file_path) # dla nieistniejącego pliku rzuca FileNotFoundError, obsłużony w load_data
+    opis = repr((os.path.abspath(file_path), stat.st_size, stat.st_mtime_ns, sorted(kwargs.items())))
+    return hashlib.sha256(opis.encode("utf-8")).hexdigest()
+
+
+def _wczytaj_z_cache(klucz: str) -> pd.DataFrame | None:
+    """
+    Zwraca ramkę zapisaną pod danym kluczem lub None, jeśli jej nie ma (albo wpis jest uszkodzony)
+    """
+    for rozszerzenie in ROZSZERZENIA_CACHE:
+        sciezka = os.path.join(KATALOG_CACHE, klucz + rozszerzenie)
+        if not os.path.exists(sciezka):
+            continue
+        try:
+            if rozszerzenie == ".parquet":
+                df = pd.read_parquet(sciezka)
+            else:
+                with open(sciezka, "rb") as f:
+                    df = pickle.load(f)
+            os.utime(sciezka) # czas modyfikacji wpisu służy jako czas ostatniego użycia (LRU)
+            return df
+        except Exception as e:
+            logging.warning(f"Nie udało się odczytać wpisu z cache {sciezka}: {e}")
+    return None
+
+
+def _zapisz_do_cache(klucz: str, df: pd.DataFrame):
+    """
+    Zapisuje ramkę do cache w formacie Parquet, a gdy się nie da (np. kolumny z mieszanymi typami,
+    typowe dla arkuszy GUS, albo brak pyarrow) - jako pickle. Błędy zapisu nie przerywają wczytywania.
+    """
+    try:
+        os.makedirs(KATALOG_CACHE, exist_ok=True)
+        sciezka = os.path.join(KATALOG_CACHE, klucz + ".parquet")
+        tymczasowa = f"{sciezka}.{os.getpid()}.tmp" # zapis przez plik tymczasowy, żeby równoległe procesy nie czytały połowy pliku
+        try:
+            df.to_parquet(tymczasowa)
+        except (ImportError, ValueError, TypeError, NotImplementedError):
+            # brak pyarrow albo typy nieobsługiwane przez Parquet (ArrowInvalid dziedziczy po ValueError,
+            # ArrowTypeError po TypeError, ArrowNotImplementedError po NotImplementedError)
+            sciezka = os.path.join(KATALOG_CACHE, klucz + ".pkl")
+            with open(tymczasowa, "wb") as f:
+                pickle.dump(df, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tymczasowa, sciezka)
+        _przytnij_cache()
+    except Exception as e:
+        logging.warning(f"Nie udało się zapisać pliku do cache: {e}")
+
+
+def _przytnij_cache():
+    """
+    Usuwa najdawniej używane wpisy, dopóki rozmiar cache przekracza MAKS_ROZMIAR_CACHE
+    """
+    wpisy = [os.path.join(KATALOG_CACHE, nazwa) for nazwa in os.listdir(KATALOG_CACHE)
+             if nazwa.endswith(ROZSZERZENIA_CACHE)]
+    wpisy.sort(key=os.path.getmtime)
+    rozmiar = sum(os.path.getsize(wpis) for wpis in wpisy)
+    for wpis in wpisy:
+        if rozmiar <= MAKS_ROZMIAR_CACHE:
+            break
+        rozmiar -= os.path.getsize(wpis)
+        os.remove(wpis)
+        logging.info(f"Cache: usunięto najdawniej używany wpis {wpis}.")
+
+
+@mierz
+def load_many(file_paths: list[str], max_workers: int | None = None, opcje_plikow: list[dict] | None = None,
+              **kwargs) -> list[pd.DataFrame | None]:
+    """
+    Wczytuje wiele plików naraz, parsując je równolegle w puli procesów.
+    Parsowanie plików Excel jest ograniczone przez CPU, więc osobne procesy pozwalają wczytywać kilka plików jednocześnie.
+
+    Args:
+        file_paths (list[str]): Lista ścieżek do plików
+        max_workers (int | None): Maksymalna liczba procesów (domyślnie liczba plików, ale nie więcej niż liczba rdzeni)
+        opcje_plikow (list[dict] | None): Argumenty load_data osobne dla każdego pliku (np. wybór kolumn i wierszy),
+                                          w tej samej kolejności co ścieżki
+        **kwargs: Dodatkowe argumenty przekazywane do load_data dla każdego pliku
+
+    Returns:
+        Lista DataFrame'ów w tej samej kolejności co ścieżki; None w miejscu pliku, którego nie udało się wczytać
+    """
+    argumenty = [{**kwargs, **opcje} for opcje in (opcje_plikow or [{}] * len(file_paths))]
+    if len(file_paths) <= 1 or max_workers == 1:
+        return [load_data(file_path, **opcje) for file_path, opcje in zip(file_paths, argumenty)]
+
+    wyniki = [None] * len(file_paths)
+    try:
+        with ProcessPoolExecutor(max_workers=max_workers or min(len(file_paths), os.cpu_count() or 1)) as executor:
+            zadania = [executor.submit(load_data, file_path, **opcje) for file_path, opcje in zip(file_paths, argumenty)]
+            for i, zadanie in enumerate(zadania):
+                try:
+                    wyniki[i] = zadanie.result()
+                except Exception as e: # np. proces roboczy zakończył się awaryjnie
+                    logging.error(f"Wystąpił błąd podczas przetwarzania pliku {file_paths[i]}: {e}")
+    except OSError as e:
+        logging.error(f"Nie udało się uruchomić puli procesów ({e}). Wczytuję pliki po kolei.")
+        return [load_data(file_path, **opcje) for file_path, opcje in zip(file_paths, argumenty)]
+
+    logging.info(f"Wczytano równolegle {sum(df is not None for df in wyniki)} z {len(file_paths)} plików.")
+    return wyniki
+
+
 if __name__ == '__main__':
     plik_csv = 'data/alkohol.csv'
     plik_xls = 'data/populacja.xls'
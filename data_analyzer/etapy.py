@@ -0,0 +1,178 @@
+import hashlib
+import logging
+import os
+import pickle
+import time
+import types
+from typing import Any, Callable, Dict, List
+
+from data_analyzer import data_loader as dl
+from data_analyzer import profilowanie as prof
+
+ROZSZERZENIE = ".pkl"
+
+
+class CacheEtapow:
+    """
+    Cache wyników nazwanych etapów potoku na dysku. Kluczem wyniku jest nazwa etapu, odciski jego wejść
+    (treści plików albo klucze etapów, od których zależy), parametry i kod funkcji etapu, więc po zmianie
+    jednego pliku przeliczane są tylko etapy, które od niego zależą - pozostałe są wczytywane z dysku.
+
+    Zmiany w funkcjach bibliotecznych wywoływanych przez etap nie zmieniają klucza, po takich zmianach
+    trzeba wyczyścić cache (wyczysc). Dla każdego etapu przechowywany jest tylko ostatni wynik.
+    """
+
+    def __init__(self, katalog: str | None = None, wlaczony: bool = True):
+        self.katalog = katalog or os.path.join(dl.KATALOG_CACHE, "etapy")
+        self.wlaczony = wlaczony
+        self.przebieg: List[Dict[str, Any]] = []
+        self._odciski_plikow: Dict[tuple, str] = {}
+        self._odczytane: Dict[str, Any] = {}  # wyniki odczytane przez zapisany(), przekazywane do uruchom()
+
+    def odcisk_pliku(self, sciezka: str) -> str | None:
+        """
+        Zwraca skrót SHA-256 zawartości pliku (liczony raz na przebieg dla niezmienionego pliku)
+        albo None, jeśli pliku nie można odczytać - błąd zgłasza wtedy etap wczytujący plik.
+        """
+        try:
+            stat = os.stat(sciezka)
+            opis = (os.path.abspath(sciezka), stat.st_size, stat.st_mtime_ns)
+            if opis not in self._odciski_plikow:
+                skrot = hashlib.sha256()
+                with open(sciezka, "rb") as f:
+                    for blok in iter(lambda: f.read(1 << 20), b""):
+                        skrot.update(blok)
+                self._odciski_plikow[opis] = skrot.hexdigest()
+        except OSError as e:
+            logging.warning(f"Nie można obliczyć odcisku pliku {sciezka}: {e}")
+            return None
+        return self._odciski_plikow[opis]
+
+    def klucz(self, nazwa: str, wejscia: List[str], parametry: Dict[str, Any] | None = None,
+              funkcja: Callable | None = None) -> str:
+        """
+        Tworzy klucz wyniku etapu.
+
+        Args:
+            nazwa (str): Nazwa etapu (używana też w nazwie pliku, więc bez znaków specjalnych)
+            wejscia (List[str]): Odciski plików wejściowych lub klucze etapów poprzedzających
+            parametry (Dict[str, Any] | None): Parametry wpływające na wynik etapu
+            funkcja (Callable | None): Funkcja etapu, której kod wchodzi do klucza
+
+        Returns:
+            str: Klucz w postaci "nazwa-skrót"
+        """
+        kod = _odcisk_kodu(funkcja.__code__) if funkcja is not None else b""
+        opis = repr((nazwa, list(wejscia), sorted((parametry or {}).items()))).encode("utf-8") + kod
+        return f"{nazwa}-{hashlib.sha256(opis).hexdigest()}"
+
+    def zapisany(self, klucz: str) -> bool:
+        """
+        Sprawdza, czy wynik o danym kluczu jest w cache i da się go odczytać. Odczytany wynik jest zachowywany
+        dla uruchom, a nieczytelny wpis (np. uszkodzony albo zapisany inną wersją pandas) jest usuwany,
+        więc etap zostanie przeliczony.
+        """
+        if not self.wlaczony:
+            return False
+        if klucz not in self._odczytane:
+            wynik = self._wczytaj(klucz)
+            if wynik is None:
+                return False
+            self._odczytane[klucz] = wynik
+        return True
+
+    def uruchom(self, nazwa: str, klucz: str, funkcja: Callable, *args, **kwargs) -> Any:
+        """
+        Zwraca wynik etapu z cache albo oblicza go funkcją i zapisuje. Wynik None (błąd etapu) nie jest zapisywany.
+        """
+        start = time.perf_counter()
+        with prof.etap(f"etap {nazwa}"):
+            wynik = self._odczytane.pop(klucz) if self.zapisany(klucz) else None
+            if wynik is not None:
+                status = "ponownie użyty"
+            else:
+                status = "przeliczony"
+                wynik = funkcja(*args, **kwargs)
+                if wynik is not None and self.wlaczony:
+                    self._zapisz(nazwa, klucz, wynik)
+        self.przebieg.append({"etap": nazwa, "status": status, "czas_s": time.perf_counter() - start})
+        logging.info(f"Etap '{nazwa}': {status}.")
+        return wynik
+
+    def podsumowanie(self) -> str:
+        """
+        Zwraca opis przebiegu: które etapy wczytano z cache, a które przeliczono.
+        """
+        uzyte = [wpis["etap"] for wpis in self.przebieg if wpis["status"] == "ponownie użyty"]
+        przeliczone = [wpis["etap"] for wpis in self.przebieg if wpis["status"] == "przeliczony"]
+        return (f"Etapy ponownie użyte ({len(uzyte)}): {', '.join(uzyte) or '-'}; "
+                f"przeliczone ({len(przeliczone)}): {', '.join(przeliczone) or '-'}.")
+
+    def wyczysc(self, nazwa: str | None = None) -> int:
+        """
+        Usuwa zapisane wyniki wszystkich etapów albo tylko etapu o podanej nazwie.
+
+        Returns:
+            int: Liczba usuniętych wpisów
+        """
+        usuniete = 0
+        for plik in self._wpisy(nazwa):
+            os.remove(plik)
+            usuniete += 1
+        logging.info(f"Usunięto {usuniete} zapisanych wyników etapów z katalogu {self.katalog}.")
+        return usuniete
+
+    def _sciezka(self, klucz: str) -> str:
+        return os.path.join(self.katalog, klucz + ROZSZERZENIE)
+
+    def _wpisy(self, nazwa: str | None = None) -> List[str]:
+        if not os.path.isdir(self.katalog):
+            return []
+        return [os.path.join(self.katalog, plik) for plik in os.listdir(self.katalog)
+                if plik.endswith(ROZSZERZENIE) and (nazwa is None or plik.startswith(f"{nazwa}-"))]
+
+    def _wczytaj(self, klucz: str) -> Any:
+        """
+        Zwraca zapisany wynik albo None, jeśli go nie ma lub nie da się go odczytać (wtedy wpis jest usuwany).
+        """
+        sciezka = self._sciezka(klucz)
+        if not os.path.exists(sciezka):
+            return None
+        try:
+            with open(sciezka, "rb") as f:
+                return pickle.load(f)
+        except Exception as e:
+            logging.warning(f"Nie udało się odczytać zapisanego wyniku etapu {klucz}, etap zostanie przeliczony: {e}")
+            try:
+                os.remove(sciezka)
+            except OSError:
+                pass
+            return None
+
+    def _zapisz(self, nazwa: str, klucz: str, wynik: Any):
+        """
+        Zapisuje wynik przez plik tymczasowy i usuwa starsze wyniki tego samego etapu.
+        """
+        try:
+            os.makedirs(self.katalog, exist_ok=True)
+            sciezka = self._sciezka(klucz)
+            for plik in self._wpisy(nazwa):
+                if plik != sciezka:
+                    os.remove(plik)
+            tymczasowa = f"{sciezka}.{os.getpid()}.tmp"
+            with open(tymczasowa, "wb") as f:
+                pickle.dump(wynik, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tymczasowa, sciezka)
+        except Exception as e:
+            logging.warning(f"Nie udało się zapisać wyniku etapu '{nazwa}': {e}")
+
+
+def _odcisk_kodu(kod: types.CodeType) -> bytes:
+    """
+    Bajtkod i stałe funkcji do klucza etapu. Zagnieżdżone obiekty kodu (lambdy, wyrażenia listowe) są rozwijane
+    rekurencyjnie, bo ich repr zawiera adres w pamięci, inny w każdym procesie.
+    """
+    czesci = [kod.co_code]
+    for stala in kod.co_consts:
+        czesci.append(_odcisk_kodu(stala) if isinstance(stala, types.CodeType) else repr(stala).encode("utf-8"))
+    return b"\x00".join(czesci)
@@ -0,0 +1,127 @@
+import logging
+from typing import Dict, List
+
+import numpy as np
+import pandas as pd
+from data_analyzer import teryt
+
+# Poziomy podziału administracyjnego od najniższego, z dzielnikiem kodu WWPPGGR dającym kod jednostki nadrzędnej
+POZIOMY = {"gmina": 10, "powiat": 1000, "województwo": 100_000}
+# Poziom odpowiadający długości prefiksu kodu (liczbie cyfr)
+POZIOM_PREFIKSU = {2: "województwo", 4: "powiat", 6: "gmina"}
+AGREGACJE = ("sum", "count", "min", "max", "mean")
+# Agregacje, które można policzyć z wyników poziomu niższego, i sposób ich łączenia
+_LACZENIE = {"sum": "sum", "count": "sum", "min": "min", "max": "max"}
+
+
+class KostkaTeryt:
+    """
+    Zagregowane dane na wszystkich poziomach podziału administracyjnego (gmina, powiat, województwo).
+    Wiersze danych są grupowane tylko raz, do poziomu gmin, a wyższe poziomy powstają z wyników poziomu
+    niższego (sumy, liczności, minima i maksima da się łączyć, średnia liczona jest z sumy i liczności),
+    więc przejście między poziomami nie wymaga ponownego przeglądania danych.
+
+    Tabele poziomów mają indeks z kodami w postaci WWPPGGR (jak w module teryt, bez cyfry rodzaju) posortowany
+    hierarchicznie, dlatego jednostki o wspólnym prefiksie kodu można wybrać wyszukiwaniem binarnym.
+    Kolumny opisowe (np. nazwa województwa) są zachowywane na tych poziomach, na których są stałe w jednostce.
+    """
+
+    def __init__(self, df: pd.DataFrame, kolumny_wartosci: List[str], teryt_col: str = "TERYT",
+                 agregacje: List[str] = ("sum",), kolumny_opisowe: List[str] = (), z_rodzajem: bool | None = None):
+        """
+        Args:
+            df (pd.DataFrame): Dane z kolumną kodów TERYT (dowolna postać obsługiwana przez teryt.koduj_teryt)
+            kolumny_wartosci (List[str]): Kolumny do zagregowania
+            teryt_col (str): Nazwa kolumny z kodami
+            agregacje (List[str]): Agregacje spośród AGREGACJE; suma zachowuje nazwę kolumny,
+                                   pozostałe dostają nazwę w postaci "kolumna (agregacja)"
+            kolumny_opisowe (List[str]): Kolumny przepisywane do tabel poziomów, na których są stałe
+            z_rodzajem (bool | None): Przekazywany do teryt.koduj_teryt
+        """
+        nieznane = [agregacja for agregacja in agregacje if agregacja not in AGREGACJE]
+        if nieznane:
+            raise ValueError(f"Nieznane agregacje {nieznane}, dostępne to {list(AGREGACJE)}")
+        self.kolumny_wartosci = list(kolumny_wartosci)
+        self.agregacje = list(agregacje)
+        self.kolumny_opisowe = list(kolumny_opisowe)
+
+        kody = teryt.koduj_teryt(df[teryt_col], z_rodzajem)
+        poprawne = kody != teryt.BRAK
+        if not poprawne.all():
+            logging.warning(f"Pominięto {int((~poprawne).sum())} wierszy z pustym lub niepoprawnym kodem w kolumnie '{teryt_col}'.")
+        klucze = teryt.bez_rodzaju(kody[poprawne]) * 10
+
+        skladowe = set()
+        for agregacja in self.agregacje:
+            skladowe.update(["sum", "count"] if agregacja == "mean" else [agregacja])
+        self._skladowe = [agregacja for agregacja in _LACZENIE if agregacja in skladowe]
+
+        # jedyne przejście po wierszach danych, dalej pracujemy na tabelach jednostek
+        dane = df[poprawne]
+        grupy = dane.groupby(klucze, sort=True)
+        surowe = {"gmina": grupy[self.kolumny_wartosci].agg(self._skladowe)}
+        opisowe = {"gmina": grupy[self.kolumny_opisowe].first()} if self.kolumny_opisowe else {}
+
+        for nizszy, poziom in zip(POZIOMY, list(POZIOMY)[1:]):
+            tabela = surowe[nizszy]
+            klucze_poziomu = tabela.index // POZIOMY[poziom] * POZIOMY[poziom]
+            surowe[poziom] = tabela.groupby(klucze_poziomu, sort=True).agg(
+                {kolumna: _LACZENIE[kolumna[1]] for kolumna in tabela.columns})
+            if self.kolumny_opisowe:
+                opisy = opisowe[nizszy].groupby(klucze_poziomu, sort=True)
+                stale = opisy.nunique(dropna=False) <= 1
+                opisowe[poziom] = opisy.first().where(stale)
+
+        self._poziomy: Dict[str, pd.DataFrame] = {
+            poziom: self._tabela_poziomu(surowe[poziom], opisowe.get(poziom)) for poziom in POZIOMY}
+        logging.info(f"Zbudowano kostkę z {len(dane)} wierszy: " +
+                     ", ".join(f"{poziom} {len(tabela)}" for poziom, tabela in self._poziomy.items()) + " jednostek.")
+
+    def _tabela_poziomu(self, surowa: pd.DataFrame, opisy: pd.DataFrame | None) -> pd.DataFrame:
+        kolumny = {}
+        if opisy is not None:
+            for kolumna in self.kolumny_opisowe:
+                if opisy[kolumna].notna().any():
+                    kolumny[kolumna] = opisy[kolumna]
+        for kolumna in self.kolumny_wartosci:
+            for agregacja in self.agregacje:
+                nazwa = kolumna if agregacja == "sum" else f"{kolumna} ({agregacja})"
+                if agregacja == "mean":
+                    kolumny[nazwa] = surowa[(kolumna, "sum")] / surowa[(kolumna, "count")]
+                else:
+                    kolumny[nazwa] = surowa[(kolumna, agregacja)]
+        tabela = pd.DataFrame(kolumny, index=surowa.index)
+        tabela.index.name = "TERYT"
+        return tabela
+
+    def poziom(self, nazwa: str) -> pd.DataFrame:
+        """
+        Zwraca tabelę jednostek danego poziomu ("gmina", "powiat" lub "województwo").
+        """
+        if nazwa not in self._poziomy:
+            raise ValueError(f"Nieznany poziom '{nazwa}', dostępne to {list(POZIOMY)}")
+        return self._poziomy[nazwa].copy()
+
+    def wybierz(self, prefiks: str, poziom: str | None = None) -> pd.DataFrame:
+        """
+        Zwraca jednostki, których kod zaczyna się od podanego prefiksu, np. wybierz("02") zwraca województwo 02,
+        a wybierz("02", "powiat") wszystkie powiaty tego województwa (zejście poziom niżej).
+
+        Args:
+            prefiks (str): 2, 4 albo 6 cyfr kodu (spacje są pomijane); pusty prefiks wybiera cały poziom
+            poziom (str | None): Poziom zwracanych jednostek; domyślnie poziom jednostki wskazanej prefiksem
+        """
+        prefiks = str(prefiks).replace(" ", "")
+        if prefiks and (not prefiks.isdigit() or len(prefiks) not in POZIOM_PREFIKSU):
+            raise ValueError(f"Prefiks kodu '{prefiks}' musi składać się z 2, 4 lub 6 cyfr")
+        if poziom is None:
+            poziom = POZIOM_PREFIKSU.get(len(prefiks), "województwo")
+        tabela = self._poziomy.get(poziom)
+        if tabela is None:
+            raise ValueError(f"Nieznany poziom '{poziom}', dostępne to {list(POZIOMY)}")
+        if not prefiks:
+            return tabela.copy()
+        szerokosc = 10 ** (7 - len(prefiks))
+        poczatek = int(prefiks) * szerokosc
+        lewy, prawy = np.searchsorted(tabela.index.to_numpy(), [poczatek, poczatek + szerokosc])
+        return tabela.iloc[lewy:prawy].copy()
@@ -0,0 +1,162 @@
+import logging
+from typing import List
+
+import numpy as np
+import pandas as pd
+from data_analyzer import teryt
+
+# Polskie litery po zamianie na małe i ich odpowiedniki bez znaków diakrytycznych
+POLSKIE_ZNAKI = str.maketrans("ąćęłńóśźż", "acelnoszz")
+# Początek nazwy województwa pomijany w kluczach (np. "WOJ. MAZOWIECKIE" i "mazowieckie" to ten sam klucz)
+PREFIKS_WOJEWODZTWA = r"^(?:woj\.|wojewodztwo)\s*"
+NIEJEDNOZNACZNY = -2  # wartość w słownikach indeksu dla kluczy wskazujących kilka jednostek
+
+
+def normalizuj_nazwy(nazwy) -> np.ndarray:
+    """
+    Sprowadza nazwy do postaci kluczy porównywanych przy łączeniu: małe litery, litery bez znaków diakrytycznych,
+    pojedyncze spacje i łączniki bez spacji wokół (np. "Kędzierzyn - Koźle" i "KEDZIERZYN-KOZLE" dają ten sam klucz).
+    Operacje na napisach wykonywane są tylko dla unikalnych wartości, a wynik jest rozkładany po wierszach.
+
+    Args:
+        nazwy: Kolumna (Series, tablica lub lista) z nazwami
+
+    Returns:
+        np.ndarray: Tablica kluczy (obiekty str), None dla pustych wartości
+    """
+    pozycje, unikalne = pd.factorize(pd.Series(nazwy), use_na_sentinel=True)
+    klucze = (pd.Series(unikalne, dtype=object).astype(str).str.lower().str.translate(POLSKIE_ZNAKI)
+              .str.normalize("NFKD").str.replace(r"[\u0300-\u036f]", "", regex=True)
+              .str.replace(r"\s*-\s*", "-", regex=True).str.replace(r"\s+", " ", regex=True).str.strip())
+    # ostatnia pozycja to brak wartości (pozycja -1 z factorize)
+    return np.append(klucze.to_numpy(dtype=object), None)[pozycje]
+
+
+def normalizuj_wojewodztwa(nazwy) -> np.ndarray:
+    """
+    Klucze nazw województw: jak normalizuj_nazwy, dodatkowo bez przedrostka "woj." lub "województwo".
+    """
+    klucze = pd.Series(normalizuj_nazwy(nazwy), dtype=object)
+    return klucze.str.replace(PREFIKS_WOJEWODZTWA, "", regex=True).to_numpy(dtype=object)
+
+
+class IndeksNazw:
+    """
+    Indeks nazw jednostek (np. gmin) do łączenia z danymi, w których jednostki występują tylko z nazwy,
+    jak miejscowości w rejestrze koncesji. Klucze to znormalizowane nazwy (normalizuj_nazwy), więc wielkość
+    liter, znaki diakrytyczne i spacje nie wpływają na dopasowanie. Nazwy powtarzające się w kraju są
+    rozstrzygane przez województwo. Nazwy, których nie rozstrzyga nawet województwo (np. gmina miejska i gmina
+    wiejska o tej samej nazwie), domyślnie nie są dopasowywane, a z grupuj_niejednoznaczne=True dostają kod grupy:
+    najmniejszy kod wśród jednostek o tej nazwie w województwie (grupa() przypisuje ten sam kod tym jednostkom).
+
+    Słowniki indeksu są liczone raz, a wyszukiwanie całej kolumny to jedno wyszukiwanie w tablicy haszującej
+    dla każdej unikalnej wartości, bez normalizowania nazw indeksu przy kolejnych łączeniach.
+    """
+
+    def __init__(self, df: pd.DataFrame, kolumna_nazw: str = "Gmina", teryt_col: str = "TERYT",
+                 kolumna_wojewodztw: str | None = "Województwo", z_rodzajem: bool | None = None):
+        """
+        Args:
+            df (pd.DataFrame): Tabela jednostek z nazwami i kodami TERYT
+            kolumna_nazw (str): Nazwa kolumny z nazwami jednostek
+            teryt_col (str): Nazwa kolumny z kodami (dowolna postać obsługiwana przez teryt.koduj_teryt)
+            kolumna_wojewodztw (str | None): Kolumna z nazwami województw; bez niej nazwy są rozstrzygane
+                                             tylko wtedy, gdy są jednoznaczne w całym kraju
+            z_rodzajem (bool | None): Przekazywany do teryt.koduj_teryt
+        """
+        kody = teryt.koduj_teryt(df[teryt_col], z_rodzajem)
+        tabela = pd.DataFrame({
+            "nazwa": normalizuj_nazwy(df[kolumna_nazw]),
+            "wojewodztwo": normalizuj_wojewodztwa(df[kolumna_wojewodztw]) if kolumna_wojewodztw else None,
+            "kod": kody,
+        })
+        tabela = tabela[(tabela["kod"] != teryt.BRAK) & tabela["nazwa"].notna()].drop_duplicates()
+        if len(tabela) < len(df):
+            logging.info(f"Indeks nazw pomija {len(df) - len(tabela)} wierszy (puste nazwy lub kody, powtórzone jednostki).")
+
+        self.kandydaci_nazw = tabela.groupby("nazwa", sort=False)["kod"].agg(list)
+        self._po_nazwie = self._slownik(tabela, ["nazwa"])
+        self._po_nazwie_i_wojewodztwie = (self._slownik(tabela.dropna(subset=["wojewodztwo"]), ["nazwa", "wojewodztwo"])
+                                          if kolumna_wojewodztw else None)
+        # grupy jednostek o wspólnym kluczu (nazwa i województwo, a bez województw sama nazwa) i ich kody grup
+        klucze_grup = ["nazwa", "wojewodztwo"] if kolumna_wojewodztw else ["nazwa"]
+        tabela_grup = tabela.dropna(subset=klucze_grup)
+        grupy = tabela_grup.groupby(klucze_grup, sort=False)["kod"]
+        self._grupy = grupy.min()
+        kody_grup = pd.Series(grupy.transform("min").to_numpy(), index=tabela_grup["kod"].to_numpy())
+        self._kody_grup = kody_grup[~kody_grup.index.duplicated()]
+        logging.info(f"Zbudowano indeks {len(self._po_nazwie)} nazw dla {len(tabela)} jednostek, "
+                     f"{int((self._po_nazwie == NIEJEDNOZNACZNY).sum())} nazw występuje w kilku jednostkach.")
+
+    @staticmethod
+    def _slownik(tabela: pd.DataFrame, klucze: List[str]) -> pd.Series:
+        """
+        Kod jednostki dla każdego klucza, NIEJEDNOZNACZNY dla kluczy wskazujących kilka jednostek.
+        """
+        grupy = tabela.groupby(klucze, sort=False)["kod"]
+        return grupy.first().where(grupy.size() == 1, NIEJEDNOZNACZNY)
+
+    @staticmethod
+    def _szukaj(slownik: pd.Series, klucze: pd.Index) -> np.ndarray:
+        pozycje = slownik.index.get_indexer(klucze)
+        return np.where(pozycje >= 0, slownik.to_numpy()[pozycje], teryt.BRAK)
+
+    def grupa(self, kody) -> np.ndarray:
+        """
+        Zwraca kod grupy dla każdego kodu jednostki: najmniejszy kod wśród jednostek o tej samej nazwie
+        (w tym samym województwie), a dla jednostek bez powtórzonej nazwy i spoza indeksu - ten sam kod.
+        """
+        kody = np.asarray(kody, dtype=np.int64)
+        pozycje = self._kody_grup.index.get_indexer(kody)
+        return np.where(pozycje >= 0, self._kody_grup.to_numpy()[pozycje], kody)
+
+    def kandydaci(self, nazwa: str) -> List[int]:
+        """
+        Zwraca kody wszystkich jednostek o danej nazwie (po normalizacji), np. do sprawdzenia niedopasowanych nazw.
+        """
+        return list(self.kandydaci_nazw.get(normalizuj_nazwy([nazwa])[0], []))
+
+    def znajdz(self, nazwy, wojewodztwa=None, grupuj_niejednoznaczne: bool = False) -> np.ndarray:
+        """
+        Zwraca kody TERYT jednostek o podanych nazwach. Gdy podano województwa, nazwa jest szukana w parze
+        z województwem wiersza (wiersze bez województwa są dopasowywane tylko po nazwie jednoznacznej w kraju).
+
+        Args:
+            nazwy: Kolumna z nazwami do dopasowania
+            wojewodztwa: Kolumna z nazwami województw dla kolejnych nazw (dowolna postać, np. "WOJ. OPOLSKIE")
+            grupuj_niejednoznaczne (bool): Czy nazwy niejednoznaczne w województwie (w indeksie bez województw:
+                                           w kraju) dostają kod grupy zamiast BRAK
+
+        Returns:
+            np.ndarray: Kody w postaci WWPPGGR (jak teryt.koduj_teryt), BRAK dla nazw niedopasowanych
+                        lub niejednoznacznych (gdy nie są grupowane)
+        """
+        pozycje_nazw, unikalne_nazwy = pd.factorize(pd.Series(nazwy), use_na_sentinel=True)
+        klucze_nazw = np.append(normalizuj_nazwy(unikalne_nazwy), None)
+        if wojewodztwa is None or self._po_nazwie_i_wojewodztwie is None:
+            klucze = pd.Index(klucze_nazw)
+            wyniki = self._szukaj(self._po_nazwie, klucze)
+            if grupuj_niejednoznaczne and self._po_nazwie_i_wojewodztwie is None:
+                wyniki = np.where(wyniki == NIEJEDNOZNACZNY, self._szukaj(self._grupy, klucze), wyniki)
+            kody = wyniki[pozycje_nazw]
+        else:
+            pozycje_woj, unikalne_woj = pd.factorize(pd.Series(wojewodztwa), use_na_sentinel=True)
+            klucze_woj = np.append(normalizuj_wojewodztwa(unikalne_woj), None)
+            # szukamy tylko par (nazwa, województwo) występujących w danych, każdej raz
+            liczba_woj = len(unikalne_woj) + 1
+            pozycje_par, pary = pd.factorize((pozycje_nazw.astype(np.int64) + 1) * liczba_woj + pozycje_woj + 1)
+            nazwy_par = klucze_nazw[pary // liczba_woj - 1]
+            woj_par = klucze_woj[pary % liczba_woj - 1]
+            klucze = pd.MultiIndex.from_arrays([nazwy_par, woj_par])
+            wyniki = self._szukaj(self._po_nazwie_i_wojewodztwie, klucze)
+            if grupuj_niejednoznaczne:
+                wyniki = np.where(wyniki == NIEJEDNOZNACZNY, self._szukaj(self._grupy, klucze), wyniki)
+            bez_woj = pd.isna(woj_par)
+            wyniki[bez_woj] = self._szukaj(self._po_nazwie, pd.Index(nazwy_par[bez_woj]))
+            kody = wyniki[pozycje_par]
+
+        niejednoznaczne = kody == NIEJEDNOZNACZNY
+        kody = np.where(niejednoznaczne, teryt.BRAK, kody).astype(np.int64)
+        logging.info(f"Dopasowano {int((kody != teryt.BRAK).sum())} z {len(kody)} nazw, "
+                     f"{int(niejednoznaczne.sum())} nazw jest niejednoznacznych.")
+        return kody
@@ -0,0 +1,219 @@
+import json
+import logging
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Dict, List
+
+import pandas as pd
+from data_analyzer import data_loader as dl
+from data_analyzer.profilowanie import mierz
+
+# Rok w nazwie pliku, np. pozary_2019.xlsx albo 2019.csv
+WZORZEC_ROKU = re.compile(r"(?<!\d)((?:19|20)\d{2})(?!\d)")
+ROZSZERZENIA = (".csv", ".xls", ".xlsx")
+PLIK_PARTYCJI = "czesc-0.parquet"
+# Katalog z opisami przetworzonych plików; nazwy zaczynające się od "_" są pomijane przy czytaniu zbioru Parquet
+KATALOG_POSTEPU = "_postep"
+
+
+def znajdz_pliki_roczne(katalog: str, zrodla: List[str]) -> Dict[str, Dict[int, str]]:
+    """
+    Wyszukuje pliki roczne każdego źródła danych w układzie katalog/<źródło>/<plik z rokiem w nazwie>,
+    np. dane/pozary/pozary_2019.xlsx.
+
+    Args:
+        katalog (str): Katalog z podkatalogami źródeł
+        zrodla (List[str]): Nazwy źródeł (podkatalogów)
+
+    Returns:
+        Dict[str, Dict[int, str]]: Dla każdego źródła słownik rok -> ścieżka pliku
+    """
+    pliki = {}
+    for zrodlo in zrodla:
+        katalog_zrodla = os.path.join(katalog, zrodlo)
+        pliki[zrodlo] = {}
+        if not os.path.isdir(katalog_zrodla):
+            logging.warning(f"Brak katalogu źródła '{zrodlo}': {katalog_zrodla}")
+            continue
+        for nazwa in sorted(os.listdir(katalog_zrodla)):
+            dopasowanie = WZORZEC_ROKU.search(nazwa)
+            if not nazwa.endswith(ROZSZERZENIA) or dopasowanie is None:
+                continue
+            rok = int(dopasowanie.group(1))
+            if rok in pliki[zrodlo]:
+                logging.warning(f"Więcej niż jeden plik źródła '{zrodlo}' z roku {rok}, pomijam {nazwa}.")
+                continue
+            pliki[zrodlo][rok] = os.path.join(katalog_zrodla, nazwa)
+        logging.info(f"Źródło '{zrodlo}': znaleziono pliki z lat {sorted(pliki[zrodlo]) or '-'}.")
+    return pliki
+
+
+def przygotuj_plik(sciezka: str, funkcja: Callable[[pd.DataFrame], Any], **kwargs) -> Any:
+    """
+    Wczytuje plik funkcją load_data i przetwarza go podaną funkcją (np. etapem preprocessingu ze skryptu).
+    Razem z functools.partial pozwala użyć w zbuduj_panel funkcji przyjmujących DataFrame zamiast ścieżki.
+
+    Args:
+        sciezka (str): Ścieżka do pliku
+        funkcja (Callable): Funkcja przetwarzająca wczytaną ramkę
+        **kwargs: Argumenty przekazywane do load_data (np. cache, optymalizuj)
+    """
+    df = dl.load_data(sciezka, **kwargs)
+    return None if df is None else funkcja(df)
+
+
+def _opis_pliku(sciezka: str, funkcja: Callable) -> Dict[str, Any]:
+    stat = os.stat(sciezka)
+    nazwa_funkcji = getattr(getattr(funkcja, "func", funkcja), "__qualname__", repr(funkcja))
+    if hasattr(funkcja, "keywords") and "funkcja" in funkcja.keywords:
+        nazwa_funkcji += f"({funkcja.keywords['funkcja'].__qualname__})"
+    return {"plik": os.path.abspath(sciezka), "rozmiar": stat.st_size, "mtime_ns": stat.st_mtime_ns, "funkcja": nazwa_funkcji}
+
+
+def _sciezka_postepu(katalog_wyjsciowy: str, zrodlo: str, rok: int) -> str:
+    return os.path.join(katalog_wyjsciowy, KATALOG_POSTEPU, f"{zrodlo}-{rok}.json")
+
+
+def _aktualna(katalog_wyjsciowy: str, zrodlo: str, rok: int, opis: Dict[str, Any]) -> bool:
+    """
+    Sprawdza, czy partycje z danego pliku zostały już zapisane z tego samego pliku tą samą funkcją.
+    """
+    try:
+        with open(_sciezka_postepu(katalog_wyjsciowy, zrodlo, rok), encoding="utf-8") as f:
+            zapisany = json.load(f)
+    except (OSError, ValueError):
+        return False
+    tabele = zapisany.pop("tabele", {})
+    return zapisany == opis and all(
+        os.path.exists(os.path.join(katalog_wyjsciowy, f"zrodlo={nazwa}", f"rok={rok}", PLIK_PARTYCJI)) for nazwa in tabele)
+
+
+def _przetworz_partycje(zrodlo: str, rok: int, sciezka: str, funkcja: Callable, katalog_wyjsciowy: str,
+                        opis: Dict[str, Any]) -> Dict[str, int] | None:
+    """
+    Przetwarza plik jednego roku i zapisuje wynik w partycjach zrodlo=<nazwa>/rok=<rok>.
+    Funkcja może zwrócić DataFrame albo słownik nazwa tabeli -> DataFrame (każda tabela to osobne źródło w zbiorze).
+    """
+    wynik = funkcja(sciezka)
+    if wynik is None:
+        return None
+    tabele = wynik if isinstance(wynik, dict) else {zrodlo: wynik}
+    for nazwa, df in tabele.items():
+        katalog_partycji = os.path.join(katalog_wyjsciowy, f"zrodlo={nazwa}", f"rok={rok}")
+        os.makedirs(katalog_partycji, exist_ok=True)
+        sciezka_partycji = os.path.join(katalog_partycji, PLIK_PARTYCJI)
+        tymczasowa = f"{sciezka_partycji}.{os.getpid()}.tmp"
+        df.to_parquet(tymczasowa, index=False)
+        os.replace(tymczasowa, sciezka_partycji)
+
+    liczby_wierszy = {nazwa: len(df) for nazwa, df in tabele.items()}
+    sciezka_postepu = _sciezka_postepu(katalog_wyjsciowy, zrodlo, rok)
+    os.makedirs(os.path.dirname(sciezka_postepu), exist_ok=True)
+    with open(sciezka_postepu, "w", encoding="utf-8") as f:
+        json.dump({**opis, "tabele": liczby_wierszy}, f, ensure_ascii=False)
+    return liczby_wierszy
+
+
+@mierz
+def zbuduj_panel(pliki: Dict[str, Dict[int, str]], przygotowanie: Dict[str, Callable[[str], Any]], katalog_wyjsciowy: str,
+                 max_workers: int | None = None, nadpisz: bool = False) -> pd.DataFrame:
+    """
+    Przetwarza pliki roczne wszystkich źródeł równolegle w puli procesów i zapisuje wyniki jako zbiór Parquet
+    podzielony na partycje katalog_wyjsciowy/zrodlo=<źródło>/rok=<rok>/, który można potem czytać funkcją wczytaj_panel
+    tylko dla potrzebnych źródeł, lat i kolumn.
+    Pliki, których partycje zapisano już wcześniej z niezmienionego pliku tą samą funkcją, są pomijane, więc kolejne
+    uruchomienie przetwarza tylko nowe lub zmienione pliki. Po zmianie kodu preprocessingu trzeba użyć nadpisz=True.
+
+    Args:
+        pliki (Dict[str, Dict[int, str]]): Pliki roczne źródeł, np. wynik znajdz_pliki_roczne
+        przygotowanie (Dict[str, Callable]): Dla każdego źródła funkcja przyjmująca ścieżkę pliku i zwracająca DataFrame
+                                             albo słownik nazwa tabeli -> DataFrame (musi dać się przekazać do procesu,
+                                             czyli być funkcją modułu lub functools.partial, np. z przygotuj_plik)
+        katalog_wyjsciowy (str): Katalog zbioru Parquet
+        max_workers (int | None): Maksymalna liczba procesów (domyślnie liczba plików, ale nie więcej niż liczba rdzeni)
+        nadpisz (bool): Czy przetworzyć ponownie także pliki z aktualnymi partycjami
+
+    Returns:
+        pd.DataFrame: Podsumowanie z kolumnami zrodlo, rok, plik, status ("zapisany", "aktualny" lub "błąd") i wiersze
+    """
+    podsumowanie = []
+    zadania = []
+    for zrodlo, pliki_zrodla in pliki.items():
+        if zrodlo not in przygotowanie:
+            logging.warning(f"Brak funkcji przygotowania dla źródła '{zrodlo}', pomijam je.")
+            continue
+        for rok, sciezka in sorted(pliki_zrodla.items()):
+            opis = _opis_pliku(sciezka, przygotowanie[zrodlo])
+            if not nadpisz and _aktualna(katalog_wyjsciowy, zrodlo, rok, opis):
+                podsumowanie.append({"zrodlo": zrodlo, "rok": rok, "plik": sciezka, "status": "aktualny", "wiersze": None})
+            else:
+                zadania.append((zrodlo, rok, sciezka, przygotowanie[zrodlo], katalog_wyjsciowy, opis))
+
+    wyniki = [None] * len(zadania)
+    if len(zadania) <= 1 or max_workers == 1 or (os.cpu_count() or 1) == 1:
+        for i, zadanie in enumerate(zadania):
+            wyniki[i] = _bezpiecznie(zadanie)
+    else:
+        try:
+            with ProcessPoolExecutor(max_workers=max_workers or min(len(zadania), os.cpu_count() or 1)) as executor:
+                przyszle = [executor.submit(_przetworz_partycje, *zadanie) for zadanie in zadania]
+                for i, przyszly in enumerate(przyszle):
+                    try:
+                        wyniki[i] = przyszly.result()
+                    except Exception as e:  # np. błąd preprocessingu albo proces roboczy zakończył się awaryjnie
+                        logging.error(f"Wystąpił błąd podczas przetwarzania pliku {zadania[i][2]}: {e}")
+        except OSError as e:
+            logging.error(f"Nie udało się uruchomić puli procesów ({e}). Przetwarzam pliki po kolei.")
+            wyniki = [_bezpiecznie(zadanie) for zadanie in zadania]
+
+    for (zrodlo, rok, sciezka, *_), wynik in zip(zadania, wyniki):
+        podsumowanie.append({"zrodlo": zrodlo, "rok": rok, "plik": sciezka, "status": "błąd" if wynik is None else "zapisany",
+                             "wiersze": None if wynik is None else sum(wynik.values())})
+
+    podsumowanie = pd.DataFrame(podsumowanie, columns=["zrodlo", "rok", "plik", "status", "wiersze"])
+    liczby = podsumowanie["status"].value_counts()
+    logging.info(f"Panel w {katalog_wyjsciowy}: zapisano {liczby.get('zapisany', 0)}, aktualnych {liczby.get('aktualny', 0)}, "
+                 f"błędów {liczby.get('błąd', 0)}.")
+    return podsumowanie
+
+
+def _bezpiecznie(zadanie: tuple) -> Dict[str, int] | None:
+    try:
+        return _przetworz_partycje(*zadanie)
+    except Exception as e:
+        logging.error(f"Wystąpił błąd podczas przetwarzania pliku {zadanie[2]}: {e}")
+        return None
+
+
+@mierz
+def wczytaj_panel(katalog: str, zrodlo: str, lata: List[int] | None = None, kolumny: List[str] | None = None) -> pd.DataFrame | None:
+    """
+    Wczytuje tabelę jednego źródła ze zbioru zapisanego przez zbuduj_panel. Czytane są tylko partycje wskazanych
+    lat i tylko wskazane kolumny, więc pozostałe pliki i kolumny w ogóle nie są odczytywane z dysku.
+
+    Args:
+        katalog (str): Katalog zbioru Parquet
+        zrodlo (str): Nazwa źródła (tabeli)
+        lata (List[int] | None): Lata do wczytania (domyślnie wszystkie)
+        kolumny (List[str] | None): Kolumny do wczytania (domyślnie wszystkie); kolumna "rok" jest dodawana zawsze
+
+    Returns:
+        DataFrame z kolumną "rok" lub None, jeśli wystąpił błąd
+    """
+    sciezka = os.path.join(katalog, f"zrodlo={zrodlo}")
+    if not os.path.isdir(sciezka):
+        logging.error(f"Brak źródła '{zrodlo}' w zbiorze {katalog}.")
+        return None
+    try:
+        df = pd.read_parquet(sciezka, columns=None if kolumny is None else [*kolumny, "rok"],
+                             filters=None if lata is None else [("rok", "in", list(lata))])
+    except ImportError as e:
+        logging.error(f"Odczyt zbioru Parquet wymaga pakietu pyarrow (pip install pyarrow): {e}")
+        return None
+    except Exception as e:
+        logging.error(f"Wystąpił błąd podczas wczytywania źródła '{zrodlo}' ze zbioru {katalog}: {e}")
+        return None
+    df["rok"] = df["rok"].astype(int)
+    logging.info(f"Wczytano {len(df)} wierszy źródła '{zrodlo}' z lat {sorted(df['rok'].unique().tolist())}.")
+    return df
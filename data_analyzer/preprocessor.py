@@ -1,11 +1,61 @@
+import functools
+import inspect
+import numpy as np
 import pandas as pd
 import logging
+from dataclasses import dataclass, field
+from typing import Callable
+from data_analyzer import teryt
+from data_analyzer.profilowanie import mierz, etap
 
-logging.basicConfig(level=logging.INFO, format='%(levelname)s: %(message)s', encoding='utf-8')
+# Cyfry rodzaju gminy w kodach 7-cyfrowych: dzielnice i delegatury miast oraz miasto i obszar wiejski gminy miejsko-wiejskiej
+RODZAJE_DZIELNIC = [8, 9]
+RODZAJE_CZESCI_GMIN_MW = [4, 5]
 
+# Domyślny tryb pracy funkcji, gdy nie podano argumentu bez_kopii.
+# True oznacza, że funkcje nie kopiują całej ramki, a podmieniają tylko przetwarzaną kolumnę.
+BEZ_KOPII = False
 
 
-def usun_woj(df: pd.DataFrame, column: str = "Województwo", prefix: str = "WOJ. ") -> pd.DataFrame:
+def _kopiuj(df: pd.DataFrame, bez_kopii: bool | None) -> pd.DataFrame:
+    """
+    Zwraca ramkę, na której funkcja może bezpiecznie pracować.
+    W trybie domyślnym jest to pełna (głęboka) kopia, a w trybie bez_kopii płytka kopia - nowa ramka
+    współdzieli dane z oryginałem, więc przypisanie całej kolumny podmienia tylko tę kolumnę,
+    a oryginalny DataFrame pozostaje bez zmian.
+    """
+    if bez_kopii is None:
+        bez_kopii = BEZ_KOPII
+    return df.copy(deep=not bez_kopii)
+
+
+def _typ_napisowy(dtype) -> bool:
+    """
+    Sprawdza, czy kolumna ma typ napisowy pandas (StringDtype albo napisy Arrow); kolumny object nie są tu uwzględniane.
+    """
+    return isinstance(dtype, pd.StringDtype) or (isinstance(dtype, pd.ArrowDtype) and dtype.kind == "U")
+
+
+def _jako_napisy(kolumna: pd.Series) -> pd.Series:
+    """
+    Zwraca kolumnę jako napisy, na których działają operacje .str.
+    Kolumny wczytane z typami pyarrow (dtype_backend="pyarrow") zamieniane są na napisy Arrow, więc operacje .str
+    wykonywane są przez pyarrow na całej kolumnie, a nie w pętli Pythona. Pozostałe kolumny zamieniamy przez astype(str).
+    """
+    if _typ_napisowy(kolumna.dtype):
+        return kolumna
+    if isinstance(kolumna.dtype, pd.ArrowDtype):
+        import pyarrow as pa  # kolumny Arrow istnieją tylko, gdy pyarrow jest zainstalowany
+        return kolumna.astype(pd.ArrowDtype(pa.string()))
+    return kolumna.astype(str)
+
+
+def _bez_prefiksu(kolumna: pd.Series, prefix: str = "WOJ. "):
+    return kolumna.str.removeprefix(prefix), None
+
+
+@mierz
+def usun_woj(df: pd.DataFrame, column: str = "Województwo", prefix: str = "WOJ. ", bez_kopii: bool | None = None) -> pd.DataFrame:
     """
         Usuwa "Woj. " z nazwy Województwa w kolumnie, lub inny podany prefix
     """
@@ -14,13 +64,18 @@ def usun_woj(df: pd.DataFrame, column: str = "Województwo", prefix: str = "WOJ.
         logging.warning(f"Kolumna '{column}' nie istnieje w DataFrame. Pomijam krok.")
         return df
 
-    df_copy = df.copy()
-    df_copy[column] = df_copy[column].str.removeprefix(prefix)
+    df_copy = _kopiuj(df, bez_kopii)
+    df_copy[column], _ = _bez_prefiksu(df_copy[column], prefix)
     logging.info(f"Usunięto prefiks '{prefix}' z kolumny '{column}'.")
     return df_copy
 
 
-def litery_na_male(df: pd.DataFrame, column: str = "Województwo") -> pd.DataFrame:
+def _male_litery(kolumna: pd.Series):
+    return kolumna.str.lower(), None
+
+
+@mierz
+def litery_na_male(df: pd.DataFrame, column: str = "Województwo", bez_kopii: bool | None = None) -> pd.DataFrame:
     """
         Zmienia litery w kolumnie na małe
     """
@@ -28,30 +83,38 @@ def litery_na_male(df: pd.DataFrame, column: str = "Województwo") -> pd.DataFra
         logging.warning(f"Kolumna '{column}' nie istnieje w DataFrame.")
         return df
 
-    df_copy = df.copy()
-    df_copy[column] = df_copy[column].str.lower()
+    df_copy = _kopiuj(df, bez_kopii)
+    df_copy[column], _ = _male_litery(df_copy[column])
     logging.info(f"Zmieniono litery na małe w kolumnie '{column}'.")
     return df_copy
 
 
+def _bez_ostatnich_cyfr(kolumna: pd.Series, cyfry: list[str]):
+    napisy = _jako_napisy(kolumna) #powinny być stringi, ale lepiej się ubezpieczyć
+    maska = napisy.str.endswith(tuple(cyfry), na=False) #na=False jest na wszelki wypadek, żeby maska na pewno działała
+    return napisy, ~maska.to_numpy(dtype=bool)
+
 
-def usun_z_ostatnia_cyfra(df: pd.DataFrame, column: str, cyfry: list[str]) -> pd.DataFrame:
+@mierz
+def usun_z_ostatnia_cyfra(df: pd.DataFrame, column: str, cyfry: list[str], bez_kopii: bool | None = None) -> pd.DataFrame:
     """
         Usuwa wiersze, w których wartość w podanej kolumnie (jako string) kończy się na jedną z podanych cyfr.
     """
-    df_copy = df.copy()
-    df_copy[column] = df_copy[column].astype(str) #powinny być stringi, ale lepiej się ubezpieczyć
-    maska = df_copy[column].str.endswith(tuple(cyfry), na=False) #na=False jest na wszelki wypadek, żeby maska na pewno działała
-    df_cleaned = df_copy[~maska]
+    df_copy = _kopiuj(df, bez_kopii)
+    df_copy[column], maska = _bez_ostatnich_cyfr(df_copy[column], cyfry)
+    df_cleaned = df_copy[maska]
 
     logging.info(
         f"Usunięto {len(df_copy) - len(df_cleaned)} wierszy z kolumny '{column}' kończących się na {cyfry}.")
     return df_cleaned
 
 
+def _bez_ostatniego_znaku(kolumna: pd.Series):
+    return _jako_napisy(kolumna).str[:-1], None
 
 
-def usun_ostatnia_cyfre(df: pd.DataFrame, column: str) -> pd.DataFrame:
+@mierz
+def usun_ostatnia_cyfre(df: pd.DataFrame, column: str, bez_kopii: bool | None = None) -> pd.DataFrame:
     """
         Usuwa ostatni znak z wartości w podanej kolumnie (traktując je jako string).
     """
@@ -59,14 +122,21 @@ def usun_ostatnia_cyfre(df: pd.DataFrame, column: str) -> pd.DataFrame:
         logging.warning(f"Kolumna '{column}' nie istnieje w DataFrame. Zwracam oryginalny dataframe.")
         return df
 
-    df_copy = df.copy()
-    df_copy[column] = df_copy[column].astype(str).str[:-1]
+    df_copy = _kopiuj(df, bez_kopii)
+    df_copy[column], _ = _bez_ostatniego_znaku(df_copy[column])
     logging.info(f"Usunięto ostatnią cyfrę w kolumnie '{column}'.")
     return df_copy
 
 
+def _jako_liczby(kolumna: pd.Series):
+    liczby = pd.to_numeric(kolumna, errors='coerce') # errors='coerce' zamieni niepoprawne wartości na NaN
+    if liczby.isna().any():
+        raise ValueError("wartości, których nie da się zamienić na liczby")
+    return liczby, None
 
-def str_to_int(df: pd.DataFrame, column: str) -> pd.DataFrame:
+
+@mierz
+def str_to_int(df: pd.DataFrame, column: str, bez_kopii: bool | None = None) -> pd.DataFrame:
     """
     zamienia string na int w całej kolumnie
     """
@@ -74,39 +144,125 @@ def str_to_int(df: pd.DataFrame, column: str) -> pd.DataFrame:
         logging.warning(f"Kolumna '{column}' nie istnieje w DataFrame. Zwracam oryginalny dataframe.")
         return df
 
-    df_copy = df.copy()
-
-    df_copy[column] = pd.to_numeric(df_copy[column], errors='coerce') # errors='coerce' zamieni niepoprawne wartości na NaN
-
-    if df_copy[column].isna().any():
+    try:
+        liczby, _ = _jako_liczby(df[column])
+    except ValueError:
         logging.warning(f"Kolumna '{column}' zawiera wartości, których nie da się zamienić na integer. Zwracam oryginalny dataframe.")
         return df
-    else:
-        return df_copy
-
 
+    df_copy = _kopiuj(df, bez_kopii)
+    df_copy[column] = liczby
+    return df_copy
 
 
-def znajdz_duplikaty(df: pd.DataFrame, column: str):
+class DetektorDuplikatow:
     """
-    pokazuje liczbę duplikatów (nieunikalnych wartości) w danej kolumnie i wypisuje te wiersze
-    (nic nie zwraca, jedynie wyświetla informacje)
+    Wyszukiwanie powtórzonych kluczy (jednej lub kilku kolumn, np. Gmina i Powiat albo TERYT i rok) w danych
+    dodawanych porcjami, np. kolejnymi kawałkami pliku CSV, bez trzymania w pamięci wcześniejszych porcji.
+
+    Klucz wiersza to 64-bitowy skrót wartości jego kolumn (pd.util.hash_pandas_object), a porcja jest grupowana
+    w jednym przejściu po tablicy haszującej (pd.factorize). Pamiętany jest tylko skrót, liczność i pierwszy wiersz
+    każdego klucza oraz wiersze powtórzeń. Różne klucze mogą mieć ten sam skrót z prawdopodobieństwem rzędu
+    n^2 / 2^65 (ok. 3e-4 dla 100 mln różnych kluczy). Kolumny klucza powinny mieć ten sam typ we wszystkich porcjach
+    (np. dtype w read_csv), bo 1 i 1.0 mają różne skróty; braki danych są traktowane jako równe sobie, jak w duplicated.
     """
-    if column not in df.columns:
-        logging.warning(f"Kolumna '{column}' nie istnieje w DataFrame.")
-        return
 
-    duplicates = df[df.duplicated(subset=[column], keep=False)]
-    if not duplicates.empty:
-        logging.warning(
-            f"Znaleziono {len(duplicates)} wierszy z {duplicates[column].nunique()} zduplikowanymi wartościami w kolumnie '{column}':")
-        print(duplicates.sort_values(by=column))
+    def __init__(self, kolumny: str | list[str]):
+        self.kolumny = [kolumny] if isinstance(kolumny, str) else list(kolumny)
+        self.liczba_wierszy = 0
+        self._skroty = np.empty(0, dtype=np.uint64)
+        self._indeks = pd.Index(self._skroty)
+        self._liczby = np.empty(0, dtype=np.int64)
+        self._pierwsze = np.empty(0, dtype=np.int64)
+        self._powtorzenia_kluczy: list[np.ndarray] = []
+        self._powtorzenia_wierszy: list[np.ndarray] = []
+
+    def dodaj(self, df: pd.DataFrame) -> "DetektorDuplikatow":
+        """
+        Dodaje kolejną porcję danych; jej wiersze dostają kolejne numery (od liczby wierszy dodanych wcześniej).
+        """
+        skroty = pd.util.hash_pandas_object(df[self.kolumny], index=False).to_numpy()
+        pozycje, unikalne = pd.factorize(skroty)
+        # factorize numeruje klucze w kolejności pierwszego wystąpienia, więc pierwsze wystąpienie klucza
+        # to wiersz, w którym numer jest większy od wszystkich wcześniejszych
+        pierwsze = np.flatnonzero(pozycje > np.maximum.accumulate(np.concatenate(([-1], pozycje[:-1]))))
+
+        liczby = np.bincount(pozycje, minlength=len(unikalne))
+        klucze = self._indeks.get_indexer(unikalne)
+        znane = klucze >= 0
+        self._liczby[klucze[znane]] += liczby[znane]
+        nowe = np.flatnonzero(~znane)
+        klucze[nowe] = len(self._skroty) + np.arange(len(nowe))
+        self._skroty = np.concatenate([self._skroty, unikalne[nowe]])
+        self._liczby = np.concatenate([self._liczby, liczby[nowe]])
+        self._pierwsze = np.concatenate([self._pierwsze, self.liczba_wierszy + pierwsze[nowe]])
+        self._indeks = pd.Index(self._skroty)
+
+        # powtórzenie to każde kolejne wystąpienie klucza w porcji oraz pierwsze, jeśli klucz był w poprzednich porcjach
+        powtorzone = np.ones(len(pozycje), dtype=bool)
+        powtorzone[pierwsze] = znane
+        wiersze = np.flatnonzero(powtorzone)
+        self._powtorzenia_kluczy.append(klucze[pozycje[wiersze]])
+        self._powtorzenia_wierszy.append(self.liczba_wierszy + wiersze)
+        self.liczba_wierszy += len(df)
+        return self
+
+    def wynik(self) -> pd.DataFrame:
+        """
+        Zwraca wszystkie wiersze z powtórzonymi kluczami.
+
+        Returns:
+            pd.DataFrame: Indeks "wiersz" to numer wiersza (licząc od pierwszej porcji), kolumna "grupa" to numer
+                          powtórzonego klucza (0, 1, ... w kolejności pierwszego wystąpienia), a "liczba" to liczba
+                          wierszy z tym kluczem; wiersze są posortowane według grupy i numeru wiersza
+        """
+        powtorzone = np.flatnonzero(self._liczby > 1)
+        kolejnosc = powtorzone[np.argsort(self._pierwsze[powtorzone], kind="stable")]
+        grupy = np.full(len(self._skroty), -1, dtype=np.int64)
+        grupy[kolejnosc] = np.arange(len(kolejnosc))
+
+        klucze = np.concatenate([kolejnosc] + self._powtorzenia_kluczy)
+        wiersze = np.concatenate([self._pierwsze[kolejnosc]] + self._powtorzenia_wierszy)
+        porzadek = np.lexsort((wiersze, grupy[klucze]))
+        return pd.DataFrame({"grupa": grupy[klucze][porzadek], "liczba": self._liczby[klucze][porzadek]},
+                            index=pd.Index(wiersze[porzadek], name="wiersz"))
+
+
+@mierz
+def znajdz_duplikaty(df: pd.DataFrame, column: str | list[str]) -> pd.DataFrame | None:
+    """
+    Wyszukuje wiersze z powtórzoną wartością kolumny lub kombinacją wartości kilku kolumn (np. ["Gmina", "Powiat"]),
+    w jednym przejściu po tablicy haszującej (DetektorDuplikatow). Dane wczytywane porcjami można sprawdzić,
+    podając kolejne porcje do DetektorDuplikatow.dodaj.
+    Funkcja nie wypisuje już znalezionych wierszy (wcześniej drukowała je posortowane i nic nie zwracała),
+    tylko zwraca ich opis - wiersze można wyświetlić przez df.loc[wynik.index].
+
+    Args:
+        df (pd.DataFrame): Dane
+        column (str | list[str]): Kolumna lub kolumny tworzące klucz
+
+    Returns:
+        pd.DataFrame | None: Wiersze z powtórzonym kluczem: indeks to etykiety wierszy df (df.loc[wynik.index] zwraca
+                             te wiersze), "grupa" to numer powtórzonego klucza, "liczba" to liczba wierszy z tym kluczem;
+                             None, jeśli brakuje którejś kolumny
+    """
+    kolumny = [column] if isinstance(column, str) else list(column)
+    brakujace = [kolumna for kolumna in kolumny if kolumna not in df.columns]
+    if brakujace:
+        logging.warning(f"Kolumny {brakujace} nie istnieją w DataFrame.")
+        return None
+
+    wynik = DetektorDuplikatow(kolumny).dodaj(df).wynik()
+    wynik.index = df.index[wynik.index.to_numpy()]
+    if len(wynik):
+        logging.warning(f"Znaleziono {len(wynik)} wierszy z {wynik['grupa'].nunique()} zduplikowanymi wartościami w kolumnach {kolumny}.")
     else:
-        logging.info(f"Brak zduplikowanych wartości w kolumnie '{column}'.")
+        logging.info(f"Brak zduplikowanych wartości w kolumnach {kolumny}.")
+    return wynik
 
 
-
-def zmien_nazwe(df: pd.DataFrame, old_name: str, new_name: str) -> pd.DataFrame:
+@mierz
+def zmien_nazwe(df: pd.DataFrame, old_name: str, new_name: str, bez_kopii: bool | None = None) -> pd.DataFrame:
     """
     Zmienia nazwę kolumny
     """
@@ -114,31 +270,49 @@ def zmien_nazwe(df: pd.DataFrame, old_name: str, new_name: str) -> pd.DataFrame:
         logging.warning(f"Kolumna '{old_name}' nie istnieje w DataFrame.")
         return df
 
-    df_copy = df.copy()
+    df_copy = _kopiuj(df, bez_kopii)
     df_copy.rename(columns={old_name: new_name}, inplace=True)
     logging.info(f"Zmieniono nazwę kolumny '{old_name}' na '{new_name}'.")
     return df_copy
 
-def usun_puste_wiersze(df: pd.DataFrame, nazwa_kolumny: str="TERYT") -> pd.DataFrame:
+def _bez_pustych(kolumna: pd.Series):
+    # w niektórych datasetach, zamiast pustych wartości Nan, mieliśmy puste stringi (lub same białe znaki)
+    #zamienimy je na Nan, żeby się ich pozbyć
+    if isinstance(kolumna.dtype, pd.CategoricalDtype):
+        # w kolumnie kategorii wystarczy usunąć puste napisy z listy kategorii, wiersze z nimi staną się NaN
+        puste = [kategoria for kategoria in kolumna.cat.categories if isinstance(kategoria, str) and not kategoria.strip()]
+        kolumna = kolumna.cat.remove_categories(puste)
+    elif _typ_napisowy(kolumna.dtype):
+        # w kolumnie napisów (np. Arrow) porównanie z pustym napisem po strip jest liczone na całej kolumnie
+        kolumna = kolumna.mask((kolumna.str.strip() == "").fillna(False))
+    elif not isinstance(kolumna.dtype, pd.ArrowDtype): # w kolumnach liczbowych Arrow nie ma napisów
+        kolumna = kolumna.replace(r'^\s*$', pd.NA, regex=True)
+    # ^ to początek, \s to biały znak *to dowolna ilość, $ to koniec
+    return kolumna, kolumna.notna().to_numpy()
+
+
+@mierz
+def usun_puste_wiersze(df: pd.DataFrame, nazwa_kolumny: str="TERYT", bez_kopii: bool | None = None) -> pd.DataFrame:
     """
     usuwa puste wiersze z kolumny o wskazanej nazwie (domyślnie TERYT)
     """
     if nazwa_kolumny not in df.columns:
         logging.warning(f"Kolumna '{nazwa_kolumny}' nie istnieje w DataFrame.")
         return df
-    df_copy = df.copy()
-    # w niektórych datasetach, zamiast pustych wartości Nan, mieliśmy puste stringi (lub same białe znaki)
-    #zamienimy je na Nan, żeby się ich pozbyć
-    df_copy[nazwa_kolumny] = df_copy[nazwa_kolumny].replace(r'^\s*$', pd.NA, regex=True)
-    # ^ to początek, \s to biały znak *to dowolna ilość, $ to koniec
-    df_filtr=df_copy.dropna(subset=[nazwa_kolumny])
+    df_copy = _kopiuj(df, bez_kopii)
+    df_copy[nazwa_kolumny], maska = _bez_pustych(df_copy[nazwa_kolumny])
+    df_filtr=df_copy[maska]
     logging.info(f"usunięto {len(df_copy)-len(df_filtr)} pustych wierszy.")
     return df_filtr
 
 
+def _bez_krotkich(kolumna: pd.Series, wartosc: int = 7):
+    maska = (_jako_napisy(kolumna).str.len() >= wartosc).fillna(False) # puste wartości w kolumnach Arrow mają długość NA
+    return kolumna, maska.to_numpy(dtype=bool)
 
 
-def usun_krotkie(df: pd.DataFrame, column: str="TERYT", wartosc: int=7) -> pd.DataFrame:
+@mierz
+def usun_krotkie(df: pd.DataFrame, column: str="TERYT", wartosc: int=7, bez_kopii: bool | None = None) -> pd.DataFrame:
     """
     usuwa wszystkie wiersze, które w danej kolumnie zawierają napis krótszy niż wskazna wartość
     """
@@ -146,10 +320,10 @@ def usun_krotkie(df: pd.DataFrame, column: str="TERYT", wartosc: int=7) -> pd.Da
         logging.warning(f"Kolumna '{column}' nie istnieje w DataFrame.")
         return df
 
-    df_copy=df.copy()
+    df_copy=_kopiuj(df, bez_kopii)
     oryginalna_liczba_wierszy = len(df_copy)
 
-    maska = df_copy[column].astype(str).str.len() >= wartosc
+    _, maska = _bez_krotkich(df_copy[column], wartosc)
     df_przefiltrowany=df_copy[maska]
 
     nowa_liczba_wierszy = len(df_przefiltrowany)
@@ -160,8 +334,12 @@ def usun_krotkie(df: pd.DataFrame, column: str="TERYT", wartosc: int=7) -> pd.Da
     return df_przefiltrowany
 
 
+def _bez_odstepow(kolumna: pd.Series):
+    return kolumna.str.replace(' ', ''), None
+
 
-def usun_odstepy(df: pd.DataFrame, column: str="TERYT") -> pd.DataFrame:
+@mierz
+def usun_odstepy(df: pd.DataFrame, column: str="TERYT", bez_kopii: bool | None = None) -> pd.DataFrame:
     """
     Funkcja usuwa spacje w całej kolumnie
 
@@ -170,46 +348,99 @@ def usun_odstepy(df: pd.DataFrame, column: str="TERYT") -> pd.DataFrame:
         logging.warning(f"Kolumna '{column}' nie istnieje w DataFrame.")
         return df
 
-    df_copy = df.copy()
-    df_copy[column] = df_copy[column].str.replace(' ', '')
+    df_copy = _kopiuj(df, bez_kopii)
+    df_copy[column], _ = _bez_odstepow(df_copy[column])
     logging.info(f"Usunięto odstępy z kolumny '{column}'.")
     return df_copy
 
 
-def sprawdz_zgodnosc(df1: pd.DataFrame, df2: pd.DataFrame, key_column: str):
+@mierz
+def sprawdz_zgodnosc(df1: pd.DataFrame, df2: pd.DataFrame, key_column: str, maks_wierszy: int | None = 20) -> "WynikZgodnosci | None":
     """
     sprawdza ile jest wspólnych kodów, wyświetla te wiersze z obu tabel, których kody nie mają pary
     zakłada, że nazwy kolumn, których zgodność sprawdzamy są takie same
+    wyświetlanych jest najwyżej maks_wierszy wierszy z każdej tabeli (None - wszystkie, 0 - żadne),
+    a pełny wynik zwracany jest jako WynikZgodnosci
     """
-    if key_column not in df1.columns or key_column not in df2.columns:
-        logging.error(f"Kolumna klucza '{key_column}' nie istnieje w conajmniej jednym z DataFrame'ów. Przerywam sprawdzanie.")
-        return
-
-    keys1 = df1[key_column].unique()
-    keys2 = df2[key_column].unique()
+    wynik = uzgodnij_klucze([df1, df2], key_column)
+    if wynik is None:
+        return None
+
+    komunikaty = [("pierwszym", "pierwszego", "drugim"), ("drugim", "drugiego", "pierwszym")]
+    for i, (w_ramce, z_ramki, w_innej) in enumerate(komunikaty):
+        liczba = len(wynik.niedopasowane_wiersze[i])
+        if liczba:
+            logging.warning(
+                f"Znaleziono {liczba} wierszy w {w_ramce} DataFrame, które nie mają odpowiednika w {w_innej}:")
+            if maks_wierszy != 0:
+                print(wynik.pokaz(i, maks_wierszy))
+        else:
+            logging.info(f"Wszystkie wiersze z {z_ramki} DataFrame mają odpowiedniki w {w_innej}.")
+
+    if wynik.zgodne:
+        logging.info(f"Pełna spójność kluczy w kolumnie '{key_column}' między oboma DataFrame'ami.")
+    return wynik
 
-    unmatched_rows_in_df1 = df1[~df1[key_column].isin(keys2)]
-    unmatched_rows_in_df2 = df2[~df2[key_column].isin(keys1)]
 
-    if not unmatched_rows_in_df1.empty:
-        logging.warning(
-            f"Znaleziono {len(unmatched_rows_in_df1)} wierszy w pierwszym DataFrame, które nie mają odpowiednika w drugim:")
-        print(unmatched_rows_in_df1.to_string())
-    else:
-        logging.info("Wszystkie wiersze z pierwszego DataFrame mają odpowiedniki w drugim.")
+@dataclass
+class WynikZgodnosci:
+    """
+    Wynik uzgadniania kluczy między kilkoma DataFrame'ami. Dla każdej ramki (w kolejności podania) zawiera
+    klucze i pozycje wierszy, których klucz nie występuje w co najmniej jednej z pozostałych ramek.
+    """
+    key_column: str
+    liczba_wierszy: list[int]
+    liczba_kluczy: int
+    niedopasowane_klucze: list[np.ndarray]
+    niedopasowane_wiersze: list[np.ndarray]
+    ramki: list[pd.DataFrame] = field(repr=False, default_factory=list)
+
+    @property
+    def zgodne(self) -> bool:
+        return all(len(wiersze) == 0 for wiersze in self.niedopasowane_wiersze)
+
+    def pokaz(self, i: int, maks_wierszy: int | None = 20) -> str:
+        """
+        Zwraca tekstową postać najwyżej maks_wierszy niedopasowanych wierszy z i-tej ramki.
+        """
+        wiersze = self.niedopasowane_wiersze[i]
+        tekst = self.ramki[i].iloc[wiersze[:maks_wierszy]].to_string()
+        if maks_wierszy is not None and len(wiersze) > maks_wierszy:
+            tekst += f"\n... (pominięto {len(wiersze) - maks_wierszy} wierszy)"
+        return tekst
+
+
+@mierz
+def uzgodnij_klucze(ramki: list[pd.DataFrame], key_column: str) -> WynikZgodnosci | None:
+    """
+    Porównuje klucze w kolumnie key_column między dowolną liczbą DataFrame'ów w jednym przebiegu:
+    klucze wszystkich ramek są haszowane raz (factorize), a obecność klucza w każdej ramce zapisywana w jednej tablicy.
+    Niczego nie wyświetla, zwraca WynikZgodnosci.
+    """
+    if any(key_column not in df.columns for df in ramki):
+        logging.error(f"Kolumna klucza '{key_column}' nie istnieje w conajmniej jednym z DataFrame'ów. Przerywam sprawdzanie.")
+        return None
 
-    if not unmatched_rows_in_df2.empty:
-        logging.warning(
-            f"Znaleziono {len(unmatched_rows_in_df2)} wierszy w drugim DataFrame, które nie mają odpowiednika w pierwszym:")
-        print(unmatched_rows_in_df2.to_string())
-    else:
-        logging.info("Wszystkie wiersze z drugiego DataFrame mają odpowiedniki w pierwszym.")
+    kody, unikalne = pd.factorize(pd.concat([df[key_column] for df in ramki], ignore_index=True), use_na_sentinel=False)
+    granice = np.cumsum([0] + [len(df) for df in ramki])
+    obecnosc = np.zeros((len(unikalne), len(ramki)), dtype=bool)
+    for i in range(len(ramki)):
+        obecnosc[kody[granice[i]:granice[i + 1]], i] = True
+    we_wszystkich = obecnosc.all(axis=1)
 
-    if unmatched_rows_in_df1.empty and unmatched_rows_in_df2.empty:
-        logging.info(f"Pełna spójność kluczy w kolumnie '{key_column}' między oboma DataFrame'ami.")
+    niedopasowane_klucze = []
+    niedopasowane_wiersze = []
+    for i in range(len(ramki)):
+        kody_ramki = kody[granice[i]:granice[i + 1]]
+        wiersze = np.flatnonzero(~we_wszystkich[kody_ramki])
+        niedopasowane_wiersze.append(wiersze)
+        niedopasowane_klucze.append(np.asarray(unikalne.take(np.unique(kody_ramki[wiersze]))))
 
+    return WynikZgodnosci(key_column, [len(df) for df in ramki], len(unikalne),
+                          niedopasowane_klucze, niedopasowane_wiersze, list(ramki))
 
 
+@mierz
 def zlacz_dzielnice(df: pd.DataFrame, sum_col: str, gmina_col: str="Gmina", powiat_col: str="Powiat") -> pd.DataFrame:
     """
     Niektóre zbiory danych mają rozdzielone duże miasta na dzielnice, możemy znaleźć je w taki sposób, że tam, gdzie Powiat jest taki sam jak Gmina,
@@ -222,8 +453,13 @@ def zlacz_dzielnice(df: pd.DataFrame, sum_col: str, gmina_col: str="Gmina", powi
 
     klucze_grupowania = [gmina_col, powiat_col]
 
-    maska = (df[gmina_col] == df[powiat_col]) & \
-                           df.duplicated(subset=klucze_grupowania, keep=False)
+    # porównujemy wartości, a nie kategorie (kolumny kategorii o różnych zbiorach kategorii nie dają się porównać)
+    if _typ_napisowy(df[gmina_col].dtype) and df[gmina_col].dtype == df[powiat_col].dtype:
+        # kolumny napisów tego samego typu (np. Arrow) porównujemy bez zamiany na obiekty Pythona
+        rowne = (df[gmina_col] == df[powiat_col]).fillna(False).to_numpy(dtype=bool)
+    else:
+        rowne = np.asarray(df[gmina_col], dtype=object) == np.asarray(df[powiat_col], dtype=object)
+    maska = rowne & df.duplicated(subset=klucze_grupowania, keep=False)
 
     dzielnice = df[maska]
 
@@ -242,7 +478,7 @@ def zlacz_dzielnice(df: pd.DataFrame, sum_col: str, gmina_col: str="Gmina", powi
 
     agg_dict[sum_col] = (sum_col, 'sum')
 
-    zagregowane_miasta = dzielnice.groupby(klucze_grupowania).agg(**agg_dict).reset_index()
+    zagregowane_miasta = dzielnice.groupby(klucze_grupowania, observed=True).agg(**agg_dict).reset_index()
 
     indeksy_do_usuniecia = dzielnice.index #usuwamy wszystkie znalezione wcześniej dzielnice, żeby zaraz dołączyć już zagregowane
     df_bez_dzielnic = df.drop(indeksy_do_usuniecia)
@@ -251,13 +487,14 @@ def zlacz_dzielnice(df: pd.DataFrame, sum_col: str, gmina_col: str="Gmina", powi
     logging.info(f"Zakończono agregację. Usunięto: {len(df)-len(df_finalny)} wierszy.")
     return df_finalny
 
-def zlacz_gminy(df: pd.DataFrame, gmina_docelowa, gmina_do_wlaczenia, kolumna_wartosci: str, kolumna_nazw: str) -> pd.DataFrame:
+@mierz
+def zlacz_gminy(df: pd.DataFrame, gmina_docelowa, gmina_do_wlaczenia, kolumna_wartosci: str, kolumna_nazw: str, bez_kopii: bool | None = None) -> pd.DataFrame:
     """
     Funkckcja łączy dwa wiersze w jeden, sumując wybrany wiersz i pozostawiając resztę taką jak w pierwszym wierszu.
     Często mamy sytuacje, w ktorej jakas gmina odlacza się od starej i jest to uwzględnione w jednym zbiorze danych
     ,ale w reszcie danych jeszcze tego nie uwzgledniono. Ta funkcja pozwala ręcznie dostosować ten zbiór, aby pasował do reszty.
     """
-    df_kopia = df.copy()
+    df_kopia = _kopiuj(df, bez_kopii)
 
     wiersz_gminy_docelowej = df_kopia[df_kopia[kolumna_nazw] == gmina_docelowa]
     wiersz_gminy_do_wlaczenia = df_kopia[df_kopia[kolumna_nazw] == gmina_do_wlaczenia]
@@ -267,6 +504,9 @@ def zlacz_gminy(df: pd.DataFrame, gmina_docelowa, gmina_do_wlaczenia, kolumna_wa
             f"Nie znaleziono jednej z gmin: '{gmina_docelowa}' lub '{gmina_do_wlaczenia}'. ")
         return df
 
+    # w trybie bez_kopii kolumna wartości jest współdzielona z oryginałem, a zaraz zmienimy jedną jej komórkę
+    df_kopia[kolumna_wartosci] = df_kopia[kolumna_wartosci].copy()
+
     wartosc_do_dodania = wiersz_gminy_do_wlaczenia[kolumna_wartosci].iloc[0]
     indeks_gminy_docelowej = wiersz_gminy_docelowej.index[0]
     df_kopia.loc[indeks_gminy_docelowej, kolumna_wartosci] += wartosc_do_dodania
@@ -281,37 +521,118 @@ def zlacz_gminy(df: pd.DataFrame, gmina_docelowa, gmina_do_wlaczenia, kolumna_wa
     return df_kopia
 
 
-def usun_dzielnice_miast(df: pd.DataFrame,teryt_col: str="TERYT") -> pd.DataFrame:
+def _rozwiaz_lancuchy(mapowanie: dict) -> dict | None:
     """
-    W 7 cyfrowych kodach terytorialnych, ostatnia cyfra równająca się 8 lub 9 oznacza dzielnice miast (których dane są również zagregowane w całej gminie)
-    Funkcja pozwala je łatwo usunąć.
-
+    Zamienia łańcuchy zmian (A -> B, B -> C) na bezpośrednie przypisania do gminy końcowej (A -> C, B -> C).
+    Zwraca None, jeśli zmiany tworzą cykl.
     """
-    if teryt_col not in df.columns:
-        logging.warning(f"Kolumna '{teryt_col}' nie istnieje.")
+    mapowanie = {zrodlo: cel for zrodlo, cel in mapowanie.items() if zrodlo != cel}
+    koncowe = {}
+    for zrodlo in mapowanie:
+        sciezka = [zrodlo]
+        cel = mapowanie[zrodlo]
+        while cel in mapowanie and cel not in koncowe:
+            if cel in sciezka:
+                logging.error(f"Zmiany gmin tworzą cykl: {' -> '.join(map(str, sciezka + [cel]))}.")
+                return None
+            sciezka.append(cel)
+            cel = mapowanie[cel]
+        cel = koncowe.get(cel, cel)
+        for gmina in sciezka:
+            koncowe[gmina] = cel
+    return koncowe
+
+
+@mierz
+def zlacz_gminy_wiele(df: pd.DataFrame, mapowanie: dict | pd.DataFrame, kolumny_wartosci: str | list[str], kolumna_nazw: str,
+                      bez_kopii: bool | None = None) -> pd.DataFrame:
+    """
+    Wersja zlacz_gminy dla wielu zmian naraz, np. wszystkich zmian granic gmin z kilku lat.
+    Mapowanie (słownik gmina włączana -> gmina docelowa albo tabela o dwóch kolumnach w tej kolejności) może zawierać
+    łańcuchy zmian, gmina włączona do gminy, która sama została potem włączona do innej, trafia do gminy końcowej.
+    Wszystkie zmiany wykonywane są w jednym przejściu: klucze są przemapowane, wartości wybranych kolumn zsumowane
+    w grupach, a wynik zapisany w pierwszym wierszu gminy docelowej. Pozostałe kolumny zostają jak w gminie docelowej.
+    Zmiany, dla których nie znaleziono gminy włączanej lub docelowej, są pomijane.
+    """
+    if isinstance(mapowanie, pd.DataFrame):
+        mapowanie = dict(zip(mapowanie.iloc[:, 0], mapowanie.iloc[:, 1]))
+    if isinstance(kolumny_wartosci, str):
+        kolumny_wartosci = [kolumny_wartosci]
+
+    brakujace = [kolumna for kolumna in [kolumna_nazw, *kolumny_wartosci] if kolumna not in df.columns]
+    if brakujace:
+        logging.warning(f"Kolumny {brakujace} nie istnieją w DataFrame. Pomijam krok.")
         return df
 
-    if df.empty:
-        logging.info("DataFrame jest pusty.")
+    koncowe = _rozwiaz_lancuchy(mapowanie)
+    if not koncowe:
         return df
 
-    teryt_pierwszego_wiersza = str(df[teryt_col].iloc[0])
+    # porównujemy wartości, a nie kategorie, tak jak w zlacz_dzielnice
+    klucze = pd.Series(np.asarray(df[kolumna_nazw], dtype=object), index=df.index)
+    cele = klucze.map(koncowe)
+    obecne = set(klucze.dropna())
+    docelowe = obecne.intersection(koncowe.values())
+    pominiete = [zrodlo for zrodlo, cel in koncowe.items() if zrodlo not in obecne or cel not in docelowe]
+    if pominiete:
+        logging.warning(f"Nie znaleziono gmin włączanych lub docelowych dla {len(pominiete)} zmian, "
+                        f"pomijam je (np. {pominiete[:5]}).")
+
+    maska_wlaczanych = cele.isin(docelowe)
+    if not maska_wlaczanych.any():
+        return df
+    maska_docelowych = klucze.isin(docelowe) & ~klucze.duplicated()
+    grupy = cele.where(maska_wlaczanych, klucze)
+    wiersze = maska_wlaczanych | maska_docelowych
+    sumy = df.loc[wiersze, kolumny_wartosci].groupby(grupy[wiersze], sort=False).sum()
+
+    df_kopia = _kopiuj(df, bez_kopii)
+    indeksy_docelowych = klucze.index[maska_docelowych]
+    kolejnosc = klucze[maska_docelowych]
+    for kolumna in kolumny_wartosci:
+        # w trybie bez_kopii kolumna jest współdzielona z oryginałem, więc zmieniamy jej kopię
+        nowa = df_kopia[kolumna].copy()
+        nowa.loc[indeksy_docelowych] = sumy[kolumna].reindex(kolejnosc).to_numpy()
+        df_kopia[kolumna] = nowa
+    df_kopia = df_kopia[~maska_wlaczanych.to_numpy()]
+
+    logging.info(f"Połączono {int(maska_wlaczanych.sum())} wierszy gmin włączanych z {len(indeksy_docelowych)} gminami docelowymi, "
+                 f"zsumowano kolumny {kolumny_wartosci}.")
+    return df_kopia
 
-    warunek1 = teryt_pierwszego_wiersza.startswith("0") and len(teryt_pierwszego_wiersza) == 7
-    warunek2 = (not teryt_pierwszego_wiersza.startswith("0")) and len(teryt_pierwszego_wiersza) == 6 #jeżeli kody były zamienione na inta, to znika pierwsza cyfra
 
-    if warunek1 or warunek2:
-        df_przetworzony = usun_z_ostatnia_cyfra(df, column=teryt_col, cyfry=['8', '9'])
-        return df_przetworzony
-    else:
-        logging.info("Nie usuniętgo żadnych wierszy.")
-        return df
+@mierz
+def usun_dzielnice_miast(df: pd.DataFrame,teryt_col: str="TERYT", bez_kopii: bool | None = None,
+                         z_rodzajem: bool | None = True) -> pd.DataFrame:
+    """
+    W 7 cyfrowych kodach terytorialnych, ostatnia cyfra równająca się 8 lub 9 oznacza dzielnice miast (których dane są również zagregowane w całej gminie)
+    Funkcja pozwala je łatwo usunąć.
+    Postać kodu (z cyfrą rodzaju lub bez) rozpoznawana jest osobno dla każdego wiersza, więc kody 6-cyfrowe z zerem wiodącym nie są usuwane.
+    Kody 6-cyfrowe bez zera wiodącego (kody 7-cyfrowe zamienione na liczby) są traktowane jako kody z cyfrą rodzaju;
+    dla kolumny liczb bez cyfry rodzaju należy podać z_rodzajem=False (przekazywany do teryt.koduj_teryt).
+    """
+    return _usun_rodzaje_gmin(df, teryt_col, RODZAJE_DZIELNIC, bez_kopii, z_rodzajem)
 
 
-def usun_rozdzielone_gminy_mw(df: pd.DataFrame, teryt_col: str="TERYT") -> pd.DataFrame:
+@mierz
+def usun_rozdzielone_gminy_mw(df: pd.DataFrame, teryt_col: str="TERYT", bez_kopii: bool | None = None,
+                              z_rodzajem: bool | None = True) -> pd.DataFrame:
     """
-    Wywołuje funkcję usun_z_ostatnia_cyfra, usuwając wszystkie wiersze, które kończą się na 4 lub 5.
+    Usuwa wszystkie wiersze, których kod kończy się cyfrą rodzaju 4 lub 5.
     W kodach (7-cyfrowych) często mamy gminę miejsko-wiejską i oddzielnie miasto i wieś, zazwyczaj chcemy zostawić tylko gminę.
+    Kody 6-cyfrowe bez zera wiodącego są traktowane jako kody z cyfrą rodzaju, tak jak w usun_dzielnice_miast.
+    """
+    return _usun_rodzaje_gmin(df, teryt_col, RODZAJE_CZESCI_GMIN_MW, bez_kopii, z_rodzajem)
+
+
+def _bez_rodzajow_gmin(kolumna: pd.Series, rodzaje: list[int], z_rodzajem: bool | None = True):
+    return kolumna, ~np.isin(teryt.rodzaj(teryt.koduj_teryt(kolumna, z_rodzajem)), rodzaje)
+
+
+def _usun_rodzaje_gmin(df: pd.DataFrame, teryt_col: str, rodzaje: list[int], bez_kopii: bool | None,
+                       z_rodzajem: bool | None) -> pd.DataFrame:
+    """
+    Usuwa wiersze z podanymi cyframi rodzaju gminy, odczytanymi arytmetycznie z kodów zakodowanych przez teryt.koduj_teryt
     """
     if teryt_col not in df.columns:
         logging.warning(f"Kolumna '{teryt_col}' nie istnieje.")
@@ -321,13 +642,131 @@ def usun_rozdzielone_gminy_mw(df: pd.DataFrame, teryt_col: str="TERYT") -> pd.Da
         logging.info("DataFrame jest pusty.")
         return df
 
-    teryt_pierwszego_wiersza = str(df[teryt_col].iloc[0])
+    _, maska = _bez_rodzajow_gmin(df[teryt_col], rodzaje, z_rodzajem)
+    df_cleaned = _kopiuj(df, bez_kopii)[maska]
+    logging.info(f"Usunięto {int((~maska).sum())} wierszy z kolumny '{teryt_col}' o cyfrze rodzaju gminy {rodzaje}.")
+    return df_cleaned
 
-    warunek1=teryt_pierwszego_wiersza.startswith("0") and len(teryt_pierwszego_wiersza)==7
-    warunek2=(not teryt_pierwszego_wiersza.startswith("0")) and len(teryt_pierwszego_wiersza)==6 #jeżeli kody były zamienione na inta, to znika pierwsza cyfra
-    if warunek1 or warunek2:
-        df_przetworzony = usun_z_ostatnia_cyfra(df, column=teryt_col, cyfry=['4', '5'])
-        return df_przetworzony
-    else:
-        logging.info("Nie usuniętgo żadnych wierszy.")
-        return df
\ No newline at end of file
+
+# Wersje kolumnowe funkcji preprocessora używane przez PlanKrokow: dla każdej funkcji jądro działające na samej kolumnie
+# (zwraca nową kolumnę i maskę zostawianych wierszy albo None) oraz nazwa argumentu funkcji wskazującego kolumnę
+_JADRA = {
+    usun_woj: (_bez_prefiksu, "column"),
+    litery_na_male: (_male_litery, "column"),
+    usun_z_ostatnia_cyfra: (_bez_ostatnich_cyfr, "column"),
+    usun_ostatnia_cyfre: (_bez_ostatniego_znaku, "column"),
+    str_to_int: (_jako_liczby, "column"),
+    usun_puste_wiersze: (_bez_pustych, "nazwa_kolumny"),
+    usun_krotkie: (_bez_krotkich, "column"),
+    usun_odstepy: (_bez_odstepow, "column"),
+    usun_dzielnice_miast: (functools.partial(_bez_rodzajow_gmin, rodzaje=RODZAJE_DZIELNIC), "teryt_col"),
+    usun_rozdzielone_gminy_mw: (functools.partial(_bez_rodzajow_gmin, rodzaje=RODZAJE_CZESCI_GMIN_MW), "teryt_col"),
+}
+
+
+class PlanKrokow:
+    """
+    Łańcuch kroków preprocessingu (funkcji tego modułu lub dowolnych funkcji przyjmujących DataFrame), w którym kolejne
+    kroki działające na tej samej kolumnie są wykonywane razem. Kolumna jest raz faktoryzowana, kroki liczone są tylko
+    na jej unikalnych wartościach, a potem wiersze są wybierane jedną maską i kolumna jest składana jeden raz,
+    zamiast kopiowania ramki, rzutowania i przeglądania kolumny w każdym kroku osobno.
+    Pozostałe kroki (np. zlacz_gminy) wykonywane są zwykłym wywołaniem funkcji.
+
+    Wynik i liczby usuniętych wierszy w każdym kroku są takie same jak przy wywoływaniu funkcji po kolei;
+    liczby trafiają do logów i do atrybutu raport.
+
+    Przykład:
+        plan = PlanKrokow([(usun_puste_wiersze, {}), (usun_krotkie, {"wartosc": 7}), (str_to_int, {"column": "TERYT"})])
+        df = plan.wykonaj(df)
+    """
+
+    def __init__(self, kroki: list[tuple[Callable, dict] | Callable]):
+        self.kroki = [(krok, {}) if callable(krok) else (krok[0], dict(krok[1])) for krok in kroki]
+        self.raport: list[dict] = []
+
+    @staticmethod
+    def _kolumna(funkcja: Callable, parametry: dict) -> tuple[str, dict] | None:
+        """
+        Zwraca kolumnę kroku i argumenty jego jądra albo None, jeśli krok nie ma wersji kolumnowej.
+        """
+        if funkcja not in _JADRA:
+            return None
+        jadro, argument_kolumny = _JADRA[funkcja]
+        argumenty = inspect.signature(funkcja).bind(None, **parametry)
+        argumenty.apply_defaults()
+        argumenty = dict(argumenty.arguments)
+        kolumna = argumenty.pop(argument_kolumny)
+        for nazwa in ["df", "bez_kopii"]:
+            argumenty.pop(nazwa, None)
+        return kolumna, argumenty
+
+    def wykonaj(self, df: pd.DataFrame, bez_kopii: bool | None = None) -> pd.DataFrame:
+        """
+        Wykonuje wszystkie kroki na ramce i zwraca wynik; raport zawiera opis każdego kroku.
+        """
+        self.raport = []
+        i = 0
+        while i < len(self.kroki):
+            # grupa: kolejne kroki z wersją kolumnową działające na tej samej, istniejącej kolumnie
+            grupa = []
+            kolumna = None
+            for funkcja, parametry in self.kroki[i:]:
+                opis = self._kolumna(funkcja, parametry)
+                if opis is None or opis[0] not in df.columns or (grupa and opis[0] != kolumna):
+                    break
+                kolumna = opis[0]
+                grupa.append((funkcja, opis[1]))
+
+            if len(grupa) > 1:
+                df = self._wykonaj_grupe(df, kolumna, grupa, bez_kopii)
+                i += len(grupa)
+            else:
+                funkcja, parametry = self.kroki[i]
+                if bez_kopii is not None and "bez_kopii" in inspect.signature(funkcja).parameters:
+                    parametry = {"bez_kopii": bez_kopii, **parametry}
+                wiersze_we = len(df)
+                df = funkcja(df, **parametry)
+                self.raport.append({"krok": funkcja.__name__, "kolumna": None if not grupa else kolumna,
+                                    "wiersze_we": wiersze_we, "usuniete": wiersze_we - len(df), "polaczony": False})
+                i += 1
+        return df
+
+    def _wykonaj_grupe(self, df: pd.DataFrame, kolumna: str, grupa: list, bez_kopii: bool | None) -> pd.DataFrame:
+        nazwy = [funkcja.__name__ for funkcja, _ in grupa]
+        with etap(f"preprocessor.PlanKrokow[{'+'.join(nazwy)}]", len(df)) as pomiar:
+            kody, unikalne = pd.factorize(df[kolumna], use_na_sentinel=False)
+            liczebnosci = np.bincount(kody, minlength=len(unikalne))
+            wartosci = pd.Series(unikalne)
+            zmieniona = False
+            wiersze_we = len(df)
+            for funkcja, parametry in grupa:
+                jadro = _JADRA[funkcja][0]
+                try:
+                    nowe, maska = jadro(wartosci, **parametry)
+                except ValueError as e:
+                    logging.warning(f"Krok '{funkcja.__name__}' na kolumnie '{kolumna}' pominięty: {e}.")
+                    nowe, maska = wartosci, None
+                zmieniona |= nowe is not wartosci  # jądra samych filtrów zwracają kolumnę bez zmian
+                usuniete = 0
+                if maska is not None:
+                    usuniete = int(liczebnosci[wartosci.index[~maska]].sum())
+                    nowe = nowe[maska]
+                wartosci = nowe
+                self.raport.append({"krok": funkcja.__name__, "kolumna": kolumna, "wiersze_we": wiersze_we,
+                                    "usuniete": usuniete, "polaczony": True})
+                wiersze_we -= usuniete
+                logging.info(f"Krok '{funkcja.__name__}' na kolumnie '{kolumna}': usunięto {usuniete} wierszy.")
+
+            zywe = np.zeros(len(unikalne), dtype=bool)
+            zywe[wartosci.index] = True
+            wiersze = zywe[kody]
+            # płytka kopia wyniku filtrowania, żeby podmiana kolumny nie zmieniała ramki wejściowej
+            wynik = _kopiuj(df, bez_kopii) if wiersze.all() else df[wiersze].copy(deep=False)
+            if zmieniona:
+                pozycje = np.full(len(unikalne), -1)
+                pozycje[wartosci.index] = np.arange(len(wartosci))
+                wynik[kolumna] = wartosci.iloc[pozycje[kody[wiersze]]].set_axis(wynik.index)
+            pomiar["wiersze_wy"] = len(wynik)
+        logging.info(f"Połączono kroki {nazwy} na kolumnie '{kolumna}' w jedno przejście "
+                     f"({len(unikalne)} unikalnych wartości), usunięto {len(df) - len(wynik)} wierszy.")
+        return wynik
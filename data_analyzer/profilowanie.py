@@ -0,0 +1,119 @@
+import functools
+import time
+import tracemalloc
+from contextlib import contextmanager
+from typing import Dict, Any, List
+
+import pandas as pd
+
+# Pomiary są zbierane tylko po włączeniu (np. flagą --profil skryptu), w przeciwnym razie dekorator tylko wywołuje funkcję
+WLACZONE = False
+
+_pomiary: List[Dict[str, Any]] = []
+_stos: List[Dict[str, Any]] = []
+
+
+def wlacz(wyczysc_pomiary: bool = True):
+    """
+    Włącza zbieranie pomiarów czasu, liczby wierszy i pamięci (pamięć śledzona przez tracemalloc).
+    """
+    global WLACZONE
+    if wyczysc_pomiary:
+        wyczysc()
+    if not tracemalloc.is_tracing():
+        tracemalloc.start()
+    WLACZONE = True
+
+
+def wylacz():
+    global WLACZONE
+    WLACZONE = False
+    if tracemalloc.is_tracing():
+        tracemalloc.stop()
+
+
+def wyczysc():
+    _pomiary.clear()
+
+
+def _liczba_wierszy(obiekt) -> int | None:
+    if isinstance(obiekt, pd.DataFrame):
+        return len(obiekt)
+    if isinstance(obiekt, (list, tuple)) and obiekt and all(isinstance(el, pd.DataFrame) for el in obiekt):
+        return sum(len(el) for el in obiekt)
+    return None
+
+
+@contextmanager
+def etap(nazwa: str, wiersze_we: int | None = None):
+    """
+    Mierzy czas i szczytowy przyrost pamięci bloku kodu. Zagnieżdżone etapy są zapisywane osobno,
+    a ich szczyt pamięci wlicza się do szczytu etapu nadrzędnego.
+    """
+    if not WLACZONE:
+        yield {}
+        return
+
+    pomiar = {"nazwa": nazwa, "poziom": len(_stos), "wiersze_we": wiersze_we, "wiersze_wy": None}
+    obecna, szczyt = tracemalloc.get_traced_memory()
+    if _stos:
+        _stos[-1]["szczyt"] = max(_stos[-1]["szczyt"], szczyt)
+    tracemalloc.reset_peak()
+    ramka = {"start_pamieci": obecna, "szczyt": obecna}
+    _stos.append(ramka)
+    _pomiary.append(pomiar)
+    start = time.perf_counter()
+    try:
+        yield pomiar
+    finally:
+        pomiar["czas_s"] = time.perf_counter() - start
+        _, szczyt = tracemalloc.get_traced_memory()
+        _stos.pop()
+        szczyt = max(szczyt, ramka["szczyt"])
+        if _stos:
+            _stos[-1]["szczyt"] = max(_stos[-1]["szczyt"], szczyt)
+        pomiar["pamiec_szczyt_mb"] = (szczyt - ramka["start_pamieci"]) / 2 ** 20
+
+
+def mierz(funkcja):
+    """
+    Dekorator zapisujący dla każdego wywołania funkcji czas, liczbę wierszy na wejściu i wyjściu
+    oraz szczytowy przyrost pamięci (gdy profilowanie jest włączone).
+    """
+    nazwa = f"{funkcja.__module__.rsplit('.', 1)[-1]}.{funkcja.__name__}"
+
+    @functools.wraps(funkcja)
+    def opakowanie(*args, **kwargs):
+        if not WLACZONE:
+            return funkcja(*args, **kwargs)
+        wiersze_we = _liczba_wierszy(args[0]) if args else None
+        with etap(nazwa, wiersze_we) as pomiar:
+            wynik = funkcja(*args, **kwargs)
+            pomiar["wiersze_wy"] = _liczba_wierszy(wynik)
+        return wynik
+
+    return opakowanie
+
+
+def raport() -> List[Dict[str, Any]]:
+    """
+    Zwraca zebrane pomiary w kolejności wywołań (gotowe do zapisania w raporcie JSON).
+    """
+    return [dict(pomiar) for pomiar in _pomiary]
+
+
+def tabela() -> str:
+    """
+    Zwraca zebrane pomiary jako czytelną tabelę; nazwy etapów zagnieżdżonych są wcięte.
+    """
+    if not _pomiary:
+        return "Brak pomiarów."
+    df = pd.DataFrame(raport())
+    nazwy = ["  " * poziom + nazwa for poziom, nazwa in zip(df["poziom"], df["nazwa"])]
+    szerokosc = max(len(nazwa) for nazwa in nazwy)
+    df["nazwa"] = [nazwa.ljust(szerokosc) for nazwa in nazwy]
+    df["czas [ms]"] = (df["czas_s"] * 1000).round(2)
+    df["pamięć [MB]"] = df["pamiec_szczyt_mb"].round(2)
+    for kolumna in ["wiersze_we", "wiersze_wy"]:
+        df[kolumna] = df[kolumna].astype("Int64")
+    return df[["nazwa", "wiersze_we", "wiersze_wy", "czas [ms]", "pamięć [MB]"]].to_string(index=False)
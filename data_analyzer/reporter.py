@@ -1,20 +1,33 @@
+import datetime
+import decimal
 import json
 import logging
-from typing import Dict, Any
+import os
+from typing import Dict, Any, Iterable
 
+import numpy as np
+import pandas as pd
+from data_analyzer.profilowanie import mierz
 
-def generuj_raport(wszystkie_dane_do_raportu: Dict[str, Any], output_path: str) -> bool:
+# Liczba wierszy tabeli serializowanych naraz przy zapisie strumieniowym (NDJSON, CSV)
+ROZMIAR_PORCJI = 10_000
+FORMATY_TABEL = {".csv": "csv", ".parquet": "parquet", ".ndjson": "ndjson", ".jsonl": "ndjson"}
+
+
+@mierz
+def generuj_raport(wszystkie_dane_do_raportu: Dict[str, Any], output_path: str, kompaktowy: bool = False) -> bool:
     """
     Zapisuje wyniki analizy w formacie JSON do wskazanego pliku .
 
     Funkcja tworzy jeden główny obiekt JSON, który zawiera wszystkie
-    przekazane wyniki.
+    przekazane wyniki. Dokument jest zapisywany do pliku kawałkami, w miarę serializacji.
 
     Args:
         wszystkie_dane_do_raportu (Dict[str, Any]): Słownik zawierający wyniki analizy
                                            do zapisania w raporcie.
         output_path (str): Ścieżka do pliku wyjściowego, w którym
                            zostanie zapisany raport.
+        kompaktowy (bool): Zapis bez wcięć i zbędnych spacji (mniejszy plik, szybszy zapis).
 
     Returns:
         bool: True, jeśli raport został zapisany pomyślnie, False w przeciwnym razie.
@@ -23,11 +36,120 @@ def generuj_raport(wszystkie_dane_do_raportu: Dict[str, Any], output_path: str)
 
     try:
         with open(output_path, 'w', encoding='utf-8') as f:
-            json.dump(wszystkie_dane_do_raportu, f, ensure_ascii=False, indent=4, default=int)
-            #bez drugiego argumentu problem z polskimi znakami, indent=4 poprawia czytelność, a default=int rozwiązuje problem typów z numpy
+            if kompaktowy:
+                json.dump(wszystkie_dane_do_raportu, f, ensure_ascii=False, separators=(',', ':'), default=na_typ_json)
+            else:
+                json.dump(wszystkie_dane_do_raportu, f, ensure_ascii=False, indent=4, default=na_typ_json)
+            #bez ensure_ascii=False problem z polskimi znakami, indent=4 poprawia czytelność, a na_typ_json zamienia typy numpy i pandas
         logging.info(f"Raport pomyślnie zapisano w: {output_path}")
         return True
 
-    except (IOError, TypeError) as e:
+    except (IOError, TypeError, ValueError) as e:
         logging.error(f"Wystąpił błąd podczas zapisywania raportu do pliku {output_path}: {e}")
-        return False
\ No newline at end of file
+        return False
+
+
+@mierz
+def zapisz_ndjson(rekordy: Iterable[Dict[str, Any]] | pd.DataFrame, output_path: str) -> bool:
+    """
+    Zapisuje rekordy w formacie NDJSON (jeden obiekt JSON w wierszu), rekord po rekordzie, bez budowania
+    całego dokumentu w pamięci. DataFrame jest zapisywany porcjami po ROZMIAR_PORCJI wierszy.
+
+    Args:
+        rekordy (Iterable[Dict[str, Any]] | pd.DataFrame): Słowniki (np. wyniki testów) albo tabela
+        output_path (str): Ścieżka do pliku wyjściowego
+
+    Returns:
+        bool: True, jeśli plik został zapisany pomyślnie, False w przeciwnym razie.
+    """
+    logging.info(f"Rozpoczynam zapis rekordów NDJSON do pliku: {output_path}")
+
+    try:
+        liczba = 0
+        with open(output_path, 'w', encoding='utf-8') as f:
+            if isinstance(rekordy, pd.DataFrame):
+                for poczatek in range(0, len(rekordy), ROZMIAR_PORCJI):
+                    porcja = rekordy.iloc[poczatek:poczatek + ROZMIAR_PORCJI]
+                    # to_json z lines=True kończy każdą porcję znakiem nowej linii
+                    f.write(porcja.to_json(orient='records', lines=True, force_ascii=False, date_format='iso'))
+                    liczba += len(porcja)
+            else:
+                for rekord in rekordy:
+                    f.write(json.dumps(rekord, ensure_ascii=False, separators=(',', ':'), default=na_typ_json))
+                    f.write('\n')
+                    liczba += 1
+        logging.info(f"Zapisano {liczba} rekordów w: {output_path}")
+        return True
+
+    except (IOError, TypeError, ValueError) as e:
+        logging.error(f"Wystąpił błąd podczas zapisywania rekordów do pliku {output_path}: {e}")
+        return False
+
+
+@mierz
+def zapisz_tabele(df: pd.DataFrame, output_path: str, format: str | None = None) -> bool:
+    """
+    Zapisuje tabelę (np. połączone dane wszystkich gmin) w formacie kolumnowym lub tekstowym:
+    Parquet (wymaga pyarrow), CSV albo NDJSON. CSV i NDJSON są zapisywane porcjami wierszy.
+
+    Args:
+        df (pd.DataFrame): Tabela do zapisania
+        output_path (str): Ścieżka do pliku wyjściowego
+        format (str | None): "parquet", "csv" lub "ndjson"; domyślnie ustalany na podstawie rozszerzenia pliku
+
+    Returns:
+        bool: True, jeśli tabela została zapisana pomyślnie, False w przeciwnym razie.
+    """
+    if format is None:
+        format = FORMATY_TABEL.get(os.path.splitext(output_path)[1].lower())
+    if format not in FORMATY_TABEL.values():
+        logging.error(f"Nieobsługiwany format tabeli dla pliku {output_path}, dostępne formaty to CSV, Parquet oraz NDJSON")
+        return False
+    if format == "ndjson":
+        return zapisz_ndjson(df, output_path)
+
+    logging.info(f"Rozpoczynam zapis tabeli ({len(df)} wierszy) do pliku: {output_path}")
+    try:
+        if format == "parquet":
+            df.to_parquet(output_path, index=False)
+        else:
+            df.to_csv(output_path, index=False, encoding='utf-8', chunksize=ROZMIAR_PORCJI)
+        logging.info(f"Tabelę pomyślnie zapisano w: {output_path}")
+        return True
+
+    except ImportError as e:
+        logging.error(f"Zapis do formatu Parquet wymaga pakietu pyarrow (pip install pyarrow): {e}")
+        return False
+
+    except (IOError, TypeError, ValueError) as e:
+        logging.error(f"Wystąpił błąd podczas zapisywania tabeli do pliku {output_path}: {e}")
+        return False
+
+
+def na_typ_json(obiekt: Any) -> Any:
+    """
+    Zamienia obiekty, których nie obsługuje moduł json (skalary i tablice numpy, typy pandas, daty),
+    na ich odpowiedniki w JSON. Liczby całkowite i wartości logiczne numpy zachowują swój typ,
+    a braki danych (pd.NA, NaT) zapisywane są jako null.
+    """
+    if isinstance(obiekt, np.bool_):
+        return bool(obiekt)
+    if isinstance(obiekt, np.integer):
+        return int(obiekt)
+    if isinstance(obiekt, np.floating):
+        return float(obiekt)
+    if isinstance(obiekt, (np.ndarray, pd.Index)):
+        return obiekt.tolist()
+    if isinstance(obiekt, pd.Series):
+        return obiekt.to_dict()
+    if isinstance(obiekt, pd.DataFrame):
+        return obiekt.to_dict(orient='records')
+    if obiekt is pd.NA or obiekt is pd.NaT:
+        return None
+    if isinstance(obiekt, (datetime.date, datetime.datetime, pd.Timestamp)):
+        return obiekt.isoformat()
+    if isinstance(obiekt, decimal.Decimal):
+        return float(obiekt)
+    if isinstance(obiekt, (set, frozenset)):
+        return sorted(obiekt, key=str)
+    raise TypeError(f"Obiekt typu {type(obiekt).__name__} nie jest obsługiwany w raporcie JSON")
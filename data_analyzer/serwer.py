@@ -0,0 +1,233 @@
+import json
+import logging
+import math
+import os
+import socketserver
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, List, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+import pandas as pd
+from data_analyzer import analysis as anal
+from data_analyzer.reporter import na_typ_json
+
+HOST = "127.0.0.1"
+PORT = 8765
+
+
+class BladZapytania(ValueError):
+    """
+    Niepoprawne zapytanie (nieznany zbiór, kolumna lub parametr) - odpowiedź 400 zamiast 500.
+    """
+
+
+class SerwerZapytan:
+    """
+    Usługa trzymająca przygotowane zbiory danych w pamięci i odpowiadająca na zapytania o statystyki, korelacje
+    i agregaty kostki TERYT, bez ponownego wczytywania i preprocessingu plików przy każdym pytaniu.
+
+    Dane dostarcza funkcja zaladuj, zwracająca słownik {"zbiory": {nazwa: DataFrame}, "kostka": KostkaTeryt | None,
+    "opis": str}; wywoływana jest przy starcie i przy każdym przeładowaniu. Przeładowanie podmienia dane w całości
+    dopiero po udanym wczytaniu, więc zapytania obsługiwane w tym czasie korzystają z poprzedniej wersji,
+    a błąd wczytywania nie usuwa danych już załadowanych.
+
+    Zapytania (GET, odpowiedzi w JSON):
+        /zbiory                                       nazwy zbiorów z liczbą wierszy i kolumnami
+        /statystyki?zbior=gminy&kolumny=a,b           anal.oblicz_statystyki (domyślnie kolumny numeryczne)
+        /korelacja?zbior=gminy&pary=a:b,c:d&metoda=.. anal.testuj_korelacje_wiele (także liczba_prob, seed,
+                                                      poziom_istotnosci, kontrolowane)
+        /kostka?poziom=powiat&prefiks=02              KostkaTeryt.wybierz
+    Przeładowanie: POST /przeladuj.
+    """
+
+    def __init__(self, zaladuj: Callable[[], Dict[str, Any]]):
+        self._zaladuj = zaladuj
+        self._blokada_przeladowania = threading.Lock()
+        self.dane: Dict[str, Any] | None = None
+        self.przeladuj()
+
+    def przeladuj(self) -> Dict[str, Any]:
+        """
+        Wczytuje dane ponownie funkcją zaladuj (równoczesne żądania przeładowania są wykonywane po kolei).
+        """
+        with self._blokada_przeladowania:
+            start = time.perf_counter()
+            dane = self._zaladuj()
+            if dane is None:
+                raise RuntimeError("Nie udało się wczytać danych, pozostawiono poprzednią wersję.")
+            dane.setdefault("kostka", None)
+            dane["wczytano"] = time.strftime("%Y-%m-%d %H:%M:%S")
+            dane["czas_wczytania_s"] = time.perf_counter() - start
+            self.dane = dane
+        logging.info(f"Wczytano dane usługi w {dane['czas_wczytania_s']:.2f} s. {dane.get('opis', '')}")
+        return {"wczytano": dane["wczytano"], "czas_wczytania_s": dane["czas_wczytania_s"], "opis": dane.get("opis")}
+
+    def zapytanie(self, sciezka: str, parametry: Dict[str, str]) -> Any:
+        """
+        Odpowiada na zapytanie GET.
+
+        Args:
+            sciezka (str): Ścieżka zapytania, np. "/statystyki"
+            parametry (Dict[str, str]): Parametry zapytania
+
+        Returns:
+            Any: Wynik do zapisania w JSON
+
+        Raises:
+            BladZapytania: Nieznana ścieżka lub niepoprawne parametry
+        """
+        dane = self.dane  # jedna wersja danych na całe zapytanie, nawet gdy w tym czasie trwa przeładowanie
+        if sciezka == "/zbiory":
+            return {
+                "wczytano": dane["wczytano"],
+                "zbiory": {nazwa: {"wiersze": len(df), "kolumny": list(df.columns)} for nazwa, df in dane["zbiory"].items()},
+                "kostka": dane["kostka"] is not None,
+            }
+        if sciezka == "/statystyki":
+            df = self._zbior(dane, parametry)
+            return anal.oblicz_statystyki(df, self._kolumny(df, parametry.get("kolumny")))
+        if sciezka == "/korelacja":
+            df = self._zbior(dane, parametry)
+            pary = None
+            if parametry.get("pary"):
+                pary = [tuple(para.split(":", 1)) for para in parametry["pary"].split(",")]
+                if any(len(para) != 2 for para in pary):
+                    raise BladZapytania("Pary kolumn podaje się jako kolumna1:kolumna2, oddzielone przecinkami")
+                self._kolumny(df, ",".join(kolumna for para in pary for kolumna in para))
+            kontrolowane = self._kolumny(df, parametry["kontrolowane"]) if parametry.get("kontrolowane") else None
+            metoda = parametry.get("metoda", "pearson")
+            if metoda not in anal.METODY_KORELACJI:
+                raise BladZapytania(f"Nieznana metoda '{metoda}', dostępne to {list(anal.METODY_KORELACJI)}")
+            return anal.testuj_korelacje_wiele(
+                df, pary, poziom_istotnosci=self._liczba(parametry, "poziom_istotnosci", float, 0.05),
+                liczba_prob=self._liczba(parametry, "liczba_prob", int, 0), seed=self._liczba(parametry, "seed", int, None),
+                metoda=metoda, kontrolowane=kontrolowane)
+        if sciezka == "/kostka":
+            if dane["kostka"] is None:
+                raise BladZapytania("Usługa nie ma kostki TERYT")
+            try:
+                tabela = dane["kostka"].wybierz(parametry.get("prefiks", ""), parametry.get("poziom"))
+            except ValueError as e:
+                raise BladZapytania(str(e))
+            tabela = tabela.reset_index()
+            return tabela.astype(object).where(tabela.notna(), None).to_dict(orient="records")
+        raise BladZapytania(f"Nieznane zapytanie '{sciezka}'")
+
+    @staticmethod
+    def _zbior(dane: Dict[str, Any], parametry: Dict[str, str]) -> pd.DataFrame:
+        nazwa = parametry.get("zbior", "gminy")
+        if nazwa not in dane["zbiory"]:
+            raise BladZapytania(f"Nieznany zbiór '{nazwa}', dostępne to {list(dane['zbiory'])}")
+        return dane["zbiory"][nazwa]
+
+    @staticmethod
+    def _kolumny(df: pd.DataFrame, kolumny: str | None) -> List[str]:
+        if not kolumny:
+            return list(df.select_dtypes("number").columns)
+        kolumny = kolumny.split(",")
+        brakujace = [kolumna for kolumna in kolumny if kolumna not in df.columns]
+        if brakujace:
+            raise BladZapytania(f"Brak kolumn {brakujace} w zbiorze, dostępne to {list(df.columns)}")
+        return kolumny
+
+    @staticmethod
+    def _liczba(parametry: Dict[str, str], nazwa: str, typ: type, domyslna):
+        if nazwa not in parametry:
+            return domyslna
+        try:
+            return typ(parametry[nazwa])
+        except ValueError:
+            raise BladZapytania(f"Parametr '{nazwa}' musi być liczbą")
+
+    def obsluz(self, metoda: str, adres: str) -> Tuple[int, Any]:
+        """
+        Obsługuje żądanie HTTP i zwraca kod odpowiedzi z treścią (wspólne dla serwera TCP i gniazda Unix).
+        Braki danych (NaN, pd.NA) w treści są zamieniane na None, bo NaN nie jest poprawną wartością JSON.
+        """
+        czesci = urlsplit(adres)
+        parametry = {nazwa: wartosci[-1] for nazwa, wartosci in parse_qs(czesci.query).items()}
+        try:
+            if metoda == "POST" and czesci.path == "/przeladuj":
+                return 200, self.przeladuj()
+            if metoda != "GET":
+                return 405, {"blad": f"Metoda {metoda} nie jest obsługiwana dla '{czesci.path}'"}
+            return 200, _bez_nan(self.zapytanie(czesci.path, parametry))
+        except BladZapytania as e:
+            return 400, {"blad": str(e)}
+        except Exception as e:
+            logging.error(f"Błąd podczas obsługi zapytania {metoda} {adres}: {e}")
+            return 500, {"blad": str(e)}
+
+    def uruchom(self, host: str = HOST, port: int = PORT, gniazdo: str | None = None):
+        """
+        Uruchamia serwer HTTP na adresie lokalnym albo na gnieździe Unix (gniazdo) i obsługuje zapytania
+        do przerwania (Ctrl+C). Każde zapytanie jest obsługiwane w osobnym wątku.
+
+        Args:
+            host (str): Adres serwera TCP (domyślnie tylko lokalny)
+            port (int): Port serwera TCP
+            gniazdo (str | None): Ścieżka gniazda Unix; gdy podana, serwer nie nasłuchuje na porcie TCP
+        """
+        serwer = self.serwer_http(host, port, gniazdo)
+        logging.info(f"Usługa zapytań nasłuchuje na {gniazdo or f'http://{host}:{serwer.server_address[1]}'}.")
+        try:
+            serwer.serve_forever()
+        except KeyboardInterrupt:
+            logging.info("Zatrzymano usługę zapytań.")
+        finally:
+            serwer.server_close()
+            if gniazdo and os.path.exists(gniazdo):
+                os.remove(gniazdo)
+
+    def serwer_http(self, host: str = HOST, port: int = PORT, gniazdo: str | None = None) -> socketserver.BaseServer:
+        """
+        Tworzy (bez uruchamiania) serwer HTTP obsługujący zapytania tej usługi; port 0 wybiera wolny port.
+        """
+        usluga = self
+
+        class Obsluga(BaseHTTPRequestHandler):
+            def _odpowiedz(self, metoda: str):
+                kod, tresc = usluga.obsluz(metoda, self.path)
+                dane = json.dumps(tresc, ensure_ascii=False, default=na_typ_json, allow_nan=False).encode("utf-8")
+                self.send_response(kod)
+                self.send_header("Content-Type", "application/json; charset=utf-8")
+                self.send_header("Content-Length", str(len(dane)))
+                self.end_headers()
+                self.wfile.write(dane)
+
+            def do_GET(self):
+                self._odpowiedz("GET")
+
+            def do_POST(self):
+                self._odpowiedz("POST")
+
+            def address_string(self):
+                # na gnieździe Unix klient nie ma adresu IP
+                return self.client_address[0] if self.client_address else gniazdo
+
+            def log_message(self, format, *args):
+                logging.info(f"Zapytanie {self.address_string()}: {format % args}")
+
+        if gniazdo:
+            if os.path.exists(gniazdo):
+                os.remove(gniazdo)
+            return socketserver.ThreadingUnixStreamServer(gniazdo, Obsluga)
+        return ThreadingHTTPServer((host, port), Obsluga)
+
+
+def _bez_nan(obiekt: Any) -> Any:
+    """
+    Zamienia rekurencyjnie braki danych (NaN i nieskończoności float, pd.NA, NaT) na None, a obiekty spoza JSON
+    na ich odpowiedniki (reporter.na_typ_json), żeby odpowiedź była poprawnym JSON także dla ścisłych klientów.
+    """
+    if isinstance(obiekt, dict):
+        return {klucz: _bez_nan(wartosc) for klucz, wartosc in obiekt.items()}
+    if isinstance(obiekt, (list, tuple)):
+        return [_bez_nan(wartosc) for wartosc in obiekt]
+    if isinstance(obiekt, float):
+        return obiekt if math.isfinite(obiekt) else None
+    if obiekt is None or isinstance(obiekt, (str, int)):
+        return obiekt
+    return _bez_nan(na_typ_json(obiekt))
@@ -0,0 +1,152 @@
+import numpy as np
+import pandas as pd
+
+# Kody TERYT przechowujemy jako liczby całkowite w postaci WWPPGGR (województwo, powiat, gmina, rodzaj gminy).
+# Kody 6-cyfrowe (bez cyfry rodzaju) mają R=0, a kody powiatów i województw mają zera na dalszych pozycjach,
+# więc porządek liczb jest porządkiem hierarchicznym i wszystkie jednostki o wspólnym prefiksie leżą obok siebie.
+BRAK = -1  # wartość dla pustych lub niepoprawnych kodów
+
+
+def koduj_teryt(wartosci, z_rodzajem: bool | None = None) -> np.ndarray:
+    """
+    Zamienia kolumnę kodów TERYT (napisy, także ze spacjami, lub liczby bez zera wiodącego) na tablicę int64
+    w postaci WWPPGGR, bez operacji na napisach w pętli Pythona.
+
+    Postać kodu ustalana jest dla każdego wiersza osobno na podstawie liczby cyfr: 7 cyfr to kod z cyfrą rodzaju,
+    6 cyfr zaczynających się od zera to kod bez rodzaju, a 5 cyfr to kod bez rodzaju, który stracił zero wiodące.
+    Niejednoznaczne są tylko kody 6-cyfrowe bez zera na początku (np. 201011 to gmina 20 10 11 albo kod 0201011
+    zamieniony na liczbę) - rozstrzyga je argument z_rodzajem, a gdy nie jest podany, traktujemy je jako kody
+    z cyfrą rodzaju tylko wtedy, gdy w kolumnie są również kody 7-cyfrowe. Zgadywanie zawodzi dla liczb z cyfrą rodzaju
+    pochodzących tylko z województw 02-08 (wszystkie mają 6 cyfr), dlatego wywołujący, który zna postać kolumny,
+    powinien podać z_rodzajem.
+
+    Args:
+        wartosci: Kolumna (Series, tablica lub lista) z kodami
+        z_rodzajem (bool | None): Czy niejednoznaczne kody 6-cyfrowe zawierają cyfrę rodzaju gminy
+
+    Returns:
+        np.ndarray: Tablica int64 z kodami, BRAK dla pustych lub niepoprawnych wartości
+    """
+    seria = pd.Series(wartosci)
+    if pd.api.types.is_numeric_dtype(seria.dtype) and not pd.api.types.is_bool_dtype(seria.dtype):
+        # liczby (także float, gdy w kolumnie były braki) - bez zamiany na napisy
+        wartosci_float = seria.to_numpy(dtype=float, na_value=np.nan)
+        poprawne = (wartosci_float > 0) & (wartosci_float == np.floor(wartosci_float))
+        liczby = np.where(poprawne, wartosci_float, 0).astype(np.int64)
+        liczba_cyfr = np.where(poprawne, np.floor(np.log10(np.where(poprawne, liczby, 1))).astype(np.int64) + 1, 0)
+        zero_wiodace = np.zeros(len(liczby), dtype=bool)
+    else:
+        # kodów jest dużo mniej niż wierszy, więc parsujemy tylko unikalne wartości i rozkładamy wynik po wierszach
+        pozycje, unikalne = pd.factorize(seria, use_na_sentinel=True)
+        unikalne = pd.Series(list(unikalne) + [None], dtype=object)  # ostatnia pozycja to brak wartości
+        pozycje = np.where(pozycje < 0, len(unikalne) - 1, pozycje)
+        liczby, liczba_cyfr, zero_wiodace, poprawne = (tablica[pozycje] for tablica in _cyfry_z_napisow(unikalne))
+
+    poprawne &= (liczba_cyfr >= 1) & (liczba_cyfr <= 7)
+    dlugosc = np.where(liczba_cyfr % 2 == 1, liczba_cyfr + 1, liczba_cyfr)  # nieparzysta liczba cyfr: zgubione zero
+    dlugosc = np.where(liczba_cyfr == 7, 7, dlugosc)
+    niejednoznaczne = (liczba_cyfr == 6) & ~zero_wiodace
+    if z_rodzajem is None:
+        z_rodzajem = bool(np.any(poprawne & (liczba_cyfr == 7)))
+    if z_rodzajem:
+        dlugosc = np.where(niejednoznaczne, 7, dlugosc)
+
+    kody = liczby * 10 ** np.clip(7 - dlugosc, 0, 7)
+    return np.where(poprawne, kody, BRAK).astype(np.int64)
+
+
+def _cyfry_z_napisow(seria: pd.Series):
+    """
+    Odczytuje cyfry z napisów operacjami na tablicy znaków (każdy napis to wiersz kodów Unicode).
+    """
+    brak = seria.isna().to_numpy()
+    znaki = np.asarray(seria.where(~brak, "").astype(str), dtype=str)
+    if len(znaki) == 0 or znaki.dtype.itemsize == 0:
+        zera = np.zeros(len(znaki), dtype=np.int64)
+        return zera, zera, zera.astype(bool), zera.astype(bool)
+    macierz = znaki.view(np.uint32).reshape(len(znaki), -1)
+
+    cyfra = (macierz >= ord("0")) & (macierz <= ord("9"))
+    dozwolone = cyfra | (macierz == ord(" ")) | (macierz == 0)  # 0 to dopełnienie krótszych napisów
+    liczba_cyfr = cyfra.sum(axis=1)
+    # liczba cyfr na prawo od każdej pozycji wyznacza jej wagę (potęgę dziesięciu)
+    cyfr_dalej = liczba_cyfr[:, None] - np.cumsum(cyfra, axis=1)
+    wartosc_cyfry = np.where(cyfra, macierz.astype(np.int64) - ord("0"), 0)
+    liczby = (wartosc_cyfry * 10 ** np.where(cyfra, cyfr_dalej, 0)).sum(axis=1)
+    pierwsza_cyfra = np.argmax(cyfra, axis=1)
+    zero_wiodace = macierz[np.arange(len(znaki)), pierwsza_cyfra] == ord("0")
+    poprawne = ~brak & dozwolone.all(axis=1) & (liczba_cyfr > 0)
+    return liczby, liczba_cyfr, zero_wiodace, poprawne
+
+
+def wojewodztwo(kody: np.ndarray) -> np.ndarray:
+    """
+    Zwraca kod województwa (np. 2 dla 02), BRAK dla niepoprawnych kodów.
+    """
+    return np.where(kody >= 0, kody // 100_000, BRAK)
+
+
+def powiat(kody: np.ndarray) -> np.ndarray:
+    """
+    Zwraca numer powiatu w województwie (0 dla kodów województw), BRAK dla niepoprawnych kodów.
+    """
+    return np.where(kody >= 0, kody // 1000 % 100, BRAK)
+
+
+def gmina(kody: np.ndarray) -> np.ndarray:
+    """
+    Zwraca numer gminy w powiecie (0 dla kodów powiatów i województw), BRAK dla niepoprawnych kodów.
+    """
+    return np.where(kody >= 0, kody // 10 % 100, BRAK)
+
+
+def rodzaj(kody: np.ndarray) -> np.ndarray:
+    """
+    Zwraca cyfrę rodzaju gminy (1 - miejska, 2 - wiejska, 3 - miejsko-wiejska, 4 - miasto w gminie miejsko-wiejskiej,
+    5 - obszar wiejski, 8, 9 - dzielnice i delegatury), 0 dla kodów bez cyfry rodzaju, BRAK dla niepoprawnych kodów.
+    """
+    return np.where(kody >= 0, kody % 10, BRAK)
+
+
+def bez_rodzaju(kody: np.ndarray) -> np.ndarray:
+    """
+    Zwraca 6-cyfrowy kod gminy WWPPGG jako liczbę (tak jak po usun_ostatnia_cyfre i str_to_int), BRAK dla niepoprawnych kodów.
+    """
+    return np.where(kody >= 0, kody // 10, BRAK)
+
+
+def dekoduj_teryt(kody: np.ndarray) -> pd.DataFrame:
+    """
+    Rozkłada kody na kolumny: województwo, powiat, gmina i rodzaj.
+    """
+    return pd.DataFrame({
+        "województwo": wojewodztwo(kody),
+        "powiat": powiat(kody),
+        "gmina": gmina(kody),
+        "rodzaj": rodzaj(kody),
+    })
+
+
+class IndeksTeryt:
+    """
+    Posortowany indeks kodów TERYT pozwalający wyszukiwać wszystkie jednostki w województwie, powiecie
+    lub gminie przez wyszukiwanie binarne (bez przeglądania całej kolumny).
+    """
+
+    def __init__(self, kody: np.ndarray):
+        self.kolejnosc = np.argsort(kody, kind="stable")
+        self.posortowane = np.asarray(kody)[self.kolejnosc]
+
+    def znajdz(self, kod_woj: int, kod_powiatu: int | None = None, kod_gminy: int | None = None) -> np.ndarray:
+        """
+        Zwraca pozycje wierszy (w kolejności oryginalnej kolumny) leżących w danej jednostce,
+        np. znajdz(2, 1) zwraca wszystkie wiersze z powiatu 02 01.
+        """
+        if kod_powiatu is None:
+            poczatek, szerokosc = kod_woj * 100_000, 100_000
+        elif kod_gminy is None:
+            poczatek, szerokosc = kod_woj * 100_000 + kod_powiatu * 1000, 1000
+        else:
+            poczatek, szerokosc = kod_woj * 100_000 + kod_powiatu * 1000 + kod_gminy * 10, 10
+        lewy, prawy = np.searchsorted(self.posortowane, [poczatek, poczatek + szerokosc])
+        return np.sort(self.kolejnosc[lewy:prawy])
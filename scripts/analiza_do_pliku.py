@@ -1,207 +1,535 @@
 import argparse
+import functools
 import logging
+import os
+import numpy as np
 import pandas as pd
 from data_analyzer import data_loader as dl
 from data_analyzer import preprocessor as ppr
 from data_analyzer import analysis as anal
 from data_analyzer import reporter as rep
+from data_analyzer import profilowanie as prof
+from data_analyzer import panel
+from data_analyzer import teryt
+from data_analyzer.etapy import CacheEtapow
+from data_analyzer.kostka import KostkaTeryt
+from data_analyzer.nazwy import IndeksNazw
+from data_analyzer.serwer import SerwerZapytan, PORT
+
+# Zmiany granic gmin (gmina włączana -> gmina docelowa), które trzeba nanieść, żeby zbiory z różnych lat do siebie pasowały
+ZMIANY_GMIN_POWIERZCHNIE = {"Szczawa": "Kamienica", "Grabówka": "Supraśl"}
+ZMIANY_GMIN_POZARY = {200216: 200209, 120713: 120705}
+
+# Wybór kolumn i wierszy plików przekazywany do load_data, parser pomija pozostałe komórki.
+# Kolumny populacji wczytujemy jako object, żeby kody TERYT z zerem wiodącym zostały napisami (jak przy wczytaniu
+# całego arkusza, gdzie kolumny są mieszane przez wiersze opisu tabeli)
+WYBOR_DANYCH = {
+    "pozary": {"kolumny": [0, 1, 2, 3, 4]},
+    "populacja": {"kolumny": [0, 1, 2], "pomin_wiersze": 8, "dtype": object},
+    "powierzchnie": {"kolumny": [0, 1, 2]},
+}
+
+ETAPY = ["koncesje", "populacja", "powierzchnie", "pozary", "laczenie", "statystyki", "testy"]
+
+
+def przygotuj_koncesje(path_alkohol: str):
+    """
+    Etap "koncesje": liczba koncesji w miejscowościach i województwach
+    """
+    logging.info("Rozpoczynam preprocessing datasetu z koncesjami")
+    # z rejestru koncesji potrzebujemy tylko liczności, więc nie wczytujemy go w całości
+    # miejscowości liczymy razem z województwem, które rozstrzyga nazwy powtarzające się w kraju
+    alkohol = dl.zlicz_wartosci(path_alkohol, [("Miejscowość", "Województwo"), "Województwo"])
+    if alkohol is None:
+        return None
+    alkohol_miejscowosc = alkohol[("Miejscowość", "Województwo")].reset_index()
+    alkohol_miejscowosc.columns = ["Miejscowość", "Województwo", "Liczba koncesji"]
+    alkohol_wojewodztwo = alkohol["Województwo"].reset_index()
+    alkohol_wojewodztwo.columns = ["Województwo", "Liczba koncesji"]
+    alkohol_wojewodztwo = ppr.usun_woj(alkohol_wojewodztwo)
+    alkohol_wojewodztwo = ppr.litery_na_male(alkohol_wojewodztwo)
+    return alkohol_miejscowosc, alkohol_wojewodztwo
+
+
+def przygotuj_populacje(populacja: pd.DataFrame) -> pd.DataFrame:
+    """
+    Etap "populacja": ludność gmin z kodami TERYT bez cyfry rodzaju
+    """
+    logging.info("Rozpoczynam preprocessing datasetu z populacjami")
+    populacja = populacja.set_axis(["Gmina", "TERYT", "Ludność"], axis=1)
+    # kroki na kolumnie TERYT są wykonywane razem, w jednym przejściu po kolumnie
+    populacja = ppr.PlanKrokow([
+        (ppr.usun_puste_wiersze, {}),
+        (ppr.usun_rozdzielone_gminy_mw, {}),
+        (ppr.usun_ostatnia_cyfre, {"column": "TERYT"}),
+        (ppr.str_to_int, {"column": "TERYT"}),
+    ]).wykonaj(populacja)
+    populacja["Ludność"] = populacja["Ludność"].astype(int)
+    return populacja
+
+
+def przygotuj_powierzchnie(powierzchnie: pd.DataFrame) -> pd.DataFrame:
+    """
+    Etap "powierzchnie": powierzchnie gmin z kodami TERYT bez cyfry rodzaju
+    """
+    logging.info("Rozpoczynam preprocessing datasetu z powierzchniami")
+    powierzchnie = ppr.PlanKrokow([
+        (ppr.usun_puste_wiersze, {}),
+        (ppr.usun_odstepy, {}),
+        (ppr.usun_krotkie, {}),
+        (ppr.usun_rozdzielone_gminy_mw, {}),
+        (ppr.usun_dzielnice_miast, {}),
+        (ppr.usun_ostatnia_cyfre, {"column": "TERYT"}),
+        (ppr.str_to_int, {"column": "TERYT"}),
+        # łączenie gmin po nazwach nie zależy od postaci kodów, więc jest na końcu, po krokach na kolumnie TERYT
+        (ppr.zlacz_gminy_wiele, {"mapowanie": ZMIANY_GMIN_POWIERZCHNIE, "kolumny_wartosci": "Powierzchnia [ha]",
+                                 "kolumna_nazw": "Nazwa jednostki"}),
+    ]).wykonaj(powierzchnie)
+    return powierzchnie
+
+
+def przygotuj_pozary(pozary: pd.DataFrame) -> pd.DataFrame:
+    """
+    Etap "pozary": liczba pożarów w gminach, z dzielnicami dużych miast połączonymi w jedną gminę
+    """
+    logging.info("Rozpoczynam preprocessing datasetu z pożarami")
+    pozary = ppr.zmien_nazwe(pozary, "RAZEM Pożar (P)", "Liczba Pożarów")
+    pozary = ppr.usun_puste_wiersze(pozary)
+    pozary = ppr.zlacz_dzielnice(pozary, "Liczba Pożarów")
+    pozary = pozary.drop(348)
+    pozary = pozary.drop(610)
+    pozary = pozary.drop(1526)
+    pozary = ppr.zlacz_gminy_wiele(pozary, ZMIANY_GMIN_POZARY, "Liczba Pożarów", "TERYT")
+    return pozary
+
+
+def przygotuj_koncesje_panel(path_alkohol: str):
+    """
+    Etap "koncesje" w trybie panelu: obie tabele koncesji jako osobne źródła zbioru Parquet
+    """
+    alkohol = przygotuj_koncesje(path_alkohol)
+    if alkohol is None:
+        return None
+    return {"koncesje_miejscowosc": alkohol[0], "koncesje_wojewodztwo": alkohol[1]}
+
+
+def opcje_wczytywania(args) -> dict:
+    """
+    Argumenty load_data wynikające z flag skryptu
+    """
+    opcje = {"cache": not args.bez_cache, "optymalizuj": args.optymalizuj_typy}
+    if args.arrow:
+        opcje["dtype_backend"] = "pyarrow"
+    return opcje
+
+
+def zbuduj_panel(args):
+    """
+    Tryb panelu: przetwarza pliki roczne wszystkich źródeł z katalogu args.panel (podkatalogi pozary, populacja,
+    powierzchnie, koncesje) i zapisuje je jako zbiór Parquet podzielony na źródła i lata.
+    """
+    opcje = opcje_wczytywania(args)
+    przygotowanie = {
+        "pozary": functools.partial(panel.przygotuj_plik, funkcja=przygotuj_pozary, **opcje, **WYBOR_DANYCH["pozary"]),
+        "populacja": functools.partial(panel.przygotuj_plik, funkcja=przygotuj_populacje, **opcje, **WYBOR_DANYCH["populacja"]),
+        "powierzchnie": functools.partial(panel.przygotuj_plik, funkcja=przygotuj_powierzchnie, **opcje, **WYBOR_DANYCH["powierzchnie"]),
+        "koncesje": przygotuj_koncesje_panel,
+    }
+    pliki = panel.znajdz_pliki_roczne(args.panel, list(przygotowanie))
+    wyjscie = args.panel_wyjscie or os.path.join(args.panel, "panel.parquet")
+    podsumowanie = panel.zbuduj_panel(pliki, przygotowanie, wyjscie, nadpisz=args.panel_nadpisz)
+    print(podsumowanie.to_string(index=False))
+
+
+def polacz_zbiory(pozary, powierzchnie, populacja, alkohol_miejscowosc, alkohol_wojewodztwo):
+    """
+    Etap "laczenie": dane wszystkich gmin oraz dane zagregowane do województw i do miejscowości z koncesjami,
+    a także kostka TERYT z agregatami gmin, powiatów i województw
+    """
+    logging.info("Rozpoczynam łączenie zbiorów.")
+    wszystkie_dane = pd.merge(pozary, powierzchnie[['TERYT', 'Powierzchnia [ha]']], on='TERYT', how='left')
+    wszystkie_dane = pd.merge(wszystkie_dane, populacja[['TERYT', 'Ludność']], on='TERYT', how='left')
+    kostka = KostkaTeryt(wszystkie_dane, ['Liczba Pożarów', 'Powierzchnia [ha]', 'Ludność'], kolumny_opisowe=['Województwo'])
+    # miejscowości z koncesjami przypisujemy do gmin po nazwie (bez wielkości liter i znaków diakrytycznych)
+    # i województwie, więc gminy o tej samej nazwie w różnych województwach nie są ze sobą sumowane;
+    # gminy o tej samej nazwie w jednym województwie (np. miejska i wiejska) sumujemy w jedną miejscowość
+    indeks_nazw = IndeksNazw(wszystkie_dane, "Gmina", "TERYT", "Województwo")
+    kody_koncesji = indeks_nazw.znajdz(alkohol_miejscowosc["Miejscowość"], alkohol_miejscowosc["Województwo"],
+                                       grupuj_niejednoznaczne=True)
+    bez_gminy = kody_koncesji == teryt.BRAK
+    if bez_gminy.any():
+        logging.warning(f"Nie przypisano do gmin {int(alkohol_miejscowosc['Liczba koncesji'][bez_gminy].sum())} koncesji "
+                        f"z {int(bez_gminy.sum())} miejscowości (nieznane lub niejednoznaczne nazwy).")
+    koncesje_gmin = alkohol_miejscowosc["Liczba koncesji"].groupby(kody_koncesji).sum().drop(teryt.BRAK, errors="ignore")
+    grupy_gmin = indeks_nazw.grupa(teryt.koduj_teryt(wszystkie_dane["TERYT"]))
+
+    wszystkie_dane = wszystkie_dane.drop(['TERYT', 'Powiat'], axis=1)
+    wszystkie_dane_wojewodztwo = kostka.poziom('województwo').sort_values('Województwo').reset_index(drop=True)
+    wszystkie_dane_wojewodztwo = pd.merge(wszystkie_dane_wojewodztwo, alkohol_wojewodztwo, on="Województwo")
+    z_koncesja = np.isin(grupy_gmin, koncesje_gmin.index)
+    grupy = wszystkie_dane[z_koncesja].groupby(grupy_gmin[z_koncesja], sort=False)
+    wszystkie_dane_miejscowosc = grupy[['Liczba Pożarów', 'Powierzchnia [ha]', 'Ludność']].sum(min_count=1)
+    wszystkie_dane_miejscowosc.insert(0, 'Gmina', grupy['Gmina'].first())
+    wszystkie_dane_miejscowosc["Liczba koncesji"] = koncesje_gmin.reindex(wszystkie_dane_miejscowosc.index).astype("int64")
+    wszystkie_dane_miejscowosc = wszystkie_dane_miejscowosc.rename(columns={"Gmina": "Miejscowość"}).reset_index(drop=True)
+    return wszystkie_dane, wszystkie_dane_wojewodztwo, wszystkie_dane_miejscowosc, kostka
+
+
+def policz_statystyki(wszystkie_dane, wszystkie_dane_wojewodztwo, wszystkie_dane_miejscowosc):
+    """
+    Etap "statystyki": podstawowe statystyki kolumn na każdym poziomie danych
+    """
+    logging.info("Rozpoczynam analizę zbiorów.")
+
+    stat_wszystkie_gminy = anal.oblicz_statystyki(wszystkie_dane, ["Liczba Pożarów", "Powierzchnia [ha]", "Ludność"])
+
+    stat_miejsc_z_koncesja = anal.oblicz_statystyki(wszystkie_dane_miejscowosc,
+                                   ["Liczba Pożarów", "Powierzchnia [ha]", "Ludność", "Liczba koncesji"])
+
+    stat_woj = anal.oblicz_statystyki(wszystkie_dane_wojewodztwo,
+                                    ["Liczba Pożarów", "Powierzchnia [ha]", "Ludność", "Liczba koncesji"])
+
+    statystyki={
+        "statystyki wszystkich gmin": stat_wszystkie_gminy,
+        "statystyki miejscowości, w których istnieje firma z koncesją": stat_miejsc_z_koncesja,
+        "statystyki województw": stat_woj,
+    }
+    return statystyki
+
+
+def testuj_hipotezy(wszystkie_dane, wszystkie_dane_wojewodztwo, wszystkie_dane_miejscowosc,
+                    liczba_prob: int = 0, seed: int | None = None, metoda: str = "pearson"):
+    """
+    Etap "testy": testy korelacji na każdym poziomie danych, opcjonalnie z testami permutacyjnymi i bootstrapem
+    """
+    opcje = {"liczba_prob": liczba_prob, "seed": seed, "metoda": metoda}
+    logging.info("Rozpoczynam analizę testowanie hipotez.")
+    logging.info("Hipotezy o danych na poziomie wszystkich gmin w Polsce:")
+    test_gmin_lud_poz, test_gmin_pow_poz = anal.testuj_korelacje_wiele(wszystkie_dane, [
+        ("Ludność", "Liczba Pożarów"),
+        ("Powierzchnia [ha]", "Liczba Pożarów"),
+    ], **opcje)
+
+    logging.info("Hipotezy o danych ze wszystkich miejscowości, w których zarejestrowana jest conajmniej jedna firma z koncesją:")
+    test_miejsc_lud_konc, test_miejsc_poz_konc, test_miejsc_pow_konc = anal.testuj_korelacje_wiele(wszystkie_dane_miejscowosc, [
+        ("Ludność", "Liczba koncesji"),
+        ("Liczba Pożarów", "Liczba koncesji"),
+        ("Powierzchnia [ha]", "Liczba koncesji"),
+    ], **opcje)
+
+    logging.info("Hipotezy o danych na poziomie województw:")
+    test_woj_lud_poz, test_woj_pow_poz, test_woj_lud_konc, test_woj_poz_konc, test_woj_pow_konc = anal.testuj_korelacje_wiele(wszystkie_dane_wojewodztwo, [
+        ("Ludność", "Liczba Pożarów"),
+        ("Powierzchnia [ha]", "Liczba Pożarów"),
+        ("Ludność", "Liczba koncesji"),
+        ("Liczba Pożarów", "Liczba koncesji"),
+        ("Powierzchnia [ha]", "Liczba koncesji"),
+    ], **opcje)
+
+    testy_gmina={
+        "Test korelacji między liczbą ludności, a liczbą pożarów": test_gmin_lud_poz,
+        "Test korelacji między powierzchnią gminy, a liczbą pożarów": test_gmin_pow_poz
+    }
+
+    testy_miejsc={
+        "Test korelacji między liczbą ludności, a liczbą koncesji": test_miejsc_lud_konc,
+        "Test korelacji między liczbą pożarów, a liczbą koncesji": test_miejsc_poz_konc,
+        "Test korelacji między powierzchnią, a liczbą koncesji": test_miejsc_pow_konc
+    }
+
+    testy_woj={
+        "Test korelacji między liczbą ludności, a liczbą pożarów": test_woj_lud_poz,
+        "Test korelacji między powierzchnią gminy, a liczbą pożarów": test_woj_pow_poz,
+        "Test korelacji między liczbą ludności, a liczbą koncesji": test_woj_lud_konc,
+        "Test korelacji między liczbą pożarów, a liczbą koncesji": test_woj_poz_konc,
+        "Test korelacji między powierzchnią, a liczbą koncesji": test_woj_pow_konc
+    }
+
+    testy={
+        "dane na poziomie gmin":testy_gmina,
+        "dane z miejscowości, w których jest conajmniej jedna koncesja":testy_miejsc,
+        "dane na poziomie województw":testy_woj
+    }
+    return testy
+
+
+def przygotuj_zbiory(args, etapy: CacheEtapow):
+    """
+    Wczytuje pliki i wykonuje etapy przygotowania danych oraz etap "laczenie" (z wynikami zapisanymi w cache etapów).
+
+    Returns:
+        Wynik etapu "laczenie" i jego klucz albo None, jeśli nie udało się wczytać plików
+    """
+    sciezki = {
+        "pozary": args.pozary,
+        "powierzchnie": args.powierzchnie,
+        "populacja": args.populacje,
+    }
+    path_alkohol = args.koncesje
+    # tabele zmian gmin nie należą do kodu funkcji etapów, więc wchodzą do klucza jako parametry
+    parametry = {"bez_kopii": ppr.BEZ_KOPII, "optymalizuj": args.optymalizuj_typy, "arrow": args.arrow, "wybor": WYBOR_DANYCH,
+                 "zmiany_gmin": (ZMIANY_GMIN_POWIERZCHNIE, ZMIANY_GMIN_POZARY)}
+
+    # klucze etapów przygotowania danych zależą od treści plików, więc wczytujemy tylko pliki etapów bez zapisanego wyniku
+    przygotowanie = {"pozary": przygotuj_pozary, "powierzchnie": przygotuj_powierzchnie, "populacja": przygotuj_populacje}
+    klucze = {nazwa: etapy.klucz(nazwa, [etapy.odcisk_pliku(sciezki[nazwa])], parametry, funkcja)
+              for nazwa, funkcja in przygotowanie.items()}
+    do_wczytania = [nazwa for nazwa in przygotowanie if not etapy.zapisany(klucze[nazwa])]
+
+    logging.info("Rozpoczynam wczytywanie plików z danymi")
+    wczytane = dict(zip(do_wczytania, dl.load_many(
+        [sciezki[nazwa] for nazwa in do_wczytania], opcje_plikow=[WYBOR_DANYCH[nazwa] for nazwa in do_wczytania],
+        **opcje_wczytywania(args))))
+
+    if any(df is None for df in wczytane.values()):
+        logging.error("Nie udało się wczytać jednego lub więcej plików. Przerwanie analizy.")
+        return None
+
+    logging.info("Rozpoczynam preprocessing danych")
+    klucze["koncesje"] = etapy.klucz("koncesje", [etapy.odcisk_pliku(path_alkohol)], parametry, przygotuj_koncesje)
+    alkohol = etapy.uruchom("koncesje", klucze["koncesje"], przygotuj_koncesje, path_alkohol)
+    if alkohol is None:
+        logging.error("Nie udało się wczytać jednego lub więcej plików. Przerwanie analizy.")
+        return None
+    alkohol_miejscowosc, alkohol_wojewodztwo = alkohol
+
+    populacja = etapy.uruchom("populacja", klucze["populacja"], przygotuj_populacje, wczytane.get("populacja"))
+    powierzchnie = etapy.uruchom("powierzchnie", klucze["powierzchnie"], przygotuj_powierzchnie, wczytane.get("powierzchnie"))
+    pozary = etapy.uruchom("pozary", klucze["pozary"], przygotuj_pozary, wczytane.get("pozary"))
+
+
+    logging.info("Sprawdzam zgodność między zbiorami danych")
+    ppr.sprawdz_zgodnosc(pozary, populacja, "TERYT")
+    ppr.sprawdz_zgodnosc(powierzchnie, populacja, "TERYT")
+
+
+    klucze["laczenie"] = etapy.klucz("laczenie", [klucze[nazwa] for nazwa in ["pozary", "powierzchnie", "populacja", "koncesje"]],
+                                     funkcja=polacz_zbiory)
+    polaczone = etapy.uruchom(
+        "laczenie", klucze["laczenie"], polacz_zbiory, pozary, powierzchnie, populacja, alkohol_miejscowosc, alkohol_wojewodztwo)
+    return polaczone, klucze["laczenie"]
+
+
+def uruchom_serwer(args):
+    """
+    Tryb usługi: dane są wczytywane i przygotowywane raz, a statystyki, korelacje i agregaty kostki TERYT
+    są liczone na żądanie na danych w pamięci. Przeładowanie (POST /przeladuj) przelicza tylko etapy,
+    których pliki wejściowe się zmieniły (jak ponowne uruchomienie skryptu z cache etapów).
+    """
+    def zaladuj():
+        etapy = CacheEtapow(wlaczony=not args.bez_cache)
+        polaczone = przygotuj_zbiory(args, etapy)
+        if polaczone is None:
+            return None
+        (wszystkie_dane, wszystkie_dane_wojewodztwo, wszystkie_dane_miejscowosc, kostka), _ = polaczone
+        return {
+            "zbiory": {"gminy": wszystkie_dane, "wojewodztwa": wszystkie_dane_wojewodztwo,
+                       "miejscowosci": wszystkie_dane_miejscowosc},
+            "kostka": kostka,
+            "opis": etapy.podsumowanie(),
+        }
+
+    SerwerZapytan(zaladuj).uruchom(port=args.port, gniazdo=args.gniazdo)
 
-logging.basicConfig(level=logging.INFO, format='%(levelname)s: %(message)s', encoding='utf-8')
 
 def main():
     """
     Funkcja łączy dane ze wskazanych plików, liczy podstawowe statystyki kolumn, testuje hipotezy o korelacji kolumn i
-    zapisuje wyniki analizy do nowego pliku o podanej nazwie
+    zapisuje wyniki analizy do nowego pliku o podanej nazwie.
+    Potok jest podzielony na etapy, których wyniki są zapisywane na dysku (CacheEtapow), więc po zmianie jednego
+    pliku przeliczane są tylko etapy od niego zależne.
     """
     parser = argparse.ArgumentParser(
         description="Skrypt do analizy danych publicznych dotyczących gmin."
     )
     parser.add_argument(
         '--pozary',
-        required=True,
         help="Ścieżka do pliku z danymi o pożarach."
     )
     parser.add_argument(
         '--populacje',
-        required=True,
         help="Ścieżka do pliku z danymi o populacji."
     )
     parser.add_argument(
         '--powierzchnie',
-        required=True,
         help="Ścieżka do pliku z danymi o powierzchniach."
     )
     parser.add_argument(
         '--koncesje',
-        required=True,
         help="Ścieżka do pliku z danymi o koncesjach na alkohol."
     )
     parser.add_argument(
         '--output',
-        required=True,
         help="Ścieżka do pliku wyjściowego, w którym zostanie zapisany raport (np. raport.json). SKRYPT STWORZY LUB NADPISZE PLIK!"
     )
+    parser.add_argument(
+        '--tabela-gmin',
+        help="Ścieżka do pliku (.parquet, .csv lub .ndjson), do którego zostanie zapisana połączona tabela danych wszystkich gmin."
+    )
+    parser.add_argument(
+        '--wyniki-ndjson',
+        help="Ścieżka do pliku NDJSON, do którego zostaną zapisane wyniki testów (jeden test w wierszu)."
+    )
+    parser.add_argument(
+        '--kompaktowy',
+        action='store_true',
+        help="Zapisuje raport JSON bez wcięć (mniejszy plik)."
+    )
+    parser.add_argument(
+        '--bez-kopii',
+        action='store_true',
+        help="Preprocessing bez kopiowania całych ramek danych (podmieniane są tylko przetwarzane kolumny)."
+    )
+    parser.add_argument(
+        '--bez-cache',
+        action='store_true',
+        help="Wczytuje pliki i przelicza wszystkie etapy z pominięciem cache (sparsowanych plików i wyników etapów)."
+    )
+    parser.add_argument(
+        '--wyczysc-cache',
+        action='store_true',
+        help="Czyści cache sparsowanych plików i wyników etapów przed wczytaniem danych."
+    )
+    parser.add_argument(
+        '--przelicz-etap',
+        action='append',
+        default=[],
+        choices=ETAPY,
+        help="Usuwa z cache zapisany wynik wskazanego etapu (można podać kilka razy), co wymusza jego przeliczenie."
+    )
+    parser.add_argument(
+        '--optymalizuj-typy',
+        action='store_true',
+        help="Po wczytaniu zamienia powtarzające się napisy na kategorie i zmniejsza typy liczbowe, żeby oszczędzić pamięć."
+    )
+    parser.add_argument(
+        '--arrow',
+        action='store_true',
+        help="Wczytuje pliki z typami pyarrow (napisy w kolumnach Arrow), co przyspiesza operacje na napisach w preprocessingu."
+    )
+    parser.add_argument(
+        '--metoda-korelacji',
+        choices=anal.METODY_KORELACJI,
+        default="pearson",
+        help="Współczynnik korelacji używany w testach hipotez (domyślnie pearson)."
+    )
+    parser.add_argument(
+        '--liczba-prob',
+        type=int,
+        default=0,
+        help="Liczba permutacji i prób bootstrapowych w testach korelacji (np. 10000); 0 - tylko test parametryczny."
+    )
+    parser.add_argument(
+        '--seed',
+        type=int,
+        default=None,
+        help="Ziarno generatora losowego testów permutacyjnych i bootstrapu."
+    )
+    parser.add_argument(
+        '--profil',
+        action='store_true',
+        help="Mierzy czas, liczbę wierszy i pamięć każdego etapu; tabela jest wypisywana na końcu, a pomiary trafiają do raportu."
+    )
+    parser.add_argument(
+        '--panel',
+        help="Tryb panelu: katalog z plikami rocznymi (podkatalogi pozary, populacja, powierzchnie, koncesje), "
+             "które zostaną przetworzone równolegle i zapisane jako zbiór Parquet podzielony na źródła i lata."
+    )
+    parser.add_argument(
+        '--panel-wyjscie',
+        help="Katalog zbioru Parquet w trybie panelu (domyślnie <katalog panelu>/panel.parquet)."
+    )
+    parser.add_argument(
+        '--panel-nadpisz',
+        action='store_true',
+        help="W trybie panelu przetwarza ponownie także pliki, których partycje są aktualne (np. po zmianie preprocessingu)."
+    )
+    parser.add_argument(
+        '--serwer',
+        action='store_true',
+        help="Tryb usługi: wczytuje i przygotowuje dane raz, a następnie odpowiada na zapytania HTTP o statystyki, korelacje "
+             "i agregaty TERYT (np. /statystyki?zbior=gminy, /korelacja?pary=Ludność:Liczba Pożarów, POST /przeladuj)."
+    )
+    parser.add_argument(
+        '--port',
+        type=int,
+        default=PORT,
+        help=f"Port usługi na adresie lokalnym 127.0.0.1 (domyślnie {PORT})."
+    )
+    parser.add_argument(
+        '--gniazdo',
+        help="Ścieżka gniazda Unix, na którym nasłuchuje usługa (zamiast portu TCP)."
+    )
     args = parser.parse_args()
-
-    path_pozary = args.pozary
-    path_powierzchnie = args.powierzchnie
-    path_populacja = args.populacje
-    path_alkohol = args.koncesje
+    # logowanie konfiguruje skrypt, moduły pakietu tylko zapisują komunikaty
+    logging.basicConfig(level=logging.INFO, format='%(levelname)s: %(message)s', encoding='utf-8')
+    if not args.panel:
+        wymagane = ["pozary", "populacje", "powierzchnie", "koncesje"] + ([] if args.serwer else ["output"])
+        brakujace = [nazwa for nazwa in wymagane if getattr(args, nazwa) is None]
+        if brakujace:
+            parser.error(f"wymagane argumenty: {', '.join('--' + nazwa for nazwa in brakujace)}")
+
+    if args.bez_kopii:
+        ppr.BEZ_KOPII = True
+    if args.profil:
+        prof.wlacz()
+
+    if args.panel:
+        zbuduj_panel(args)
+        if args.profil:
+            print(prof.tabela())
+        return
+
+    etapy = CacheEtapow(wlaczony=not args.bez_cache)
 
     try:
-        logging.info("Rozpoczynam wczytywanie plików z danymi")
-        pozary = dl.load_data(path_pozary)
-        powierzchnie = dl.load_data(path_powierzchnie)
-        populacja = dl.load_data(path_populacja)
-        alkohol = dl.load_data(path_alkohol)
-
-        if pozary is None or powierzchnie is None or populacja is None or alkohol is None:
-            logging.error("Nie udało się wczytać jednego lub więcej plików. Przerwanie analizy.")
+        if args.wyczysc_cache:
+            dl.wyczysc_cache()
+            etapy.wyczysc()
+        for nazwa in args.przelicz_etap:
+            etapy.wyczysc(nazwa)
+
+        if args.serwer:
+            uruchom_serwer(args)
             return
 
-        logging.info("Rozpoczynam preprocessing danych")
-
-        logging.info("Rozpoczynam preprocessing datasetu z koncesjami")
-        alkohol = alkohol.iloc[:, 3:6]
-        alkohol_miejscowosc = alkohol["Miejscowość"].value_counts().reset_index()
-        alkohol_miejscowosc.columns = ["Miejscowość", "Liczba koncesji"]
-        alkohol_wojewodztwo = alkohol["Województwo"].value_counts().reset_index()
-        alkohol_wojewodztwo.columns = ["Województwo", "Liczba koncesji"]
-        alkohol_wojewodztwo = ppr.usun_woj(alkohol_wojewodztwo)
-        alkohol_wojewodztwo = ppr.litery_na_male(alkohol_wojewodztwo)
-
-
-        logging.info("Rozpoczynam preprocessing datasetu z populacjami")
-        populacja = populacja.iloc[8:, :3]
-        populacja.columns = ["Gmina", "TERYT", "Ludność"]
-        populacja = ppr.usun_puste_wiersze(populacja)
-        populacja = ppr.usun_rozdzielone_gminy_mw(populacja)
-        populacja = ppr.usun_ostatnia_cyfre(populacja, "TERYT")
-        populacja["Ludność"] = populacja["Ludność"].astype(int)
-        populacja = ppr.str_to_int(populacja, "TERYT")
-
-
-        logging.info("Rozpoczynam preprocessing datasetu z powierzchniami")
-        powierzchnie = powierzchnie.iloc[:, :3]
-        powierzchnie = ppr.usun_puste_wiersze(powierzchnie)
-        powierzchnie = ppr.usun_odstepy(powierzchnie)
-        powierzchnie = ppr.usun_krotkie(powierzchnie)
-        powierzchnie = ppr.usun_rozdzielone_gminy_mw(powierzchnie)
-        powierzchnie = ppr.usun_dzielnice_miast(powierzchnie)
-        powierzchnie = ppr.usun_ostatnia_cyfre(powierzchnie, "TERYT")
-        powierzchnie = ppr.zlacz_gminy(powierzchnie,"Kamienica", "Szczawa", "Powierzchnia [ha]", "Nazwa jednostki")
-        powierzchnie = ppr.zlacz_gminy(powierzchnie, "Supraśl", "Grabówka", "Powierzchnia [ha]", "Nazwa jednostki")
-        powierzchnie = ppr.str_to_int(powierzchnie, "TERYT")
-
-
-        logging.info("Rozpoczynam preprocessing datasetu z pożarami")
-        pozary = pozary.iloc[:, :5]
-        pozary = ppr.zmien_nazwe(pozary, "RAZEM Pożar (P)", "Liczba Pożarów")
-        pozary = ppr.usun_puste_wiersze(pozary)
-        pozary = ppr.zlacz_dzielnice(pozary, "Liczba Pożarów")
-        pozary = pozary.drop(348)
-        pozary = pozary.drop(610)
-        pozary = pozary.drop(1526)
-        pozary = ppr.zlacz_gminy(pozary, 200209, 200216, "Liczba Pożarów", "TERYT")
-        pozary = ppr.zlacz_gminy(pozary, 120705, 120713, "Liczba Pożarów", "TERYT")
-
-
-
-        logging.info("Sprawdzam zgodność między zbiorami danych")
-        ppr.sprawdz_zgodnosc(pozary, populacja, "TERYT")
-        ppr.sprawdz_zgodnosc(powierzchnie, populacja, "TERYT")
-
-
-
-        logging.info("Rozpoczynam łączenie zbiorów.")
-        wszystkie_dane = pd.merge(pozary, powierzchnie[['TERYT', 'Powierzchnia [ha]']], on='TERYT', how='left')
-        wszystkie_dane = pd.merge(wszystkie_dane, populacja[['TERYT', 'Ludność']], on='TERYT', how='left')
-        wszystkie_dane = wszystkie_dane.drop(['TERYT', 'Powiat'], axis=1)
-        wszystkie_dane_wojewodztwo = wszystkie_dane.groupby('Województwo').agg({
-            'Liczba Pożarów': 'sum',
-            'Powierzchnia [ha]': 'sum',
-            'Ludność': 'sum'
-        }).reset_index()
-        wszystkie_dane_miejscowosc = wszystkie_dane[wszystkie_dane["Gmina"].isin(alkohol_miejscowosc["Miejscowość"])]
-        wszystkie_dane_miejscowosc = wszystkie_dane_miejscowosc.groupby('Gmina').agg({
-            'Liczba Pożarów': 'sum',
-            'Powierzchnia [ha]': 'sum',
-            'Ludność': 'sum'
-        }).reset_index()
-        wszystkie_dane_wojewodztwo = pd.merge(wszystkie_dane_wojewodztwo, alkohol_wojewodztwo, on="Województwo")
-        wszystkie_dane_miejscowosc.rename(columns={"Gmina": "Miejscowość"}, inplace=True)
-        wszystkie_dane_miejscowosc = pd.merge(wszystkie_dane_miejscowosc, alkohol_miejscowosc, on="Miejscowość")
-
-
-
-        logging.info("Rozpoczynam analizę zbiorów.")
-
-        stat_wszystkie_gminy = anal.oblicz_statystyki(wszystkie_dane, ["Liczba Pożarów", "Powierzchnia [ha]", "Ludność"])
-
-        stat_miejsc_z_koncesja = anal.oblicz_statystyki(wszystkie_dane_miejscowosc,
-                                       ["Liczba Pożarów", "Powierzchnia [ha]", "Ludność", "Liczba koncesji"])
-
-        stat_woj = anal.oblicz_statystyki(wszystkie_dane_wojewodztwo,
-                                        ["Liczba Pożarów", "Powierzchnia [ha]", "Ludność", "Liczba koncesji"])
-
-        statystyki={
-            "statystyki wszystkich gmin": stat_wszystkie_gminy,
-            "statystyki miejscowości, w których istnieje firma z koncesją": stat_miejsc_z_koncesja,
-            "statystyki województw": stat_woj,
-        }
-
-        logging.info("Rozpoczynam analizę testowanie hipotez.")
-        logging.info("Hipotezy o danych na poziomie wszystkich gmin w Polsce:")
-        test_gmin_lud_poz = anal.testuj_korelacje(wszystkie_dane, "Ludność", "Liczba Pożarów")
-        test_gmin_pow_poz = anal.testuj_korelacje(wszystkie_dane, "Powierzchnia [ha]", "Liczba Pożarów")
-
-        logging.info("Hipotezy o danych ze wszystkich miejscowości, w których zarejestrowana jest conajmniej jedna firma z koncesją:")
-        test_miejsc_lud_konc = anal.testuj_korelacje(wszystkie_dane_miejscowosc, "Ludność", "Liczba koncesji")
-        test_miejsc_poz_konc = anal.testuj_korelacje(wszystkie_dane_miejscowosc, "Liczba Pożarów", "Liczba koncesji")
-        test_miejsc_pow_konc = anal.testuj_korelacje(wszystkie_dane_miejscowosc, "Powierzchnia [ha]", "Liczba koncesji")
-
-        logging.info("Hipotezy o danych na poziomie województw:")
-        test_woj_lud_poz = anal.testuj_korelacje(wszystkie_dane_wojewodztwo, "Ludność", "Liczba Pożarów")
-        test_woj_pow_poz = anal.testuj_korelacje(wszystkie_dane_wojewodztwo, "Powierzchnia [ha]", "Liczba Pożarów")
-        test_woj_lud_konc = anal.testuj_korelacje(wszystkie_dane_wojewodztwo, "Ludność", "Liczba koncesji")
-        test_woj_poz_konc = anal.testuj_korelacje(wszystkie_dane_wojewodztwo, "Liczba Pożarów", "Liczba koncesji")
-        test_woj_pow_konc = anal.testuj_korelacje(wszystkie_dane_wojewodztwo, "Powierzchnia [ha]", "Liczba koncesji")
-
-        testy_gmina={
-            "Test korelacji między liczbą ludności, a liczbą pożarów": test_gmin_lud_poz,
-            "Test korelacji między powierzchnią gminy, a liczbą pożarów": test_gmin_pow_poz
-        }
-
-        testy_miejsc={
-            "Test korelacji między liczbą ludności, a liczbą koncesji": test_miejsc_lud_konc,
-            "Test korelacji między liczbą pożarów, a liczbą koncesji": test_miejsc_poz_konc,
-            "Test korelacji między powierzchnią, a liczbą koncesji": test_miejsc_pow_konc
-        }
+        polaczone = przygotuj_zbiory(args, etapy)
+        if polaczone is None:
+            return
+        (wszystkie_dane, wszystkie_dane_wojewodztwo, wszystkie_dane_miejscowosc, _), klucz_laczenia = polaczone
 
-        testy_woj={
-            "Test korelacji między liczbą ludności, a liczbą pożarów": test_woj_lud_poz,
-            "Test korelacji między powierzchnią gminy, a liczbą pożarów": test_woj_pow_poz,
-            "Test korelacji między liczbą ludności, a liczbą koncesji": test_woj_lud_konc,
-            "Test korelacji między liczbą pożarów, a liczbą koncesji": test_woj_poz_konc,
-            "Test korelacji między powierzchnią, a liczbą koncesji": test_woj_pow_konc
-        }
+        klucz_statystyk = etapy.klucz("statystyki", [klucz_laczenia], funkcja=policz_statystyki)
+        statystyki = etapy.uruchom("statystyki", klucz_statystyk, policz_statystyki,
+                                   wszystkie_dane, wszystkie_dane_wojewodztwo, wszystkie_dane_miejscowosc)
 
-        testy={
-            "dane na poziomie gmin":testy_gmina,
-            "dane z miejscowości, w których jest conajmniej jedna koncesja":testy_miejsc,
-            "dane na poziomie województw":testy_woj
-        }
+        opcje_testow = {"liczba_prob": args.liczba_prob, "seed": args.seed, "metoda": args.metoda_korelacji}
+        klucz_testow = etapy.klucz("testy", [klucz_laczenia], opcje_testow, testuj_hipotezy)
+        testy = etapy.uruchom("testy", klucz_testow, testuj_hipotezy,
+                              wszystkie_dane, wszystkie_dane_wojewodztwo, wszystkie_dane_miejscowosc, **opcje_testow)
 
         wyniki_analizy={
             "statystyki":statystyki,
             "testy":testy
         }
 
-        rep.generuj_raport(wyniki_analizy, args.output)
+        if args.profil:
+            wyniki_analizy["profil"] = prof.raport()
+
+        rep.generuj_raport(wyniki_analizy, args.output, kompaktowy=args.kompaktowy)
+        if args.tabela_gmin:
+            rep.zapisz_tabele(wszystkie_dane, args.tabela_gmin)
+        if args.wyniki_ndjson:
+            rep.zapisz_ndjson(({"poziom": poziom, "test": nazwa, **wynik}
+                               for poziom, testy_poziomu in testy.items() for nazwa, wynik in testy_poziomu.items()),
+                              args.wyniki_ndjson)
+        logging.info(etapy.podsumowanie())
+
+        if args.profil:
+            print(prof.tabela())
 
     except Exception as e:
         logging.error(f"Wystąpił nieoczekiwany, krytyczny błąd podczas analizy: {e}")
 
 
 if __name__ == '__main__':
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,170 @@
+import os
+import subprocess
+import sys
+import numpy as np
+import pandas as pd
+import pytest
+from scipy.stats import pearsonr
+from data_analyzer import analysis as anal
+
+
+@pytest.fixture
+def dane_z_brakami():
+    """
+    DataFrame z kilkoma skorelowanymi kolumnami o różnych skalach i brakami danych w różnych wierszach
+    """
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({
+        'Ludność': rng.lognormal(9, 1, 60),
+        'Powierzchnia [ha]': rng.lognormal(9, 0.5, 60),
+    })
+    df['Liczba Pożarów'] = df['Ludność'] * 0.002 + rng.normal(0, 5, 60)
+    df.loc[[3, 10, 11], 'Ludność'] = np.nan
+    df.loc[[10, 20], 'Liczba Pożarów'] = np.nan
+    return df
+
+
+def test_testuj_korelacje_wiele_zgodne_z_pearsonr(dane_z_brakami):
+    """
+    Sprawdza czy wyniki dla wszystkich par kolumn są takie same jak z pearsonr na wierszach bez braków danych
+    """
+    wyniki = anal.testuj_korelacje_wiele(dane_z_brakami)
+
+    assert len(wyniki) == 3
+    for wynik in wyniki:
+        czyste = dane_z_brakami[[wynik['kolumna_1'], wynik['kolumna_2']]].dropna()
+        r, p = pearsonr(czyste.iloc[:, 0], czyste.iloc[:, 1])
+        assert wynik['wspolczynnik_korelacji'] == pytest.approx(r)
+        assert wynik['p_value'] == pytest.approx(p)
+        assert wynik['istotnosc_statystyczna'] == (p < 0.05)
+
+
+def test_testuj_korelacje_wiele_ten_sam_format_co_testuj_korelacje(dane_z_brakami):
+    """
+    Sprawdza czy dla podanych par zwracane są słowniki o tych samych kluczach co z testuj_korelacje,
+    także gdy danych jest za mało
+    """
+    dane_z_brakami['Puste'] = np.nan
+    pary = [('Ludność', 'Liczba Pożarów'), ('Puste', 'Ludność')]
+
+    wyniki = anal.testuj_korelacje_wiele(dane_z_brakami, pary)
+
+    for wynik, (col1, col2) in zip(wyniki, pary):
+        pojedynczy = anal.testuj_korelacje(dane_z_brakami, col1, col2)
+        assert wynik.keys() == pojedynczy.keys()
+    assert wyniki[1]['wspolczynnik_korelacji'] is None
+
+
+def test_oblicz_statystyki_zgodne_z_pandas(dane_z_brakami):
+    """
+    Sprawdza czy statystyki liczone na bloku NumPy są takie same jak liczone metodami pandas
+    """
+    dane_z_brakami['Liczba koncesji'] = np.arange(60)
+    kolumny = ['Ludność', 'Liczba Pożarów', 'Liczba koncesji']
+
+    wynik = anal.oblicz_statystyki(dane_z_brakami, kolumny + ['Brak'])
+
+    assert list(wynik) == kolumny
+    for col in kolumny:
+        assert wynik[col]['min'] == dane_z_brakami[col].min()
+        assert wynik[col]['max'] == dane_z_brakami[col].max()
+        assert wynik[col]['średnia'] == pytest.approx(dane_z_brakami[col].mean())
+        assert wynik[col]['mediana'] == pytest.approx(dane_z_brakami[col].median())
+        assert wynik[col]['odchylenie_standardowe'] == pytest.approx(dane_z_brakami[col].std())
+    assert isinstance(wynik['Liczba koncesji']['max'], np.integer)
+
+
+def test_statystyki_przyrostowe_z_polaczonych_porcji(dane_z_brakami):
+    """
+    Sprawdza czy statystyki policzone z porcji danych i połączone z dwóch akumulatorów
+    są takie same jak policzone na całym DataFrame (poza medianą)
+    """
+    kolumny = ['Ludność', 'Liczba Pożarów']
+    pierwszy = anal.StatystykiPrzyrostowe(kolumny)
+    drugi = anal.StatystykiPrzyrostowe(kolumny)
+    for start in range(0, 40, 7):
+        pierwszy.dodaj(dane_z_brakami.iloc[start:min(start + 7, 40)])
+    drugi.dodaj(dane_z_brakami.iloc[40:])
+
+    wynik = pierwszy.polacz(drugi).wynik()
+    oczekiwany = anal.oblicz_statystyki(dane_z_brakami, kolumny)
+
+    for col in kolumny:
+        assert wynik[col]['mediana'] is None
+        for statystyka in ['min', 'max', 'średnia', 'odchylenie_standardowe']:
+            assert wynik[col][statystyka] == pytest.approx(oczekiwany[col][statystyka])
+
+
+def test_testy_permutacyjne_i_bootstrap(dane_z_brakami, monkeypatch):
+    """
+    Sprawdza powtarzalność wyników przy tym samym ziarnie (także przy liczeniu w puli procesów)
+    oraz zgodność p-value testu permutacyjnego z testem parametrycznym dla dużej próby
+    """
+    pary = [("Ludność", "Liczba Pożarów"), ("Ludność", "Powierzchnia [ha]")]
+    wyniki = anal.testuj_korelacje_wiele(dane_z_brakami, pary, liczba_prob=2500, seed=7, max_workers=1)
+
+    monkeypatch.setattr(anal, "MIN_ELEMENTOW_DLA_PULI", 0)
+    monkeypatch.setattr(anal.os, "cpu_count", lambda: 2)
+    assert anal.testuj_korelacje_wiele(dane_z_brakami, pary, liczba_prob=2500, seed=7, max_workers=2) == wyniki
+
+    for wynik in wyniki:
+        dolna, gorna = wynik['przedzial_ufnosci']
+        assert dolna < wynik['wspolczynnik_korelacji'] < gorna
+        assert wynik['p_value_permutacyjne'] == pytest.approx(wynik['p_value'], abs=0.03)
+    assert wyniki[0]['p_value_permutacyjne'] == 1 / 2501  # żadna permutacja nie daje tak silnej korelacji
+
+    pojedynczy = anal.testuj_korelacje(dane_z_brakami, *pary[1], liczba_prob=2500, seed=7)
+    assert pojedynczy['liczba_prob'] == 2500
+    assert 'p_value_permutacyjne' not in anal.testuj_korelacje(dane_z_brakami, *pary[1])
+
+
+@pytest.mark.parametrize("metoda", ["spearman", "kendall"])
+def test_korelacje_rangowe_zgodne_ze_scipy(dane_z_brakami, metoda):
+    """
+    Sprawdza współczynniki i p-value metod rangowych (z remisami i brakami danych) z wynikami scipy dla każdej pary
+    """
+    from scipy.stats import spearmanr, kendalltau
+    df = dane_z_brakami.assign(**{'Liczba Pożarów': dane_z_brakami['Liczba Pożarów'].round(-1)})  # remisy
+    wyniki = anal.testuj_korelacje_wiele(df, metoda=metoda)
+
+    for wynik in wyniki:
+        pary = df[[wynik['kolumna_1'], wynik['kolumna_2']]].dropna()
+        if metoda == "spearman":
+            oczekiwany = spearmanr(pary.iloc[:, 0], pary.iloc[:, 1])
+        else:
+            oczekiwany = kendalltau(pary.iloc[:, 0], pary.iloc[:, 1], method="asymptotic")
+        assert wynik['metoda'] == metoda
+        assert wynik['wspolczynnik_korelacji'] == pytest.approx(oczekiwany.statistic)
+        assert wynik['p_value'] == pytest.approx(oczekiwany.pvalue)
+
+
+def test_korelacja_czastkowa(dane_z_brakami):
+    """
+    Sprawdza korelację cząstkową z korelacją reszt regresji liczoną osobno dla pary oraz obsługę błędnych argumentów
+    """
+    df = dane_z_brakami
+    wynik, = anal.testuj_korelacje_wiele(df, [("Ludność", "Liczba Pożarów")], kontrolowane=["Powierzchnia [ha]"])
+
+    pelne = df.dropna()
+    regresory = np.column_stack([np.ones(len(pelne)), pelne["Powierzchnia [ha]"]])
+    reszty = [pelne[col] - regresory @ np.linalg.lstsq(regresory, pelne[col], rcond=None)[0]
+              for col in ["Ludność", "Liczba Pożarów"]]
+    r, _ = pearsonr(*reszty)
+    assert wynik['wspolczynnik_korelacji'] == pytest.approx(r)
+    assert wynik['kontrolowane'] == ["Powierzchnia [ha]"]
+
+    blad, = anal.testuj_korelacje_wiele(df, [("Ludność", "Liczba Pożarów")], metoda="kendall",
+                                        kontrolowane=["Powierzchnia [ha]"])
+    assert blad['wspolczynnik_korelacji'] is None and 'uwagi' in blad
+
+
+def test_import_pakietu_bez_scipy_i_bez_konfiguracji_logowania():
+    """
+    Sprawdza czy import modułów pakietu nie wczytuje scipy i nie konfiguruje logowania (to zadanie skryptu)
+    """
+    kod = ("import logging, sys; import data_analyzer.analysis, data_analyzer.preprocessor, data_analyzer.data_loader; "
+           "print('scipy' in sys.modules, len(logging.getLogger().handlers))")
+    wynik = subprocess.run([sys.executable, "-c", kod], capture_output=True, text=True, check=True,
+                           cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+    assert wynik.stdout.split() == ["False", "0"]
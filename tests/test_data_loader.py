@@ -0,0 +1,182 @@
+import os
+import pandas as pd
+import pytest
+from data_analyzer import data_loader as dl
+from pandas.testing import assert_frame_equal
+
+
+@pytest.fixture(autouse=True)
+def cache_w_katalogu_tymczasowym(tmp_path, monkeypatch):
+    """
+    Przekierowuje cache sparsowanych plików do katalogu tymczasowego
+    """
+    katalog = tmp_path / "cache"
+    monkeypatch.setattr(dl, "KATALOG_CACHE", str(katalog))
+    return katalog
+
+
+def test_load_many_zachowuje_kolejnosc_i_zwraca_none_dla_bledow(tmp_path):
+    """
+    Sprawdza czy load_many zwraca ramki w kolejności ścieżek, a w miejscu pliku,
+    którego nie udało się wczytać, zwraca None (tak jak load_data)
+    """
+    ramki = [pd.DataFrame({'TERYT': [i, i + 1], 'Wartosc': [10 * i, 20 * i]}) for i in range(3)]
+    sciezki = []
+    for i, ramka in enumerate(ramki):
+        sciezka = tmp_path / f"plik{i}.csv"
+        ramka.to_csv(sciezka, index=False)
+        sciezki.append(str(sciezka))
+    sciezki.insert(1, str(tmp_path / "brakpliku.csv"))
+
+    wyniki = dl.load_many(sciezki, max_workers=2)
+
+    assert len(wyniki) == 4
+    assert wyniki[1] is None
+    for wynik, oczekiwany in zip([wyniki[0], wyniki[2], wyniki[3]], ramki):
+        assert_frame_equal(wynik, oczekiwany)
+
+
+@pytest.mark.parametrize("rozszerzenie", [".csv", ".xlsx"])
+def test_load_data_wybor_kolumn_i_wierszy(tmp_path, rozszerzenie):
+    """
+    Sprawdza czy wybór kolumn (pozycjami lub nazwami), wiersza nagłówka i pomijanych wierszy
+    daje to samo co wycięcie fragmentu z całego wczytanego pliku
+    """
+    arkusz = pd.DataFrame({
+        'Tytuł': ['opis', 'Nazwa', 'pomiń', 'A', 'B', 'C'],
+        'b': ['', 'TERYT', '', '0201011', '0201022', '0201032'],
+        'c': ['', 'Wartosc', '', 1, 2, 3],
+        'd': ['', 'Zbędna', '', 'x', 'y', 'z'],
+    })
+    sciezka = str(tmp_path / f"arkusz{rozszerzenie}")
+    if rozszerzenie == ".csv":
+        arkusz.to_csv(sciezka, index=False)
+    else:
+        arkusz.to_excel(sciezka, index=False)
+
+    wynik = dl.load_data(sciezka, kolumny=[0, 2], wiersz_naglowka=2, pomin_wiersze=1, liczba_wierszy=2)
+    assert list(wynik.columns) == ['Nazwa', 'Wartosc']
+    assert wynik['Nazwa'].tolist() == ['A', 'B']
+    assert wynik['Wartosc'].tolist() == [1, 2]
+
+    wynik = dl.load_data(sciezka, kolumny=['Tytuł', 'c'], pomin_wiersze=3)
+    assert wynik.values.tolist() == [['A', 1], ['B', 2], ['C', 3]]
+
+
+def test_load_data_drugie_wczytanie_z_cache(tmp_path, cache_w_katalogu_tymczasowym):
+    """
+    Sprawdza czy drugie wczytanie niezmienionego pliku korzysta z cache,
+    a zmiana pliku powoduje ponowne parsowanie
+    """
+    sciezka = tmp_path / "dane.csv"
+    pd.DataFrame({'TERYT': ['0201011', '0201022'], 'Wartosc': [1, 2]}).to_csv(sciezka, index=False)
+
+    pierwszy = dl.load_data(str(sciezka))
+    assert len(os.listdir(cache_w_katalogu_tymczasowym)) == 1
+    drugi = dl.load_data(str(sciezka))
+    assert_frame_equal(pierwszy, drugi)
+
+    pd.DataFrame({'TERYT': ['0201011'], 'Wartosc': [5]}).to_csv(sciezka, index=False)
+    os.utime(sciezka, ns=(0, 10 ** 9)) # zmiana czasu modyfikacji na wypadek zapisu w tej samej chwili
+    trzeci = dl.load_data(str(sciezka))
+    assert trzeci['Wartosc'].tolist() == [5]
+
+    assert dl.wyczysc_cache() == 2
+    assert dl.load_data(str(sciezka), cache=False)['Wartosc'].tolist() == [5]
+    assert os.listdir(cache_w_katalogu_tymczasowym) == []
+
+
+def test_cache_zapisuje_pickle_gdy_parquet_nie_obsluguje_typow(cache_w_katalogu_tymczasowym):
+    """
+    Sprawdza czy ramka z kolumną o mieszanych typach (jak w arkuszach GUS) trafia do cache jako pickle
+    """
+    df = pd.DataFrame({'Kod': ['0201011', 201022], 'Wartosc': [1, 2]})
+
+    dl._zapisz_do_cache("klucz", df)
+    assert os.listdir(cache_w_katalogu_tymczasowym) == ['klucz.pkl']
+    assert_frame_equal(dl._wczytaj_z_cache("klucz"), df)
+
+
+def test_cache_usuwa_najdawniej_uzywane_wpisy(tmp_path, cache_w_katalogu_tymczasowym, monkeypatch):
+    """
+    Sprawdza czy po przekroczeniu limitu rozmiaru cache usuwany jest najdawniej używany wpis
+    """
+    sciezki = []
+    for i in range(3):
+        sciezka = tmp_path / f"plik{i}.csv"
+        pd.DataFrame({'Wartosc': [i]}).to_csv(sciezka, index=False)
+        dl.load_data(str(sciezka))
+        sciezki.append(str(sciezka))
+    wpisy = [os.path.join(cache_w_katalogu_tymczasowym, dl._klucz_cache(sciezka, {}) + ".parquet") for sciezka in sciezki]
+    for i, wpis in enumerate(wpisy):
+        os.utime(wpis, (i, i))
+
+    dl.load_data(sciezki[0]) # trafienie odświeża czas użycia pierwszego wpisu
+    monkeypatch.setattr(dl, "MAKS_ROZMIAR_CACHE", sum(os.path.getsize(wpis) for wpis in wpisy) - 1)
+    dl._przytnij_cache()
+
+    assert [os.path.exists(wpis) for wpis in wpisy] == [True, False, True]
+
+
+def test_zlicz_wartosci_strumieniowo_jak_value_counts(tmp_path):
+    """
+    Sprawdza czy zliczanie po kawałkach daje te same liczności co value_counts na całej tabeli
+    """
+    df = pd.DataFrame({
+        'Numer': range(7),
+        'Miejscowość': ['Kraków', 'Gdańsk', 'Kraków', 'Łódź', 'Kraków', 'Gdańsk', None],
+        'Województwo': ['MAŁOPOLSKIE', 'POMORSKIE', 'MAŁOPOLSKIE', 'ŁÓDZKIE', 'MAŁOPOLSKIE', 'POMORSKIE', 'ŁÓDZKIE'],
+    })
+    sciezka = tmp_path / "koncesje.csv"
+    df.to_csv(sciezka, index=False)
+
+    pary = ('Miejscowość', 'Województwo')
+    wyniki = dl.zlicz_wartosci(str(sciezka), ['Miejscowość', 'Województwo', pary], chunksize=2)
+
+    for col in ['Miejscowość', 'Województwo']:
+        assert wyniki[col].to_dict() == df[col].value_counts().to_dict()
+        assert wyniki[col].is_monotonic_decreasing
+    assert wyniki[pary].to_dict() == df[list(pary)].value_counts().to_dict()
+    assert wyniki[pary].index.names == list(pary)
+    assert dl.zlicz_wartosci(str(tmp_path / "brakpliku.csv"), ['Miejscowość']) is None
+
+
+def test_znajdz_duplikaty_w_pliku_strumieniowo(tmp_path):
+    """
+    Sprawdza czy duplikaty klucza są znajdowane także między kawałkami pliku CSV
+    """
+    df = pd.DataFrame({
+        'TERYT': [20101, 20102, 20101, 20103, 20102, 20101],
+        'rok': [2020, 2020, 2021, 2020, 2020, 2020],
+        'Wartosc': range(6),
+    })
+    sciezka = tmp_path / "dane.csv"
+    df.to_csv(sciezka, index=False)
+
+    wynik = dl.znajdz_duplikaty_w_pliku(str(sciezka), ['TERYT', 'rok'], chunksize=2)
+
+    assert wynik.index.tolist() == [0, 5, 1, 4]
+    assert wynik['grupa'].tolist() == [0, 0, 1, 1]
+    assert dl.znajdz_duplikaty_w_pliku(str(tmp_path / "brakpliku.csv"), 'TERYT') is None
+
+
+def test_optymalizuj_typy_kategorie_i_mniejsze_typy(tmp_path):
+    sciezka = str(tmp_path / "dane.csv")
+    pd.DataFrame({
+        "Województwo": ["WOJ. A", "WOJ. B"] * 50,
+        "Gmina": [f"gmina {i}" for i in range(100)],
+        "Liczba": [1, 2] * 50,
+        "Ułamek": [0.5, 0.25] * 50,
+        "Dokładny": [0.1, 0.2] * 50,
+    }).to_csv(sciezka, index=False)
+
+    df = dl.load_data(sciezka, cache=False)
+    zoptymalizowany = dl.load_data(sciezka, cache=False, optymalizuj=True)
+
+    assert isinstance(zoptymalizowany["Województwo"].dtype, pd.CategoricalDtype)
+    assert zoptymalizowany["Gmina"].dtype == object  # same unikalne wartości
+    assert zoptymalizowany["Liczba"].dtype == "int16"  # suma 150 nie mieści się w int8
+    assert zoptymalizowany["Ułamek"].dtype == "float32"
+    assert zoptymalizowany["Dokładny"].dtype == "float64"  # 0.1 nie ma dokładnej postaci float32
+    assert zoptymalizowany.memory_usage(deep=True).sum() < df.memory_usage(deep=True).sum()
+    assert_frame_equal(zoptymalizowany, df, check_dtype=False, check_categorical=False)
@@ -0,0 +1,90 @@
+import os
+import pytest
+from data_analyzer.etapy import CacheEtapow
+
+
+def podwoj(x):
+    podwoj.wywolania += 1
+    return 2 * x
+
+
+@pytest.fixture
+def etapy(tmp_path):
+    podwoj.wywolania = 0
+    return CacheEtapow(str(tmp_path / "etapy"))
+
+
+def test_etap_ponownie_uzyty_dopoki_wejscie_sie_nie_zmieni(tmp_path, etapy):
+    plik = tmp_path / "dane.csv"
+    plik.write_text("a\n1\n")
+
+    klucz = etapy.klucz("etap", [etapy.odcisk_pliku(str(plik))], {"p": 1}, podwoj)
+    assert etapy.uruchom("etap", klucz, podwoj, 21) == 42
+    assert etapy.uruchom("etap", klucz, podwoj, 21) == 42
+    assert podwoj.wywolania == 1
+
+    plik.write_text("a\n22\n")
+    nowy_klucz = etapy.klucz("etap", [etapy.odcisk_pliku(str(plik))], {"p": 1}, podwoj)
+    assert nowy_klucz != klucz
+    assert etapy.klucz("etap", [etapy.odcisk_pliku(str(plik))], {"p": 2}, podwoj) != klucz
+
+    etapy.uruchom("etap", nowy_klucz, podwoj, 21)
+    assert podwoj.wywolania == 2
+    assert [wpis["status"] for wpis in etapy.przebieg] == ["przeliczony", "ponownie użyty", "przeliczony"]
+    assert not etapy.zapisany(klucz)  # przechowujemy tylko ostatni wynik etapu
+
+
+def test_wyczysc_wskazany_etap(etapy):
+    klucz_a = etapy.klucz("a", ["x"])
+    klucz_b = etapy.klucz("b", ["x"])
+    etapy.uruchom("a", klucz_a, podwoj, 1)
+    etapy.uruchom("b", klucz_b, podwoj, 1)
+
+    assert etapy.wyczysc("a") == 1
+    assert not etapy.zapisany(klucz_a) and etapy.zapisany(klucz_b)
+    assert etapy.wyczysc() == 1
+
+
+def test_wylaczony_cache_zawsze_przelicza(tmp_path):
+    podwoj.wywolania = 0
+    etapy = CacheEtapow(str(tmp_path / "etapy"), wlaczony=False)
+    klucz = etapy.klucz("etap", ["x"])
+    etapy.uruchom("etap", klucz, podwoj, 1)
+    etapy.uruchom("etap", klucz, podwoj, 1)
+    assert podwoj.wywolania == 2
+    assert "przeliczone (2)" in etapy.podsumowanie()
+
+
+def test_klucz_nie_zalezy_od_adresow_zagniezdzonego_kodu(tmp_path, etapy):
+    """
+    Sprawdza czy funkcje etapu z lambdą dają ten sam klucz niezależnie od adresów obiektów kodu w pamięci,
+    a zmiana kodu lambdy zmienia klucz; dla brakującego pliku odcisk to None
+    """
+    def zdefiniuj(zrodlo):
+        przestrzen = {}
+        exec(zrodlo, przestrzen)
+        return przestrzen["etap"]
+
+    zrodlo = "def etap(x):\n    return sorted(x, key=lambda y: -y)\n"
+    assert etapy.klucz("etap", ["x"], funkcja=zdefiniuj(zrodlo)) == etapy.klucz("etap", ["x"], funkcja=zdefiniuj(zrodlo))
+    assert (etapy.klucz("etap", ["x"], funkcja=zdefiniuj(zrodlo.replace("-y", "y")))
+            != etapy.klucz("etap", ["x"], funkcja=zdefiniuj(zrodlo)))
+    assert etapy.odcisk_pliku(str(tmp_path / "brakpliku.csv")) is None
+
+
+def test_nieczytelny_wpis_jest_usuwany_i_etap_przeliczany(tmp_path, etapy):
+    """
+    Sprawdza czy uszkodzony plik wyniku etapu (np. zapisany inną wersją pandas) nie jest traktowany
+    jako zapisany wynik, tylko usuwany, a etap przeliczany
+    """
+    klucz = etapy.klucz("etap", ["x"])
+    etapy.uruchom("etap", klucz, podwoj, 21)
+    with open(etapy._sciezka(klucz), "wb") as f:
+        f.write(b"uszkodzony wpis")
+
+    nowe_etapy = CacheEtapow(etapy.katalog)
+    assert not nowe_etapy.zapisany(klucz)
+    assert not os.path.exists(etapy._sciezka(klucz))
+    assert nowe_etapy.uruchom("etap", klucz, podwoj, 21) == 42
+    assert podwoj.wywolania == 2
+    assert CacheEtapow(etapy.katalog).zapisany(klucz)
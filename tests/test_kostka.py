@@ -0,0 +1,52 @@
+import numpy as np
+import pandas as pd
+import pytest
+from pandas.testing import assert_frame_equal
+from data_analyzer.kostka import KostkaTeryt
+
+
+@pytest.fixture
+def dane():
+    return pd.DataFrame({
+        'TERYT': ['0201011', '0201022', '0202011', '3261011', '3261011', None],
+        'Województwo': ['dolnośląskie', 'dolnośląskie', 'dolnośląskie', 'zachodniopomorskie', 'zachodniopomorskie', 'x'],
+        'Wartosc': [1.0, 2.0, 4.0, 8.0, np.nan, 100.0],
+    })
+
+
+def test_kostka_poziomy_zgodne_z_groupby(dane):
+    """
+    Sprawdza czy sumy na każdym poziomie są takie same jak przy grupowaniu danych po prefiksie kodu,
+    a średnia liczona jest z sumy i liczności wierszy z wartościami
+    """
+    kostka = KostkaTeryt(dane, ['Wartosc'], agregacje=['sum', 'mean', 'max'], kolumny_opisowe=['Województwo'])
+
+    gminy = kostka.poziom('gmina')
+    assert gminy.index.tolist() == [201010, 201020, 202010, 3261010]
+    assert gminy['Wartosc'].tolist() == [1.0, 2.0, 4.0, 8.0]
+
+    powiaty = kostka.poziom('powiat')
+    assert powiaty.index.tolist() == [201000, 202000, 3261000]
+    assert powiaty['Wartosc'].tolist() == [3.0, 4.0, 8.0]
+
+    wojewodztwa = kostka.poziom('województwo')
+    oczekiwane = dane.dropna(subset=['TERYT']).groupby('Województwo')['Wartosc'].agg(['sum', 'mean', 'max'])
+    assert wojewodztwa['Województwo'].tolist() == oczekiwane.index.tolist()
+    assert wojewodztwa['Wartosc'].tolist() == oczekiwane['sum'].tolist()
+    assert wojewodztwa['Wartosc (mean)'].tolist() == oczekiwane['mean'].tolist()
+    assert wojewodztwa['Wartosc (max)'].tolist() == oczekiwane['max'].tolist()
+
+
+def test_kostka_wybierz_po_prefiksie(dane):
+    """
+    Sprawdza wybieranie jednostki po prefiksie kodu i zejście do jednostek poziomu niższego
+    """
+    kostka = KostkaTeryt(dane, ['Wartosc'])
+
+    assert kostka.wybierz('02')['Wartosc'].tolist() == [7.0]
+    assert kostka.wybierz('02', 'powiat').index.tolist() == [201000, 202000]
+    assert kostka.wybierz('02 01', 'gmina')['Wartosc'].tolist() == [1.0, 2.0]
+    assert kostka.wybierz('14', 'gmina').empty
+    assert_frame_equal(kostka.wybierz('', 'powiat'), kostka.poziom('powiat'))
+    with pytest.raises(ValueError):
+        kostka.wybierz('021')
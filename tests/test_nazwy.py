@@ -0,0 +1,50 @@
+import pandas as pd
+from data_analyzer import nazwy, teryt
+
+
+def test_normalizuj_nazwy_pomija_wielkosc_liter_znaki_diakrytyczne_i_spacje():
+    """
+    Sprawdza czy warianty zapisu tej samej nazwy dają ten sam klucz, a puste wartości None
+    """
+    klucze = nazwy.normalizuj_nazwy(['Kędzierzyn - Koźle', 'KĘDZIERZYN-KOŹLE', ' kedzierzyn-kozle ', 'Łódź', None])
+
+    assert klucze.tolist() == ['kedzierzyn-kozle'] * 3 + ['lodz', None]
+    assert nazwy.normalizuj_wojewodztwa(['WOJ. ŁÓDZKIE', 'łódzkie']).tolist() == ['lodzkie', 'lodzkie']
+
+
+def test_indeks_nazw_rozstrzyga_powtorzone_nazwy_wojewodztwem():
+    """
+    Sprawdza czy nazwy powtarzające się w kraju są dopasowywane po województwie, a nazwy niejednoznaczne
+    także w województwie lub nieznane dostają BRAK
+    """
+    gminy = pd.DataFrame({
+        'Gmina': ['Bobrze', 'Bobrze', 'Łódź', 'Bocho', 'Bocho'],
+        'TERYT': [60603, 161101, 106101, 41704, 41903],
+        'Województwo': ['lubelskie', 'opolskie', 'łódzkie', 'kujawsko-pomorskie', 'kujawsko-pomorskie'],
+    })
+    indeks = nazwy.IndeksNazw(gminy)
+
+    kody = indeks.znajdz(['BOBRZE', 'bobrze', 'Lodz', 'Bocho', 'Bobrze', 'Nieznana'],
+                         ['WOJ. OPOLSKIE', 'WOJ. ŚLĄSKIE', None, 'WOJ. KUJAWSKO-POMORSKIE', 'WOJ. LUBELSKIE', 'WOJ. OPOLSKIE'])
+
+    assert kody.tolist() == [1611010, teryt.BRAK, 1061010, teryt.BRAK, 606030, teryt.BRAK]
+    assert indeks.znajdz(['Bobrze', 'ŁÓDŹ']).tolist() == [teryt.BRAK, 1061010]
+    assert indeks.kandydaci('bobrze') == [606030, 1611010]
+
+
+def test_indeks_nazw_grupuje_gmine_miejska_i_wiejska_o_tej_samej_nazwie():
+    """
+    Sprawdza czy gmina miejska i gmina wiejska o tej samej nazwie w jednym województwie dostają wspólny
+    kod grupy (najmniejszy kod), zamiast BRAK
+    """
+    gminy = pd.DataFrame({
+        'Gmina': ['Chełm', 'Chełm', 'Bobrze'],
+        'TERYT': ['0662011', '0603032', '0606032'],
+        'Województwo': ['lubelskie', 'lubelskie', 'lubelskie'],
+    })
+    indeks = nazwy.IndeksNazw(gminy)
+
+    assert indeks.znajdz(['Chełm'], ['WOJ. LUBELSKIE']).tolist() == [teryt.BRAK]
+    kody = indeks.znajdz(['Chełm', 'CHEŁM', 'Bobrze'], ['WOJ. LUBELSKIE', None, 'WOJ. LUBELSKIE'], grupuj_niejednoznaczne=True)
+    assert kody.tolist() == [603032, teryt.BRAK, 606032]
+    assert indeks.grupa([662011, 603032, 606032, 1611010]).tolist() == [603032, 603032, 606032, 1611010]
@@ -0,0 +1,40 @@
+import functools
+
+import pandas as pd
+import pytest
+from data_analyzer import panel
+
+pytest.importorskip("pyarrow")
+
+
+def _przygotuj(df: pd.DataFrame) -> pd.DataFrame:
+    df["Wartosc"] = df["Wartosc"] * 2
+    return df
+
+
+def test_zbuduj_i_wczytaj_panel(tmp_path):
+    """
+    Sprawdza czy pliki roczne są przetwarzane równolegle do partycji źródło/rok, ponowne uruchomienie pomija
+    aktualne partycje, a odczyt zwraca tylko wskazane lata i kolumny
+    """
+    (tmp_path / "pozary").mkdir()
+    for rok in [2019, 2020, 2021]:
+        pd.DataFrame({"TERYT": [20101, 20102], "Wartosc": [rok, 1], "Nazwa": ["a", "b"]}).to_csv(
+            tmp_path / "pozary" / f"pozary_{rok}.csv", index=False)
+    (tmp_path / "pozary" / "opis.txt").write_text("pomijany plik")
+    wyjscie = str(tmp_path / "panel.parquet")
+
+    pliki = panel.znajdz_pliki_roczne(str(tmp_path), ["pozary"])
+    assert sorted(pliki["pozary"]) == [2019, 2020, 2021]
+    przygotowanie = {"pozary": functools.partial(panel.przygotuj_plik, funkcja=_przygotuj, cache=False)}
+
+    podsumowanie = panel.zbuduj_panel(pliki, przygotowanie, wyjscie, max_workers=2)
+    assert podsumowanie["status"].tolist() == ["zapisany"] * 3
+    assert podsumowanie["wiersze"].tolist() == [2, 2, 2]
+    podsumowanie = panel.zbuduj_panel(pliki, przygotowanie, wyjscie, max_workers=2)
+    assert podsumowanie["status"].tolist() == ["aktualny"] * 3
+
+    df = panel.wczytaj_panel(wyjscie, "pozary", lata=[2020, 2021], kolumny=["Wartosc"])
+    assert list(df.columns) == ["Wartosc", "rok"]
+    assert df.sort_values(["rok", "Wartosc"])["Wartosc"].tolist() == [2, 4040, 2, 4042]
+    assert panel.wczytaj_panel(wyjscie, "brak") is None
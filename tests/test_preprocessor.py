@@ -1,3 +1,4 @@
+import numpy as np
 import pandas as pd
 import pytest
 from data_analyzer import preprocessor as ppr
@@ -358,3 +359,265 @@ def test_usun_krotkie_rozne_int():
 
 
 
+
+
+def test_bez_kopii_daje_ten_sam_wynik_i_nie_zmienia_oryginalu():
+    """
+    Sprawdza czy w trybie bez_kopii funkcje zwracają to samo co w trybie domyślnym
+    i nie modyfikują przekazanego DataFrame
+    """
+    dane_wejsciowe = pd.DataFrame({
+        'TERYT': ['02 01011', '0201014', '', '0201019'],
+        'Wartosc': [10, 20, 30, 40]
+    })
+    oryginal = dane_wejsciowe.copy()
+
+    def lancuch(df, bez_kopii):
+        df = ppr.usun_puste_wiersze(df, bez_kopii=bez_kopii)
+        df = ppr.usun_odstepy(df, bez_kopii=bez_kopii)
+        df = ppr.usun_krotkie(df, bez_kopii=bez_kopii)
+        df = ppr.usun_rozdzielone_gminy_mw(df, bez_kopii=bez_kopii)
+        df = ppr.usun_ostatnia_cyfre(df, "TERYT", bez_kopii=bez_kopii)
+        return ppr.str_to_int(df, "TERYT", bez_kopii=bez_kopii)
+
+    assert_frame_equal(lancuch(dane_wejsciowe, True), lancuch(dane_wejsciowe, False))
+    assert_frame_equal(dane_wejsciowe, oryginal)
+
+
+def test_zlacz_gminy_bez_kopii_nie_zmienia_oryginalu():
+    """
+    Sprawdza czy zlacz_gminy w trybie bez_kopii nie dopisuje sumy do oryginalnego DataFrame
+    """
+    dane_wejsciowe = pd.DataFrame({
+        'Gmina': ['Kamienica', 'Szczawa', 'Łącko'],
+        'Wartosc': [10, 5, 7]
+    })
+    oryginal = dane_wejsciowe.copy()
+
+    wynik = ppr.zlacz_gminy(dane_wejsciowe, 'Kamienica', 'Szczawa', 'Wartosc', 'Gmina', bez_kopii=True)
+
+    assert wynik['Wartosc'].tolist() == [15, 7]
+    assert_frame_equal(dane_wejsciowe, oryginal)
+
+
+def test_zlacz_gminy_wiele_rozwiazuje_lancuchy_zmian():
+    """
+    Sprawdza czy zlacz_gminy_wiele sumuje kilka kolumn, przenosi gminy z łańcucha zmian do gminy końcowej
+    i pomija zmiany, dla których nie ma gminy docelowej
+    """
+    dane_wejsciowe = pd.DataFrame({
+        'TERYT': [200209, 200216, 120705, 120713, 120799, 100101],
+        'Wartosc': [1, 2, 10, 20, 40, 100],
+        'Ludnosc': [5, 5, 5, 5, 5, 5],
+        'Nazwa': ['A', 'B', 'C', 'D', 'E', 'F']
+    })
+    oryginal = dane_wejsciowe.copy()
+    mapowanie = {200216: 200209, 120799: 120713, 120713: 120705, 100101: 999999}
+
+    wynik = ppr.zlacz_gminy_wiele(dane_wejsciowe, mapowanie, ['Wartosc', 'Ludnosc'], 'TERYT', bez_kopii=True)
+
+    assert wynik['TERYT'].tolist() == [200209, 120705, 100101]
+    assert wynik['Wartosc'].tolist() == [3, 70, 100]
+    assert wynik['Ludnosc'].tolist() == [10, 15, 5]
+    assert wynik['Nazwa'].tolist() == ['A', 'C', 'F']
+    assert_frame_equal(dane_wejsciowe, oryginal)
+
+
+def test_zlacz_gminy_wiele_cykl_nie_zmienia_danych():
+    dane_wejsciowe = pd.DataFrame({'Gmina': ['Kamienica', 'Szczawa'], 'Wartosc': [10, 5]})
+    wynik = ppr.zlacz_gminy_wiele(dane_wejsciowe, {'Szczawa': 'Kamienica', 'Kamienica': 'Szczawa'}, 'Wartosc', 'Gmina')
+    assert_frame_equal(wynik, dane_wejsciowe)
+
+
+def test_usun_rozdzielone_gminy_mw_rozpoznaje_postac_kodu_w_kazdym_wierszu():
+    """
+    Sprawdza czy funkcja usuwa miasta i obszary wiejskie gmin miejsko-wiejskich także wtedy,
+    gdy pierwszy wiersz ma kod bez cyfry rodzaju, i nie usuwa kodów 6-cyfrowych kończących się na 4 lub 5
+    """
+    dane_wejsciowe = pd.DataFrame({
+        'TERYT': ['020105', '0201043', '0201044', '0201045', '02 01 06 2'],
+        'Wartosc': [1, 2, 3, 4, 5]
+    })
+
+    wynik_rzeczywisty = ppr.usun_rozdzielone_gminy_mw(dane_wejsciowe)
+
+    assert wynik_rzeczywisty['TERYT'].tolist() == ['020105', '0201043', '02 01 06 2']
+
+
+def test_usun_rozdzielone_gminy_mw_liczby_z_rodzajem_z_wojewodztw_02_08():
+    """
+    Sprawdza czy kody z cyfrą rodzaju zamienione na liczby są rozpoznawane także wtedy, gdy żaden nie ma 7 cyfr
+    (same województwa 02-08), a z_rodzajem=False pozostawia kody 6-cyfrowe jako kody bez rodzaju
+    """
+    dane_wejsciowe = pd.DataFrame({'TERYT': [201101, 201104, 201105, 801102], 'Wartosc': [1, 2, 3, 4]})
+
+    assert ppr.usun_rozdzielone_gminy_mw(dane_wejsciowe)['TERYT'].tolist() == [201101, 801102]
+    plan = ppr.PlanKrokow([(ppr.usun_rozdzielone_gminy_mw, {})])
+    assert plan.wykonaj(dane_wejsciowe)['TERYT'].tolist() == [201101, 801102]
+    assert len(ppr.usun_rozdzielone_gminy_mw(dane_wejsciowe, z_rodzajem=False)) == 4
+
+
+def test_usun_dzielnice_miast():
+    """
+    Sprawdza czy funkcja usuwa wiersze dzielnic (cyfra rodzaju 8 lub 9)
+    """
+    dane_wejsciowe = pd.DataFrame({
+        'TERYT': ['1465011', '1465028', '1261029', '1261011'],
+    })
+
+    wynik_rzeczywisty = ppr.usun_dzielnice_miast(dane_wejsciowe)
+
+    assert wynik_rzeczywisty['TERYT'].tolist() == ['1465011', '1261011']
+
+
+def test_sprawdz_zgodnosc_zwraca_niedopasowane_klucze_i_wiersze():
+    """
+    Sprawdza czy sprawdz_zgodnosc zwraca liczności, klucze i pozycje wierszy bez pary w drugiej tabeli
+    """
+    df1 = pd.DataFrame({'TERYT': [20101, 20102, 20103], 'Wartosc': [1, 2, 3]})
+    df2 = pd.DataFrame({'TERYT': [20102, 20103, 20104, 20105]})
+
+    wynik = ppr.sprawdz_zgodnosc(df1, df2, 'TERYT', maks_wierszy=0)
+
+    assert not wynik.zgodne
+    assert wynik.niedopasowane_klucze[0].tolist() == [20101]
+    assert wynik.niedopasowane_wiersze[1].tolist() == [2, 3]
+    assert "pominięto 1 wierszy" in wynik.pokaz(1, maks_wierszy=1)
+
+
+def test_uzgodnij_klucze_wiele_ramek():
+    """
+    Sprawdza czy klucz brakujący w dowolnej z ramek jest oznaczony jako niedopasowany we wszystkich pozostałych
+    """
+    ramki = [pd.DataFrame({'TERYT': kody}) for kody in ([1, 2, 3], [1, 2], [1, 3])]
+
+    wynik = ppr.uzgodnij_klucze(ramki, 'TERYT')
+
+    assert [klucze.tolist() for klucze in wynik.niedopasowane_klucze] == [[2, 3], [2], [3]]
+    assert ppr.uzgodnij_klucze(ramki, 'BRAK') is None
+
+
+def test_funkcje_dzialaja_na_ramkach_z_kategoriami():
+    df = pd.DataFrame({
+        "TERYT": ["1465011", "1465011", " ", "0201011"],
+        "Gmina": ["Warszawa", "Warszawa", "X", "Bolesławiec"],
+        "Powiat": ["Warszawa", "Warszawa", "Y", "bolesławiecki"],
+        "Województwo": ["WOJ. MAZOWIECKIE", "WOJ. MAZOWIECKIE", "WOJ. X", "WOJ. DOLNOŚLĄSKIE"],
+        "Liczba": [1, 2, 3, 4],
+    })
+    kategorie = df.astype({"TERYT": "category", "Gmina": "category", "Powiat": "category",
+                           "Województwo": "category", "Liczba": "int8"})
+
+    def przetworz(ramka):
+        ramka = ppr.usun_puste_wiersze(ramka)
+        ramka = ppr.zlacz_dzielnice(ramka, "Liczba")
+        ramka = ppr.usun_woj(ramka)
+        ramka = ppr.litery_na_male(ramka)
+        ramka = ppr.usun_ostatnia_cyfre(ramka, "TERYT")
+        return ppr.str_to_int(ramka, "TERYT")
+
+    oczekiwany = przetworz(df)
+    wynik = przetworz(kategorie)
+    assert_frame_equal(wynik.astype(object), oczekiwany.astype(object))
+
+
+def test_funkcje_napisowe_zachowuja_typy_arrow():
+    """
+    Sprawdza czy na kolumnach z typami pyarrow preprocessing daje te same wartości co na typach numpy,
+    a kolumny pozostają kolumnami Arrow (bez zamiany na obiekty Pythona)
+    """
+    pytest.importorskip("pyarrow")
+    dane_wejsciowe = pd.DataFrame({
+        'TERYT': ['0201011', ' ', '02 01 02 2', '02', None, '1465028'],
+        'Gmina': ['Warszawa', 'Łódź', 'Warszawa', 'A', 'B', 'Warszawa'],
+        'Powiat': ['Warszawa', 'x', 'Warszawa', 'A', 'C', 'y'],
+        'Wartosc': [1, 2, 3, 4, 5, 6],
+    })
+
+    def przetworz(df):
+        df = ppr.usun_puste_wiersze(df)
+        df = ppr.usun_odstepy(df)
+        df = ppr.usun_krotkie(df)
+        df = ppr.zlacz_dzielnice(df, 'Wartosc')
+        df = ppr.usun_ostatnia_cyfre(df, 'TERYT')
+        return ppr.str_to_int(df, 'TERYT')
+
+    wynik_numpy = przetworz(dane_wejsciowe)
+    wynik_arrow = przetworz(dane_wejsciowe.convert_dtypes(dtype_backend='pyarrow'))
+
+    assert all(isinstance(typ, pd.ArrowDtype) for typ in wynik_arrow.dtypes)
+    assert wynik_arrow.astype(object).values.tolist() == wynik_numpy.astype(object).values.tolist()
+    assert wynik_arrow['TERYT'].tolist() == [146502, 20101]
+
+
+def test_plan_krokow_daje_ten_sam_wynik_co_kolejne_wywolania():
+    """
+    Sprawdza czy połączone kroki na kolumnie TERYT dają ten sam wynik i te same liczby usuniętych wierszy
+    co wywołanie funkcji po kolei
+    """
+    dane_wejsciowe = pd.DataFrame({
+        'Gmina': ['A', 'B', 'C', 'D', 'E', 'F', 'G', 'H', 'I'],
+        'TERYT': ['0201011', ' ', '02 01 02 2', '02', None, '1465028', '0201014', '1465029', '0201011'],
+        'Wartosc': [1, 2, 3, 4, 5, 6, 7, 8, 9],
+    })
+    kroki = [
+        (ppr.usun_puste_wiersze, {}),
+        (ppr.usun_odstepy, {}),
+        (ppr.usun_krotkie, {}),
+        (ppr.usun_rozdzielone_gminy_mw, {}),
+        (ppr.usun_dzielnice_miast, {}),
+        (ppr.usun_ostatnia_cyfre, {'column': 'TERYT'}),
+        (ppr.str_to_int, {'column': 'TERYT'}),
+    ]
+
+    oczekiwany = dane_wejsciowe
+    usuniete = []
+    for funkcja, kwargs in kroki:
+        przed = len(oczekiwany)
+        oczekiwany = funkcja(oczekiwany, **kwargs)
+        usuniete.append(przed - len(oczekiwany))
+
+    plan = ppr.PlanKrokow(kroki)
+    wynik = plan.wykonaj(dane_wejsciowe)
+
+    assert_frame_equal(wynik, oczekiwany)
+    assert [wpis['usuniete'] for wpis in plan.raport] == usuniete
+    assert all(wpis['polaczony'] for wpis in plan.raport)
+    assert dane_wejsciowe['TERYT'].iloc[0] == '0201011'
+
+
+def test_znajdz_duplikaty_klucz_z_kilku_kolumn():
+    """
+    Sprawdza czy duplikaty kombinacji kolumn są zwracane z etykietami wierszy, numerami grup w kolejności
+    pierwszego wystąpienia i licznościami, a powtórzenia wartości w jednej kolumnie nie są duplikatami klucza
+    """
+    dane_wejsciowe = pd.DataFrame({
+        'Gmina': ['Bobrze', 'Bobrze', 'Łódź', 'Bobrze', 'Łódź', 'Nowa', 'Łódź'],
+        'Powiat': ['A', 'B', 'C', 'A', 'C', 'A', 'C'],
+    }, index=[10, 11, 12, 13, 14, 15, 16])
+
+    wynik = ppr.znajdz_duplikaty(dane_wejsciowe, ['Gmina', 'Powiat'])
+
+    assert wynik.index.tolist() == [10, 13, 12, 14, 16]
+    assert wynik['grupa'].tolist() == [0, 0, 1, 1, 1]
+    assert wynik['liczba'].tolist() == [2, 2, 3, 3, 3]
+    assert ppr.znajdz_duplikaty(dane_wejsciowe, column='Powiat')['grupa'].nunique() == 2
+    assert ppr.znajdz_duplikaty(dane_wejsciowe, 'Brak') is None
+
+
+def test_detektor_duplikatow_porcjami_jak_w_calosci():
+    """
+    Sprawdza czy duplikaty wyszukiwane w kolejnych porcjach (także między porcjami) dają ten sam wynik
+    co wyszukiwanie w całej tabeli i pokrywają się z wierszami z duplicated
+    """
+    rng = np.random.default_rng(0)
+    dane_wejsciowe = pd.DataFrame({'TERYT': rng.integers(0, 300, 1000), 'rok': rng.integers(2019, 2022, 1000)})
+
+    detektor = ppr.DetektorDuplikatow(['TERYT', 'rok'])
+    for poczatek in range(0, len(dane_wejsciowe), 170):
+        detektor.dodaj(dane_wejsciowe.iloc[poczatek:poczatek + 170])
+    wynik = detektor.wynik()
+
+    assert_frame_equal(wynik, ppr.znajdz_duplikaty(dane_wejsciowe, ['TERYT', 'rok']), check_names=False)
+    oczekiwane = dane_wejsciowe.duplicated(['TERYT', 'rok'], keep=False)
+    assert sorted(wynik.index) == np.flatnonzero(oczekiwane).tolist()
@@ -0,0 +1,49 @@
+import pandas as pd
+import pytest
+from data_analyzer import profilowanie as prof
+from data_analyzer import preprocessor as ppr
+
+
+@pytest.fixture(autouse=True)
+def wylacz_po_tescie():
+    yield
+    prof.wylacz()
+    prof.wyczysc()
+
+
+def test_mierz_wylaczone_nie_zapisuje_pomiarow():
+    df = pd.DataFrame({"TERYT": ["0201011", None, "0201022"]})
+    wynik = ppr.usun_puste_wiersze(df)
+    assert len(wynik) == 2
+    assert prof.raport() == []
+
+
+def test_mierz_zapisuje_wiersze_czas_i_pamiec():
+    prof.wlacz()
+    df = pd.DataFrame({"TERYT": ["0201011", None, "0201022"]})
+    ppr.usun_puste_wiersze(df)
+    pomiary = prof.raport()
+    assert len(pomiary) == 1
+    pomiar = pomiary[0]
+    assert pomiar["nazwa"] == "preprocessor.usun_puste_wiersze"
+    assert pomiar["wiersze_we"] == 3
+    assert pomiar["wiersze_wy"] == 2
+    assert pomiar["czas_s"] >= 0
+    assert pomiar["pamiec_szczyt_mb"] >= 0
+    assert "usun_puste_wiersze" in prof.tabela()
+
+
+def test_etap_zagniezdzony():
+    prof.wlacz()
+    with prof.etap("zewnętrzny", 10) as pomiar:
+        with prof.etap("wewnętrzny"):
+            lista = [0] * 1_000_000
+        del lista
+        pomiar["wiersze_wy"] = 5
+    zewnetrzny, wewnetrzny = prof.raport()
+    assert (zewnetrzny["poziom"], wewnetrzny["poziom"]) == (0, 1)
+    assert (zewnetrzny["wiersze_we"], zewnetrzny["wiersze_wy"]) == (10, 5)
+    # szczyt pamięci etapu zagnieżdżonego wlicza się do etapu nadrzędnego
+    assert wewnetrzny["pamiec_szczyt_mb"] > 5
+    assert zewnetrzny["pamiec_szczyt_mb"] >= wewnetrzny["pamiec_szczyt_mb"]
+    assert zewnetrzny["czas_s"] >= wewnetrzny["czas_s"]
@@ -0,0 +1,53 @@
+import json
+import numpy as np
+import pandas as pd
+import pytest
+from data_analyzer import reporter as rep
+from pandas.testing import assert_frame_equal
+
+
+def test_generuj_raport_zachowuje_typy_numpy_i_pandas(tmp_path):
+    sciezka = str(tmp_path / "raport.json")
+    dane = {
+        "min": np.int64(2 ** 40 + 1),
+        "srednia": np.float32(0.5),
+        "istotnosc": np.bool_(True),
+        "wartosci": np.array([1, 2]),
+        "data": pd.Timestamp("2024-01-02"),
+        "brak": pd.NA,
+    }
+    assert rep.generuj_raport(dane, sciezka, kompaktowy=True)
+
+    with open(sciezka, encoding="utf-8") as f:
+        tekst = f.read()
+    assert "\n" not in tekst
+    assert json.loads(tekst) == {"min": 2 ** 40 + 1, "srednia": 0.5, "istotnosc": True, "wartosci": [1, 2],
+                                 "data": "2024-01-02T00:00:00", "brak": None}
+    assert not rep.generuj_raport({"obiekt": object()}, sciezka)
+
+
+def test_zapisz_ndjson_z_rekordow_i_tabeli(tmp_path, monkeypatch):
+    sciezka = str(tmp_path / "rekordy.ndjson")
+    assert rep.zapisz_ndjson(({"test": i, "p_value": np.float64(i / 10), "istotny": np.bool_(i > 1)} for i in range(3)), sciezka)
+    with open(sciezka, encoding="utf-8") as f:
+        rekordy = [json.loads(wiersz) for wiersz in f]
+    assert rekordy[2] == {"test": 2, "p_value": 0.2, "istotny": True}
+
+    monkeypatch.setattr(rep, "ROZMIAR_PORCJI", 2)
+    df = pd.DataFrame({"Gmina": ["Łódź", "Kraków", "Gdańsk"], "Ludność": np.array([1, 2, 3], dtype=np.int32)})
+    assert rep.zapisz_ndjson(df, sciezka)
+    with open(sciezka, encoding="utf-8") as f:
+        rekordy = [json.loads(wiersz) for wiersz in f]
+    assert rekordy == df.to_dict(orient="records")
+
+
+@pytest.mark.parametrize("rozszerzenie", [".csv", ".parquet"])
+def test_zapisz_tabele_wedlug_rozszerzenia(tmp_path, rozszerzenie):
+    if rozszerzenie == ".parquet":
+        pytest.importorskip("pyarrow")
+    df = pd.DataFrame({"Gmina": ["Łódź", "Kraków"], "Ludność": [10, 20]})
+    sciezka = str(tmp_path / f"gminy{rozszerzenie}")
+    assert rep.zapisz_tabele(df, sciezka)
+    wczytaj = pd.read_csv if rozszerzenie == ".csv" else pd.read_parquet
+    assert_frame_equal(wczytaj(sciezka), df)
+    assert not rep.zapisz_tabele(df, str(tmp_path / "gminy.xlsx"))
@@ -0,0 +1,88 @@
+import json
+import threading
+import urllib.error
+import urllib.request
+
+import pandas as pd
+from data_analyzer.kostka import KostkaTeryt
+from data_analyzer.serwer import SerwerZapytan
+
+
+def _dane(wersja: int):
+    gminy = pd.DataFrame({
+        'TERYT': [20101, 20102, 20201, 40101],
+        'Ludność': [100, 200, 300, 400 * wersja],
+        'Liczba Pożarów': [1, 3, 2, 8],
+    })
+    return {"zbiory": {"gminy": gminy}, "kostka": KostkaTeryt(gminy, ['Ludność']), "opis": f"wersja {wersja}"}
+
+
+def test_serwer_odpowiada_na_zapytania_i_przeladowuje_dane():
+    """
+    Sprawdza czy usługa odpowiada na zapytania o statystyki, korelacje i kostkę przez HTTP, zwraca 400
+    dla błędnych zapytań, a po przeładowaniu korzysta z nowych danych
+    """
+    wersje = iter([1, 2])
+    usluga = SerwerZapytan(lambda: _dane(next(wersje)))
+    serwer = usluga.serwer_http(port=0)
+    watek = threading.Thread(target=serwer.serve_forever, daemon=True)
+    watek.start()
+    adres = f"http://127.0.0.1:{serwer.server_address[1]}"
+
+    def zapytaj(sciezka, metoda="GET"):
+        try:
+            with urllib.request.urlopen(urllib.request.Request(adres + sciezka, method=metoda)) as odpowiedz:
+                return odpowiedz.status, json.loads(odpowiedz.read())
+        except urllib.error.HTTPError as e:
+            return e.code, json.loads(e.read())
+
+    try:
+        assert zapytaj("/statystyki?kolumny=Ludno%C5%9B%C4%87")[1]["Ludność"]["max"] == 400
+        kod, korelacje = zapytaj("/korelacja?metoda=spearman")
+        assert kod == 200 and korelacje[0]["metoda"] == "spearman"
+        assert [wiersz["TERYT"] for wiersz in zapytaj("/kostka?prefiks=02&poziom=gmina")[1]] == [201010, 201020, 202010]
+        assert zapytaj("/statystyki?kolumny=brak")[0] == 400
+        assert zapytaj("/nieznane")[0] == 400
+
+        assert zapytaj("/przeladuj", "POST")[1]["opis"] == "wersja 2"
+        assert zapytaj("/statystyki?kolumny=Ludno%C5%9B%C4%87")[1]["Ludność"]["max"] == 800
+    finally:
+        serwer.shutdown()
+        serwer.server_close()
+
+
+def test_nieudane_przeladowanie_zostawia_poprzednie_dane():
+    """
+    Sprawdza czy błąd wczytywania przy przeładowaniu nie usuwa załadowanych danych
+    """
+    wersje = iter([_dane(1), None])
+    usluga = SerwerZapytan(lambda: next(wersje))
+
+    kod, _ = usluga.obsluz("POST", "/przeladuj")
+
+    assert kod == 500
+    assert usluga.obsluz("GET", "/zbiory")[1]["zbiory"]["gminy"]["wiersze"] == 4
+
+
+def test_odpowiedzi_z_brakami_danych_sa_poprawnym_json():
+    """
+    Sprawdza czy braki danych w statystykach i kostce trafiają do odpowiedzi jako null, a nie jako NaN
+    """
+    gminy = pd.DataFrame({
+        'TERYT': [20101, 20102, 20201],
+        'Ludność': [100.0, None, None],
+        'Liczba Pożarów': [1, 3, 2],
+    })
+    kostka = KostkaTeryt(gminy, ['Ludność'], agregacje=["sum", "min"])
+    usluga = SerwerZapytan(lambda: {"zbiory": {"gminy": gminy}, "kostka": kostka})
+
+    def odrzuc_nan(stala):
+        raise ValueError(f"Niepoprawna wartość JSON: {stala}")
+
+    kod, tresc = usluga.obsluz("GET", "/statystyki?kolumny=Ludno%C5%9B%C4%87,Liczba%20Po%C5%BCar%C3%B3w")
+    statystyki = json.loads(json.dumps(tresc, allow_nan=False), parse_constant=odrzuc_nan)
+    assert kod == 200 and statystyki["Ludność"]["odchylenie_standardowe"] is None
+
+    kod, tresc = usluga.obsluz("GET", "/kostka?prefiks=02&poziom=powiat")
+    wiersze = json.loads(json.dumps(tresc, allow_nan=False), parse_constant=odrzuc_nan)
+    assert kod == 200 and [wiersz["Ludność (min)"] for wiersz in wiersze] == [100.0, None]
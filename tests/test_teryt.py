@@ -0,0 +1,52 @@
+import numpy as np
+import pandas as pd
+from data_analyzer import teryt
+
+
+def test_koduj_teryt_rozne_postaci_kodow():
+    """
+    Sprawdza czy kody 7-cyfrowe, 6-cyfrowe, ze spacjami, bez zera wiodącego i kody powiatów
+    dają tę samą postać WWPPGGR, a puste i błędne wartości BRAK
+    """
+    kody = teryt.koduj_teryt(['0201011', '02 01 01 4', '020101', '20101', '02 01', '3263011', None, 'abc', ''])
+
+    assert kody.tolist() == [201011, 201014, 201010, 201010, 201000, 3263011, teryt.BRAK, teryt.BRAK, teryt.BRAK]
+
+
+def test_koduj_teryt_liczby_niejednoznaczne():
+    """
+    Sprawdza czy 6-cyfrowe liczby są traktowane jako kody bez rodzaju, chyba że w kolumnie są kody 7-cyfrowe
+    albo wskazano to argumentem z_rodzajem
+    """
+    assert teryt.koduj_teryt(pd.Series([200209, 20101])).tolist() == [2002090, 201010]
+    assert teryt.koduj_teryt(pd.Series([201011, 1465011])).tolist() == [201011, 1465011]
+    assert teryt.koduj_teryt(pd.Series([201011.0, np.nan]), z_rodzajem=True).tolist() == [201011, teryt.BRAK]
+
+
+def test_dekoduj_teryt():
+    """
+    Sprawdza czy z kodu poprawnie odczytywane są województwo, powiat, gmina i rodzaj
+    """
+    wynik = teryt.dekoduj_teryt(teryt.koduj_teryt(['1465028', '32']))
+    wynik_bez_rodzaju = teryt.dekoduj_teryt(teryt.koduj_teryt([200216]))
+
+    assert wynik.to_dict('list') == {
+        'województwo': [14, 32],
+        'powiat': [65, 0],
+        'gmina': [2, 0],
+        'rodzaj': [8, 0],
+    }
+    assert wynik_bez_rodzaju.iloc[0].tolist() == [20, 2, 16, 0]
+
+
+def test_indeks_teryt_znajduje_jednostki_w_powiecie_i_wojewodztwie():
+    """
+    Sprawdza czy wyszukiwanie po prefiksie zwraca pozycje wszystkich wierszy z danej jednostki
+    """
+    kody = teryt.koduj_teryt(['1465028', '0201011', '0201022', '0202011', '1465011', '02'])
+    indeks = teryt.IndeksTeryt(kody)
+
+    assert indeks.znajdz(2).tolist() == [1, 2, 3, 5]
+    assert indeks.znajdz(2, 1).tolist() == [1, 2]
+    assert indeks.znajdz(14, 65, 2).tolist() == [0]
+    assert indeks.znajdz(8).tolist() == []